@@ -1,34 +1,310 @@
-def analizuj_dane(dane):
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+import database
+from timeseries import TimeSeries
+
+Norma = namedtuple("Norma", "wartosc okres")
+
+# Normy stężeń w µg/m³ wraz z okresem uśredniania, którego dotyczą: jednogodzinna dla NO2,
+# dobowa dla PM10 i roczna dla PM2.5. Szereg jest porównywany tylko z normą własnego parametru.
+NORMY = {
+    "PM10": Norma(50.0, "doba"),
+    "PM2.5": Norma(25.0, "rok"),
+    "NO2": Norma(200.0, "godzina"),
+}
+# Nazwy parametrów GIOŚ (paramName) odpowiadające kodom w NORMY.
+_KODY_NAZW = {
+    "pył zawieszony pm10": "PM10",
+    "pył zawieszony pm2.5": "PM2.5",
+    "dwutlenek azotu": "NO2",
+}
+PERCENTYLE = (50, 90, 98)
+
+_SEKUND_NA_DOBE = 86400
+
+# Liczba paczek czujników na proces: kilka paczek na proces wyrównuje obciążenie, gdy szeregi mają różne długości.
+PACZEK_NA_PROCES = 4
+
+# Uchwyty bazy danych otwarte w procesie roboczym, wielokrotnie używane przez kolejne paczki.
+_bazy_procesu = {}
+
+
+def norma_parametru(parametr):
+    """
+    Zwraca normę stężenia parametru.
+
+    Args:
+        parametr (str): Kod (np. "PM10") lub nazwa parametru (np. "pył zawieszony PM10"); wielkość liter
+            nie ma znaczenia.
+
+    Returns:
+        Norma: Wartość normy i okres uśredniania ("godzina", "doba" albo "rok") lub None, jeśli parametr
+            nie ma normy.
+    """
+    klucz = " ".join((parametr or "").casefold().split())
+    kod = next((kod for kod in NORMY if kod.casefold() == klucz), None) or _KODY_NAZW.get(klucz)
+    return NORMY.get(kod)
+
+
+def _przekroczenia(czasy, wartosci, numer_dnia, norma):
+    # Liczba okresów uśredniania ze średnią powyżej normy i liczba dni, w których norma została przekroczona.
+    if norma is None:
+        return None, None
+    if norma.okres == "godzina":
+        powyzej = wartosci > norma.wartosc
+        return int(np.count_nonzero(powyzej)), int(np.count_nonzero(np.bincount(numer_dnia, weights=powyzej)))
+    if norma.okres == "doba":
+        srednie_dobowe = np.bincount(numer_dnia, weights=wartosci) / np.bincount(numer_dnia)
+        dni = int(np.count_nonzero(srednie_dobowe > norma.wartosc))
+        return dni, dni
+    _, numer_roku = np.unique(czasy.astype("datetime64[Y]"), return_inverse=True)
+    srednie_roczne = np.bincount(numer_roku, weights=wartosci) / np.bincount(numer_roku)
+    return int(np.count_nonzero(srednie_roczne > norma.wartosc)), None
+
+
+def na_tablice(dane):
     """
-    Przeprowadza prostą analizę danych pomiarowych.
+    Zamienia listę krotek (data, wartosc) na tablice NumPy. Tablice szeregu TimeSeries są zwracane bez kopiowania.
 
     Args:
-        dane (list): Lista krotek zawierających datę i wartość pomiaru.
+        dane (list | TimeSeries): Lista krotek zawierających datę w formacie yyyy-mm-dd HH:MM:SS i wartość
+            pomiaru albo szereg TimeSeries.
 
     Returns:
-        dict: Słownik zawierający wyniki analizy.
+        tuple: Tablica czasów datetime64[s] i tablica wartości float64 (NaN dla brakujących pomiarów).
     """
+    if isinstance(dane, TimeSeries):
+        return dane.daty(), dane.wartosci
     if not dane:
+        return np.empty(0, dtype="datetime64[s]"), np.empty(0, dtype=np.float64)
+    daty, wartosci = zip(*dane)
+    return np.array(daty, dtype="datetime64[s]"), np.array(wartosci, dtype=np.float64)
+
+
+def _data_tekstowa(czas):
+    return np.datetime_as_string(czas, unit="s").replace("T", " ")
+
+
+def analizuj_szereg(czasy, wartosci, norma=None, percentyle=PERCENTYLE):
+    """
+    Wylicza statystyki szeregu pomiarowego na tablicach NumPy.
+
+    Przekroczenia są liczone względem normy parametru szeregu w jej okresie uśredniania:
+    przekroczenia to liczba godzin, dób albo lat ze średnią powyżej normy, a dni_przekroczen
+    to liczba dni, w których norma godzinowa lub dobowa została przekroczona (None dla normy rocznej).
+
+    Args:
+        czasy (numpy.ndarray): Czasy pomiarów (datetime64) w kolejności rosnącej.
+        wartosci (numpy.ndarray): Wartości pomiarów; NaN oznacza brak pomiaru.
+        norma (Norma): Norma parametru szeregu (zob. norma_parametru) lub None, jeśli parametr nie ma normy.
+        percentyle (tuple): Wyliczane percentyle.
+
+    Returns:
+        dict: Słownik zawierający wyniki analizy lub None, jeśli szereg nie zawiera żadnej wartości.
+    """
+    czasy = np.asarray(czasy, dtype="datetime64[s]")
+    wartosci = np.asarray(wartosci, dtype=np.float64)
+    obecne = ~np.isnan(wartosci)
+    if not obecne.all():
+        czasy = czasy[obecne]
+        wartosci = wartosci[obecne]
+    if wartosci.size == 0:
         return None
 
-    wartosci = [entry[1] for entry in dane if entry[1] is not None]
-    daty = [entry[0] for entry in dane if entry[1] is not None]
+    indeks_min = int(np.argmin(wartosci))
+    indeks_max = int(np.argmax(wartosci))
+    srednia = float(wartosci.mean())
+    poziomy = sorted(set(percentyle) | {50})
+    wartosci_percentyli = dict(zip(poziomy, np.percentile(wartosci, poziomy).tolist()))
+
+    # Nachylenie prostej regresji (metoda najmniejszych kwadratów) w jednostkach pomiaru na dobę.
+    dni = (czasy - czasy[0]).astype(np.float64) / _SEKUND_NA_DOBE
+    odchylenia_dni = dni - dni.mean()
+    mianownik = float(odchylenia_dni @ odchylenia_dni)
+    nachylenie = float(odchylenia_dni @ (wartosci - srednia)) / mianownik if mianownik else 0.0
+
+    _, numer_dnia = np.unique(czasy.astype("datetime64[D]"), return_inverse=True)
+    przekroczenia, dni_przekroczen = _przekroczenia(czasy, wartosci, numer_dnia, norma)
+
+    return {
+        "min": float(wartosci[indeks_min]),
+        "min_data": _data_tekstowa(czasy[indeks_min]),
+        "max": float(wartosci[indeks_max]),
+        "max_data": _data_tekstowa(czasy[indeks_max]),
+        "srednia": srednia,
+        "mediana": wartosci_percentyli[50],
+        "percentyle": {f"P{p}": wartosci_percentyli[p] for p in percentyle},
+        "odchylenie_standardowe": float(wartosci.std()),
+        "liczba": int(wartosci.size),
+        "norma": None if norma is None else norma._asdict(),
+        "przekroczenia": przekroczenia,
+        "dni_przekroczen": dni_przekroczen,
+        "nachylenie_trendu": nachylenie,
+        "trend": "wzrostowy" if nachylenie > 0 else "spadkowy",
+    }
+
+
+def analizuj_dane(dane, parametr=None):
+    """
+    Przeprowadza analizę danych pomiarowych.
+
+    Args:
+        dane (list | TimeSeries): Lista krotek zawierających datę i wartość pomiaru albo szereg TimeSeries.
+        parametr (str): Kod lub nazwa parametru, którego normą są liczone przekroczenia; None pomija przekroczenia.
 
-    if not wartosci:
+    Returns:
+        dict: Słownik zawierający wyniki analizy (zob. analizuj_szereg).
+    """
+    if not dane:
         return None
+    czasy, wartosci = na_tablice(dane)
+    if not isinstance(dane, TimeSeries) and np.any(czasy[1:] < czasy[:-1]):
+        kolejnosc = np.argsort(czasy, kind="stable")
+        czasy, wartosci = czasy[kolejnosc], wartosci[kolejnosc]
+    return analizuj_szereg(czasy, wartosci, norma_parametru(parametr))
+
+
+def analizuj_agregaty(agregaty, norma=None):
+    """
+    Wylicza podstawowe statystyki z agregatów dziennych (database.pobierz_agregaty) bez odczytu pomiarów.
 
-    min_wartosc = min(wartosci)
-    max_wartosc = max(wartosci)
-    srednia_wartosc = sum(wartosci) / len(wartosci)
-    trend = "wzrostowy" if wartosci[-1] > wartosci[0] else "spadkowy"
-
-    wyniki = {
-        "min": min_wartosc,
-        "min_data": daty[wartosci.index(min_wartosc)],
-        "max": max_wartosc,
-        "max_data": daty[wartosci.index(max_wartosc)],
-        "srednia": srednia_wartosc,
-        "trend": trend
+    Args:
+        agregaty (list): Krotki (początek dnia, średnia, minimum, maksimum, liczba) dla kolejnych dni.
+        norma (Norma): Norma parametru (zob. norma_parametru) lub None. Dni z przekroczeniem normy dobowej
+            są liczone ze średnich dobowych, a normy godzinowej z maksimów dobowych.
+
+    Returns:
+        dict: Słownik z minimum, maksimum, średnią ważoną liczbą pomiarów, liczbą pomiarów i dniami
+            przekroczeń (None bez normy lub dla normy rocznej) lub None, jeśli agregaty nie zawierają
+            żadnej wartości.
+    """
+    agregaty = [wiersz for wiersz in agregaty if wiersz[4]]
+    if not agregaty:
+        return None
+    poczatki, srednie, minima, maksima, liczby = (np.array(kolumna) for kolumna in zip(*agregaty))
+    srednie, minima, maksima = (a.astype(np.float64) for a in (srednie, minima, maksima))
+    indeks_min = int(np.argmin(minima))
+    indeks_max = int(np.argmax(maksima))
+    dni_przekroczen = None
+    if norma is not None and norma.okres in ("godzina", "doba"):
+        dobowe = maksima if norma.okres == "godzina" else srednie
+        dni_przekroczen = int(np.count_nonzero(dobowe > norma.wartosc))
+    return {
+        "min": float(minima[indeks_min]),
+        "min_dzien": str(poczatki[indeks_min])[:10],
+        "max": float(maksima[indeks_max]),
+        "max_dzien": str(poczatki[indeks_max])[:10],
+        "srednia": float(np.average(srednie, weights=liczby)),
+        "liczba": int(liczby.sum()),
+        "dni_przekroczen": dni_przekroczen,
     }
 
+
+def _analizuj_paczke(sciezka, id_czujnikow, data_od, data_do, norma, baza=None):
+    # Wykonywana w procesie roboczym: każdy proces otwiera własne połączenie z plikiem bazy.
+    if baza is None:
+        baza = _bazy_procesu.get(sciezka)
+        if baza is None:
+            baza = _bazy_procesu[sciezka] = database.BazaDanych(sciezka, tryb_dziennika=None, synchronizacja=None)
+    wyniki = []
+    for id_czujnika in id_czujnikow:
+        szereg = database.pobierz_szereg(id_czujnika, data_od, data_do, baza=baza)
+        wyniki.append((id_czujnika, analizuj_szereg(szereg.daty(), szereg.wartosci, norma)))
+    return wyniki
+
+
+def analizuj_czujniki(id_czujnikow, data_od=None, data_do=None, norma=None, baza=None, maks_procesow=None,
+                      wielkosc_paczki=None):
+    """
+    Wylicza statystyki (zob. analizuj_szereg) wielu czujników równolegle w puli procesów.
+
+    Czujniki są dzielone na paczki, a każdy proces roboczy odczytuje szeregi swoich paczek
+    bezpośrednio z pliku bazy danych, więc między procesami przesyłane są tylko identyfikatory
+    i wyniki. Przy jednym procesie lub jednym czujniku analiza odbywa się w bieżącym procesie.
+
+    Args:
+        id_czujnikow (iterable): Identyfikatory czujników.
+        data_od (str): Data początkowa w formacie yyyy-mm-dd lub None (od pierwszego pomiaru).
+        data_do (str): Data końcowa w formacie yyyy-mm-dd (włącznie z całym dniem) lub None (do ostatniego
+            pomiaru).
+        norma (Norma): Norma parametru czujników (zob. norma_parametru) lub None.
+        baza (BazaDanych): Uchwyt bazy danych zapisanej w pliku; domyślnie database.domyslna_baza().
+        maks_procesow (int): Liczba procesów roboczych; domyślnie liczba rdzeni procesora.
+        wielkosc_paczki (int): Liczba czujników w paczce; domyślnie tak, aby na proces przypadało
+            PACZEK_NA_PROCES paczek.
+
+    Returns:
+        dict: Słownik id_czujnika -> wyniki analizy lub None, jeśli czujnik nie ma pomiarów w przedziale.
+    """
+    baza = baza or database.domyslna_baza()
+    id_czujnikow = list(dict.fromkeys(id_czujnikow))
+    procesy = min(maks_procesow or os.cpu_count() or 1, len(id_czujnikow))
+    if procesy <= 1:
+        return dict(_analizuj_paczke(baza.sciezka, id_czujnikow, data_od, data_do, norma, baza))
+
+    wielkosc = wielkosc_paczki or -(-len(id_czujnikow) // (procesy * PACZEK_NA_PROCES))
+    paczki = [id_czujnikow[i:i + wielkosc] for i in range(0, len(id_czujnikow), wielkosc)]
+    wyniki = {}
+    with ProcessPoolExecutor(procesy) as pula:
+        for wyniki_paczki in pula.map(_analizuj_paczke, repeat(baza.sciezka), paczki, repeat(data_od),
+                                      repeat(data_do), repeat(norma)):
+            wyniki.update(wyniki_paczki)
     return wyniki
+
+
+def ranking_parametru(parametr, data_od=None, data_do=None, baza=None, maks_procesow=None, wielkosc_paczki=None):
+    """
+    Tworzy ranking stacji według stężeń parametru na podstawie wszystkich jego czujników.
+
+    Czujniki są wybierane z przypisań zapisanych przy synchronizacji (database.zapisz_czujniki_stacji)
+    i analizowane równolegle (zob. analizuj_czujniki). Stacje są uporządkowane od najgorszej:
+    według liczby przekroczeń normy parametru w jej okresie uśredniania (zob. analizuj_szereg),
+    a przy równej liczbie przekroczeń (lub braku normy) według średniego stężenia.
+
+    Args:
+        parametr (str): Nazwa lub kod parametru, np. "PM10".
+        data_od (str): Data początkowa w formacie yyyy-mm-dd lub None (od pierwszego pomiaru).
+        data_do (str): Data końcowa w formacie yyyy-mm-dd (włącznie z całym dniem) lub None (do ostatniego
+            pomiaru).
+        baza (BazaDanych): Uchwyt bazy danych zapisanej w pliku; domyślnie database.domyslna_baza().
+        maks_procesow (int): Liczba procesów roboczych; domyślnie liczba rdzeni procesora.
+        wielkosc_paczki (int): Liczba czujników w paczce procesu roboczego.
+
+    Returns:
+        list: Słowniki z kluczami id_czujnika, id_stacji, stacja, srednia, max, max_data, liczba,
+            przekroczenia i dni_przekroczen (None, jeśli parametr nie ma normy), nachylenie_trendu i trend.
+            Czujniki bez pomiarów w przedziale są pomijane.
+    """
+    baza = baza or database.domyslna_baza()
+    czujniki = database.pobierz_czujniki_parametru(parametr, baza)
+    norma = norma_parametru(parametr) or next(
+        (norma_parametru(kod) for _, _, _, kod in czujniki if norma_parametru(kod)), None)
+    wyniki = analizuj_czujniki([id_czujnika for id_czujnika, _, _, _ in czujniki], data_od, data_do, norma, baza,
+                               maks_procesow, wielkosc_paczki)
+    nazwy = {stacja['id']: stacja['stationName'] for stacja in database.pobierz_stacje(baza)}
+
+    ranking = []
+    for id_czujnika, id_stacji, _, _ in czujniki:
+        wynik = wyniki[id_czujnika]
+        if wynik is None:
+            continue
+        ranking.append({
+            "id_czujnika": id_czujnika,
+            "id_stacji": id_stacji,
+            "stacja": nazwy.get(id_stacji, str(id_stacji)),
+            "srednia": wynik["srednia"],
+            "max": wynik["max"],
+            "max_data": wynik["max_data"],
+            "liczba": wynik["liczba"],
+            "przekroczenia": wynik["przekroczenia"],
+            "dni_przekroczen": wynik["dni_przekroczen"],
+            "nachylenie_trendu": wynik["nachylenie_trendu"],
+            "trend": wynik["trend"],
+        })
+    ranking.sort(key=lambda wiersz: (-(wiersz["przekroczenia"] or 0), -wiersz["srednia"]))
+    return ranking
@@ -1,23 +1,322 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
 import requests
 
+import http_cache
+import resilience
+from transport import TransportRequests
+
 BAZA_URL = "https://api.gios.gov.pl/pjp-api/rest/"
 
+logger = logging.getLogger(__name__)
+
+
+class KlientGios:
+    """
+    Klient API GIOŚ współdzielący jedną sesję HTTP z pulą połączeń keep-alive.
+
+    Kolejne zapytania do tego samego hosta wykorzystują już otwarte połączenia TCP/TLS, a metody
+    *_wielu rozsyłają zapytania równolegle z ograniczoną liczbą wątków. Zapytania wykonuje
+    wymienny transport (zob. moduł transport), np. odtwarzający nagrane odpowiedzi bez sieci.
+
+    Metody *_wielu korzystają z jednej puli wątków klienta (maks_polaczen wątków), tworzonej przy
+    pierwszym użyciu, więc wątki i ich połączenia z pamięcią podręczną nie mnożą się z każdym wywołaniem.
+
+    Wszystkie wątki dzielą jeden ogranicznik liczby zapytań na sekundę. Odpowiedzi 429 i 5xx oraz błędy
+    połączenia są ponawiane z wykładniczym opóźnieniem (z respektowaniem Retry-After, które wstrzymuje
+    też pozostałe wątki), a każdy rodzaj punktu końcowego ma własny wyłącznik obwodu. Jednoczesne
+    zapytania o tę samą ścieżkę są scalane w jedno.
+
+    Attributes:
+        baza_url (str): Adres bazowy API.
+        maks_polaczen (int): Maksymalna liczba połączeń w puli i domyślna liczba wątków.
+        limit_czasu (float): Limit czasu pojedynczego zapytania w sekundach.
+        transport: Obiekt z metodami wyslij(url, naglowki, limit_czasu) i zamknij().
+        pamiec (http_cache.PamiecPodrecznaHttp): Pamięć podręczna odpowiedzi lub None.
+        ogranicznik (resilience.KubelekZetonow): Ogranicznik liczby zapytań na sekundę.
+        ponowienia (resilience.PolitykaPonowien): Zasady ponawiania nieudanych zapytań.
+        wylaczniki (dict): Słownik klasa ścieżki (zob. http_cache.klasa_sciezki) -> resilience.WylacznikObwodu.
+    """
+
+    def __init__(self, baza_url=BAZA_URL, maks_polaczen=16, limit_czasu=30, pamiec=None, transport=None,
+                 na_sekunde=None, ponowienia=None):
+        """
+        Inicjalizuje obiekt klasy KlientGios.
+
+        Args:
+            baza_url (str): Adres bazowy API.
+            maks_polaczen (int): Maksymalna liczba połączeń w puli.
+            limit_czasu (float): Limit czasu pojedynczego zapytania w sekundach.
+            pamiec (http_cache.PamiecPodrecznaHttp): Pamięć podręczna odpowiedzi; None wyłącza buforowanie.
+            transport: Transport wykonujący zapytania; domyślnie transport.TransportRequests(maks_polaczen).
+            na_sekunde (float): Maksymalna liczba zapytań na sekundę; None wyłącza ograniczenie.
+            ponowienia (resilience.PolitykaPonowien): Zasady ponawiania; domyślnie PolitykaPonowien().
+        """
+        self.baza_url = baza_url
+        self.pamiec = pamiec
+        self.maks_polaczen = maks_polaczen
+        self.limit_czasu = limit_czasu
+        self.transport = transport or TransportRequests(maks_polaczen)
+        self.ogranicznik = resilience.KubelekZetonow(na_sekunde)
+        self.ponowienia = ponowienia or resilience.PolitykaPonowien()
+        self.wylaczniki = {}
+        self._blokada = threading.Lock()
+        self._scalanie = resilience.ScalanieZapytan()
+        self._pula = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.zamknij()
+
+    def zamknij(self):
+        """
+        Zamyka pulę wątków, transport (sesję HTTP i połączenia z puli) oraz pamięć podręczną.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            pula, self._pula = self._pula, None
+        if pula is not None:
+            pula.shutdown(wait=True, cancel_futures=True)
+        self.transport.zamknij()
+        if self.pamiec is not None:
+            self.pamiec.zamknij()
+
+    def pobierz(self, sciezka):
+        """
+        Wykonuje zapytanie GET do API i zwraca zdekodowaną odpowiedź JSON.
+
+        Jeśli klient ma pamięć podręczną, świeże odpowiedzi są zwracane bez kontaktu z serwerem.
+        Wywołania o tę samą ścieżkę wykonywane w tym samym czasie przez różne wątki współdzielą
+        jedno zapytanie i jego wynik.
+
+        Args:
+            sciezka (str): Ścieżka względem adresu bazowego, np. "station/findAll".
+
+        Returns:
+            dict | list: Zdekodowana odpowiedź.
+        """
+        return self._scalanie.wykonaj(sciezka, lambda: self._pobierz(sciezka))
+
+    def _pobierz(self, sciezka):
+        if self.pamiec is not None:
+            return self.pamiec.pobierz_przez(sciezka, lambda naglowki: self._zapytanie_z_ponowieniami(sciezka, naglowki))
+        odpowiedz = self._zapytanie_z_ponowieniami(sciezka)
+        odpowiedz.raise_for_status()
+        return odpowiedz.json()
+
+    def _wylacznik(self, sciezka):
+        klasa = http_cache.klasa_sciezki(sciezka)
+        with self._blokada:
+            wylacznik = self.wylaczniki.get(klasa)
+            if wylacznik is None:
+                wylacznik = self.wylaczniki[klasa] = resilience.WylacznikObwodu()
+            return wylacznik
+
+    def _zapytanie_z_ponowieniami(self, sciezka, naglowki=None):
+        # Zwraca ostatnią odpowiedź (także błędną, którą sprawdza wywołujący) albo zgłasza ostatni błąd połączenia.
+        wylacznik = self._wylacznik(sciezka)
+        for proba in range(self.ponowienia.maks_prob):
+            if not wylacznik.zezwol():
+                raise resilience.ObwodOtwarty(f"Obwód {http_cache.klasa_sciezki(sciezka)} jest otwarty: {sciezka}")
+            self.ogranicznik.pobierz()
+            opoznienie_serwera = None
+            try:
+                odpowiedz = self._zapytanie(sciezka, naglowki)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                wylacznik.blad()
+                if proba + 1 == self.ponowienia.maks_prob:
+                    raise
+                powod = e
+            except BaseException:
+                # Każdy inny błąd (np. zerwane połączenie w trakcie odczytu treści) kończy też zapytanie próbne.
+                wylacznik.blad()
+                raise
+            else:
+                if odpowiedz.status_code not in resilience.KODY_PONAWIANE:
+                    wylacznik.sukces()
+                    return odpowiedz
+                if odpowiedz.status_code == 429:
+                    # Przekroczenie limitu nie świadczy o awarii punktu końcowego; wstrzymywane są wszystkie wątki.
+                    wylacznik.sukces()
+                    opoznienie_serwera = resilience.retry_after(odpowiedz)
+                else:
+                    wylacznik.blad()
+                if proba + 1 == self.ponowienia.maks_prob:
+                    return odpowiedz
+                powod = odpowiedz.status_code
+            opoznienie = self.ponowienia.opoznienie(proba, opoznienie_serwera)
+            logger.info("Ponawiam %s za %.2f s (próba %d, powód: %s)", sciezka, opoznienie, proba + 2, powod)
+            if opoznienie_serwera is not None:
+                # Ogranicznik zatrzyma przy kolejnej próbie ten i pozostałe wątki.
+                self.ogranicznik.wstrzymaj(opoznienie)
+            else:
+                time.sleep(opoznienie)
+
+    def _zapytanie(self, sciezka, naglowki=None):
+        return self.transport.wyslij(self.baza_url + sciezka, naglowki, self.limit_czasu)
+
+    def stacje(self):
+        """
+        Pobiera listę wszystkich stacji pomiarowych.
+
+        Returns:
+            list: Słowniki stacji w formacie odpowiedzi station/findAll.
+        """
+        return self.pobierz("station/findAll")
+
+    def czujniki(self, id_stacji):
+        """
+        Pobiera czujniki stacji pomiarowej.
+
+        Args:
+            id_stacji (int): Identyfikator stacji.
+
+        Returns:
+            list: Słowniki czujników w formacie odpowiedzi station/sensors.
+        """
+        return self.pobierz(f"station/sensors/{id_stacji}")
+
+    def dane(self, id_czujnika):
+        """
+        Pobiera pomiary czujnika z ostatnich dni.
+
+        Args:
+            id_czujnika (int): Identyfikator czujnika.
+
+        Returns:
+            dict: Odpowiedź data/getData z kluczem "values" (lista słowników z kluczami "date" i "value").
+        """
+        return self.pobierz(f"data/getData/{id_czujnika}")
+
+    def indeks(self, id_stacji):
+        """
+        Pobiera bieżący indeks jakości powietrza stacji.
+
+        Args:
+            id_stacji (int): Identyfikator stacji.
+
+        Returns:
+            dict: Odpowiedź aqindex/getIndex.
+        """
+        return self.pobierz(f"aqindex/getIndex/{id_stacji}")
+
+    def _pula_watkow(self):
+        with self._blokada:
+            if self._pula is None:
+                self._pula = ThreadPoolExecutor(max_workers=self.maks_polaczen, thread_name_prefix="gios")
+            return self._pula
+
+    def pobierz_wiele(self, metoda, identyfikatory, maks_watkow=None):
+        """
+        Wywołuje metodę równolegle dla wielu identyfikatorów i zwraca wyniki w kolejności ukończenia.
+
+        Zapytania wykonuje wspólna pula wątków klienta; jednocześnie trwa co najwyżej maks_watkow
+        zapytań z jednego wywołania. Błąd pojedynczego zapytania nie przerywa pozostałych; jest
+        zwracany razem z identyfikatorem.
+
+        Args:
+            metoda (callable): Funkcja przyjmująca identyfikator, np. self.czujniki.
+            identyfikatory (iterable): Identyfikatory stacji lub czujników.
+            maks_watkow (int): Maksymalna liczba równoległych zapytań (nie więcej niż maks_polaczen);
+                domyślnie maks_polaczen.
+
+        Yields:
+            tuple: (identyfikator, wynik, blad), gdzie wynik albo blad jest równy None.
+        """
+        pula = self._pula_watkow()
+        kolejne = iter(identyfikatory)
+        przyszle = {pula.submit(metoda, identyfikator): identyfikator
+                    for identyfikator in islice(kolejne, min(maks_watkow or self.maks_polaczen, self.maks_polaczen))}
+        try:
+            while przyszle:
+                gotowe, _ = wait(przyszle, return_when=FIRST_COMPLETED)
+                for przyszly in gotowe:
+                    identyfikator = przyszle.pop(przyszly)
+                    for nastepny in islice(kolejne, 1):
+                        przyszle[pula.submit(metoda, nastepny)] = nastepny
+                    try:
+                        wynik, blad = przyszly.result(), None
+                    except (requests.RequestException, ValueError) as e:
+                        # ValueError: treść odpowiedzi nie jest poprawnym JSON-em.
+                        wynik, blad = None, e
+                    yield identyfikator, wynik, blad
+        finally:
+            for przyszly in przyszle:
+                przyszly.cancel()
+
+    def czujniki_wielu(self, id_stacji, maks_watkow=None):
+        """
+        Pobiera równolegle czujniki wielu stacji (zob. pobierz_wiele).
+
+        Args:
+            id_stacji (iterable): Identyfikatory stacji.
+            maks_watkow (int): Maksymalna liczba równoległych zapytań.
+
+        Returns:
+            generator: Krotki (id_stacji, czujniki, blad).
+        """
+        return self.pobierz_wiele(self.czujniki, id_stacji, maks_watkow)
+
+    def dane_wielu(self, id_czujnikow, maks_watkow=None):
+        """
+        Pobiera równolegle pomiary wielu czujników (zob. pobierz_wiele).
+
+        Args:
+            id_czujnikow (iterable): Identyfikatory czujników.
+            maks_watkow (int): Maksymalna liczba równoległych zapytań.
+
+        Returns:
+            generator: Krotki (id_czujnika, odpowiedź data/getData, blad).
+        """
+        return self.pobierz_wiele(self.dane, id_czujnikow, maks_watkow)
+
+    def indeksy_wielu(self, id_stacji, maks_watkow=None):
+        """
+        Pobiera równolegle indeksy jakości powietrza wielu stacji (zob. pobierz_wiele).
+
+        Args:
+            id_stacji (iterable): Identyfikatory stacji.
+            maks_watkow (int): Maksymalna liczba równoległych zapytań.
+
+        Returns:
+            generator: Krotki (id_stacji, odpowiedź aqindex/getIndex, blad).
+        """
+        return self.pobierz_wiele(self.indeks, id_stacji, maks_watkow)
+
+_klient = None
+_blokada_klienta = threading.Lock()
+
+
+def domyslny_klient():
+    """
+    Zwraca współdzielony klient API z dyskową pamięcią podręczną, używany przez funkcje modułu.
+
+    Returns:
+        KlientGios: Domyślny klient API.
+    """
+    global _klient
+    with _blokada_klienta:
+        if _klient is None:
+            _klient = KlientGios(pamiec=http_cache.PamiecPodrecznaHttp())
+        return _klient
+
+
 def pobierz_stacje():
-    odpowiedz = requests.get(BAZA_URL + "station/findAll")
-    odpowiedz.raise_for_status()
-    return odpowiedz.json()
+    return domyslny_klient().stacje()
 
 def pobierz_czujniki(id_stacji):
-    odpowiedz = requests.get(BAZA_URL + f"station/sensors/{id_stacji}")
-    odpowiedz.raise_for_status()
-    return odpowiedz.json()
+    return domyslny_klient().czujniki(id_stacji)
 
 def pobierz_dane(id_czujnika):
-    odpowiedz = requests.get(BAZA_URL + f"data/getData/{id_czujnika}")
-    odpowiedz.raise_for_status()
-    return odpowiedz.json()
+    return domyslny_klient().dane(id_czujnika)
 
 def pobierz_indeks_jakosci_powietrza(id_stacji):
-    odpowiedz = requests.get(BAZA_URL + f"aqindex/getIndex/{id_stacji}")
-    odpowiedz.raise_for_status()
-    return odpowiedz.json()
+    return domyslny_klient().indeks(id_stacji)
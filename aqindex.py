@@ -0,0 +1,196 @@
+"""
+Migawki indeksu jakości powietrza wszystkich stacji.
+
+SilnikIndeksow pobiera równolegle aqindex/getIndex dla wielu stacji, zapisuje nowe odczyty
+w historii (tabela indeksy, klucz: stacja i czas obliczenia) i utrzymuje w pamięci tabelę
+bieżących indeksów, z której mapa odczytuje kolory stacji bez żadnych zapytań do API.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import api
+import database
+
+logger = logging.getLogger(__name__)
+
+# Indeks GIOŚ jest przeliczany co godzinę; częstsze odświeżanie trafia głównie w pamięć podręczną HTTP.
+INTERWAL = 15 * 60
+
+Indeks = namedtuple("Indeks", "czas poziom parametr")
+
+
+def odczyt_indeksu(id_stacji, odpowiedz):
+    """
+    Zamienia odpowiedź aqindex/getIndex na wiersz historii indeksu.
+
+    Args:
+        id_stacji (int): Identyfikator stacji.
+        odpowiedz (dict): Odpowiedź API.
+
+    Returns:
+        tuple: (id_stacji, czas obliczenia w sekundach od epoki, poziom 0-5 lub None, parametr decydujący
+            lub None) albo None, jeśli indeks nie został obliczony.
+    """
+    data = (odpowiedz or {}).get("stCalcDate")
+    if not data:
+        return None
+    czas = int(datetime.fromisoformat(data).replace(tzinfo=timezone.utc).timestamp())
+    poziom = (odpowiedz.get("stIndexLevel") or {}).get("id")
+    if poziom is not None and poziom < 0:
+        poziom = None
+    return id_stacji, czas, poziom, odpowiedz.get("stIndexCrParam")
+
+
+class SilnikIndeksow:
+    """
+    Cykliczne, równoległe migawki indeksu jakości powietrza z historią w bazie danych.
+
+    Bieżąca tabela indeksów jest trzymana w pamięci i uzupełniana przyrostowo: każde odświeżenie
+    pobiera tylko stacje, których migawka jest starsza niż interwal, a do historii i tabeli
+    trafiają tylko odczyty z nowym czasem obliczenia. Metody są bezpieczne wątkowo.
+
+    Attributes:
+        klient (api.KlientGios): Klient API.
+        baza (BazaDanych): Uchwyt bazy danych lub None (domyślna baza).
+        interwal (float): Wiek migawki w sekundach, po którym stacja jest pobierana ponownie.
+        maks_watkow (int): Maksymalna liczba równoległych zapytań.
+    """
+
+    def __init__(self, klient=None, baza=None, interwal=INTERWAL, maks_watkow=8):
+        """
+        Inicjalizuje obiekt klasy SilnikIndeksow.
+
+        Args:
+            klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient() przy pierwszym odświeżeniu.
+            baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+            interwal (float): Wiek migawki w sekundach, po którym stacja jest pobierana ponownie.
+            maks_watkow (int): Maksymalna liczba równoległych zapytań.
+        """
+        self.klient = klient
+        self.baza = baza
+        self.interwal = interwal
+        self.maks_watkow = maks_watkow
+        self._biezace = {}
+        self._pobrano = {}
+        self._blokada = threading.Lock()
+        self._odswiezanie = threading.Lock()
+        self._zatrzymaj = threading.Event()
+        self._watek = None
+
+    def wczytaj(self):
+        """
+        Wypełnia tabelę bieżących indeksów najnowszymi odczytami zapisanymi w bazie danych.
+
+        Returns:
+            int: Liczba wczytanych stacji.
+        """
+        wiersze = database.pobierz_biezace_indeksy(baza=self.baza)
+        with self._blokada:
+            for id_stacji, czas, poziom, parametr in wiersze:
+                obecny = self._biezace.get(id_stacji)
+                if obecny is None or obecny.czas < czas:
+                    self._biezace[id_stacji] = Indeks(czas, poziom, parametr)
+        return len(wiersze)
+
+    def odswiez(self, id_stacji, wymus=False):
+        """
+        Pobiera równolegle indeksy stacji, których migawka jest przeterminowana, i zapisuje nowe odczyty.
+
+        Args:
+            id_stacji (iterable): Identyfikatory stacji.
+            wymus (bool): Czy pobrać wszystkie podane stacje niezależnie od wieku migawki.
+
+        Returns:
+            dict: Liczba pobranych stacji, nowych odczytów, błędów i czas odświeżenia w sekundach.
+        """
+        start = time.perf_counter()
+        teraz = time.monotonic()
+        with self._blokada:
+            do_pobrania = [id_ for id_ in dict.fromkeys(id_stacji)
+                           if wymus or teraz - self._pobrano.get(id_, float("-inf")) >= self.interwal]
+        wynik = {"pobrane": 0, "nowe": 0, "bledy": 0}
+        nowe = []
+        with self._odswiezanie:
+            klient = self.klient or api.domyslny_klient()
+            for id_, odpowiedz, blad in klient.indeksy_wielu(do_pobrania, self.maks_watkow):
+                if blad is not None:
+                    logger.warning("Nie udało się pobrać indeksu stacji %s: %s", id_, blad)
+                    wynik["bledy"] += 1
+                    continue
+                wynik["pobrane"] += 1
+                odczyt = odczyt_indeksu(id_, odpowiedz)
+                with self._blokada:
+                    self._pobrano[id_] = teraz
+                    obecny = self._biezace.get(id_)
+                    if odczyt is None or (obecny is not None and obecny.czas >= odczyt[1]):
+                        continue
+                    self._biezace[id_] = Indeks(*odczyt[1:])
+                nowe.append(odczyt)
+            if nowe:
+                wynik["nowe"] = database.zapisz_indeksy(nowe, baza=self.baza)
+        wynik["czas"] = time.perf_counter() - start
+        logger.info("Indeksy: %d stacji pobranych, %d nowych odczytów, %d błędów w %.2f s",
+                    wynik["pobrane"], wynik["nowe"], wynik["bledy"], wynik["czas"])
+        return wynik
+
+    def biezace(self):
+        """
+        Zwraca bieżące indeksy wszystkich stacji z tabeli w pamięci.
+
+        Returns:
+            dict: Słownik id_stacji -> Indeks(czas, poziom, parametr).
+        """
+        with self._blokada:
+            return dict(self._biezace)
+
+    def poziomy(self):
+        """
+        Zwraca bieżące poziomy indeksu stacji, dla których indeks jest znany.
+
+        Returns:
+            dict: Słownik id_stacji -> poziom (0 - bardzo dobry ... 5 - bardzo zły).
+        """
+        with self._blokada:
+            return {id_stacji: indeks.poziom for id_stacji, indeks in self._biezace.items() if indeks.poziom is not None}
+
+    def uruchom(self, id_stacji, co_ile=None):
+        """
+        Uruchamia w wątku w tle cykliczne odświeżanie indeksów.
+
+        Args:
+            id_stacji (callable): Funkcja bez argumentów zwracająca identyfikatory stacji do odświeżenia;
+                jest wywoływana przed każdym odświeżeniem, więc uwzględnia zmiany katalogu stacji.
+            co_ile (float): Odstęp między odświeżeniami w sekundach; domyślnie interwal.
+
+        Returns:
+            None
+        """
+        if self._watek is not None:
+            return
+        self._zatrzymaj.clear()
+
+        def petla():
+            while not self._zatrzymaj.is_set():
+                try:
+                    self.odswiez(id_stacji())
+                except Exception:
+                    logger.exception("Odświeżanie indeksów nie powiodło się")
+                self._zatrzymaj.wait(self.interwal if co_ile is None else co_ile)
+
+        self._watek = threading.Thread(target=petla, name="indeksy", daemon=True)
+        self._watek.start()
+
+    def zatrzymaj(self):
+        """
+        Zatrzymuje cykliczne odświeżanie i czeka na zakończenie bieżącego odświeżenia.
+
+        Returns:
+            None
+        """
+        self._zatrzymaj.set()
+        if self._watek is not None:
+            self._watek.join()
+            self._watek = None
@@ -0,0 +1,223 @@
+"""
+Pomiary wydajności zapisu, zapytań, analizy, rysowania wykresów i wyszukiwania w promieniu
+na syntetycznych danych (zob. synthetic.py).
+
+Przykład:
+
+    python benchmark.py --skala srednia --wyjscie wyniki.json --bazowe bazowe.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+import analysis
+import database
+import synthetic
+import visualization
+from catalog import StationCatalog
+
+logger = logging.getLogger("benchmark")
+
+PROG_REGRESJI = 0.25
+LIMIT_ZAPISOW_POJEDYNCZYCH = 2000
+LICZBA_ZAPYTAN = 20
+LICZBA_STACJI_PROMIENIA = 1000
+LICZBA_ZAPYTAN_PROMIENIA = 200
+
+
+def zmierz(funkcja, powtorzenia=1):
+    """
+    Mierzy czas wykonania funkcji; przy wielu powtórzeniach zwraca najkrótszy czas.
+
+    Args:
+        funkcja (callable): Funkcja bez argumentów zwracająca liczbę wykonanych operacji.
+        powtorzenia (int): Liczba powtórzeń.
+
+    Returns:
+        dict: Czas w sekundach, liczba operacji i liczba operacji na sekundę.
+    """
+    najlepszy, operacje = float("inf"), 0
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        operacje = funkcja()
+        najlepszy = min(najlepszy, time.perf_counter() - start)
+    return {"czas": najlepszy, "operacje": operacje,
+            "na_sekunde": operacje / najlepszy if najlepszy > 0 else float("inf")}
+
+
+def uruchom(skala="mala", powtorzenia=3, ziarno=0, katalog=None):
+    """
+    Wykonuje wszystkie pomiary wydajności na świeżej bazie danych.
+
+    Args:
+        skala (str): Klucz synthetic.SKALE albo krotka (liczba czujników, liczba dni).
+        powtorzenia (int): Liczba powtórzeń pomiarów odczytu (zapisy wykonywane są raz).
+        ziarno (int): Ziarno generatora danych.
+        katalog (str): Katalog tymczasowej bazy danych; domyślnie katalog tymczasowy systemu.
+
+    Returns:
+        dict: Parametry przebiegu, środowisko i wyniki pomiarów (nazwa -> wynik zmierz).
+    """
+    zbior = synthetic.zbior_danych(skala, ziarno)
+    id_czujnikow = zbior["id_czujnikow"]
+    losowe = random.Random(ziarno)
+    wyniki = {}
+
+    with tempfile.TemporaryDirectory(dir=katalog) as tymczasowy:
+        with database.BazaDanych(os.path.join(tymczasowy, "benchmark.db")) as baza:
+            database.utworz_tabele(baza)
+
+            def zapis_pojedynczy():
+                dni = LIMIT_ZAPISOW_POJEDYNCZYCH // 24 + 1
+                wiersze = list(islice(synthetic.wiersze_czujnika(0, dni), LIMIT_ZAPISOW_POJEDYNCZYCH))
+                for wiersz in wiersze:
+                    database.zapisz_dane(wiersz, baza=baza)
+                return len(wiersze)
+
+            wyniki["zapis_pojedynczy"] = zmierz(zapis_pojedynczy)
+            wyniki["zapis_wsadowy"] = zmierz(
+                lambda: database.zapisz_dane_wsadowo(zbior["wiersze"](), baza=baza)["wiersze"])
+
+            poczatek = synthetic.POCZATEK[:10]
+            koniec = str(date.fromisoformat(poczatek) + timedelta(days=zbior["dni"] - 1))
+
+            def zakresy():
+                for _ in range(LICZBA_ZAPYTAN):
+                    yield losowe.choice(id_czujnikow)
+
+            def zapytanie_zakresu():
+                wiersze = 0
+                for id_czujnika in zakresy():
+                    wiersze += len(database.pobierz_dane(id_czujnika, poczatek, koniec, baza=baza))
+                return wiersze
+
+            def agregaty():
+                return sum(len(database.pobierz_agregaty(id_czujnika, poczatek, koniec, baza=baza))
+                           for id_czujnika in zakresy())
+
+            def szereg_zakresu():
+                return sum(len(database.pobierz_szereg(id_czujnika, poczatek, koniec, baza=baza))
+                           for id_czujnika in zakresy())
+
+            wyniki["zapytanie_zakresu"] = zmierz(zapytanie_zakresu, powtorzenia)
+            wyniki["szereg_zakresu"] = zmierz(szereg_zakresu, powtorzenia)
+            wyniki["agregaty"] = zmierz(agregaty, powtorzenia)
+
+            dane = database.pobierz_wszystkie_dane(id_czujnikow[0], baza=baza)
+            wyniki["analiza"] = zmierz(lambda: analysis.analizuj_dane(dane)["liczba"], powtorzenia)
+            wyniki["analiza_wielu"] = zmierz(
+                lambda: sum(wynik["liczba"] for wynik in analysis.analizuj_czujniki(
+                    id_czujnikow, poczatek, koniec, baza=baza).values() if wynik), powtorzenia)
+
+            def wykres():
+                visualization.wykres_danych(dane, poczatek, koniec)
+                plt.close("all")
+                return len(dane)
+
+            wyniki["wykres"] = zmierz(wykres, powtorzenia)
+
+    stacje = synthetic.generuj_stacje(LICZBA_STACJI_PROMIENIA, ziarno)
+    punkty = [(losowe.uniform(49.0, 54.8), losowe.uniform(14.1, 24.1), losowe.choice((10, 25, 50)))
+              for _ in range(LICZBA_ZAPYTAN_PROMIENIA)]
+
+    def promien():
+        indeks = StationCatalog(stacje).indeks_przestrzenny()
+        for lat, lon, km in punkty:
+            indeks.w_promieniu(lat, lon, km)
+        return len(punkty)
+
+    wyniki["promien"] = zmierz(promien, powtorzenia)
+
+    return {
+        "skala": list(synthetic.SKALE[skala]) if isinstance(skala, str) else list(skala),
+        "nazwa_skali": skala if isinstance(skala, str) else None,
+        "ziarno": ziarno,
+        "srodowisko": {"python": platform.python_version(), "system": platform.platform(),
+                       "sqlite": sqlite3.sqlite_version},
+        "wyniki": wyniki,
+    }
+
+
+def porownaj(wyniki, bazowe, prog=PROG_REGRESJI):
+    """
+    Porównuje wyniki z wynikami bazowymi i wskazuje regresje.
+
+    Args:
+        wyniki (dict): Wynik funkcji uruchom.
+        bazowe (dict): Wcześniej zapisany wynik funkcji uruchom.
+        prog (float): Dopuszczalny względny wzrost czasu (np. 0.25 oznacza 25%).
+
+    Returns:
+        list: Krotki (nazwa, czas bazowy, czas, względna zmiana) dla pomiarów wolniejszych niż próg.
+    """
+    if wyniki.get("skala") != bazowe.get("skala"):
+        raise ValueError("Wyniki bazowe dotyczą innej skali danych.")
+    regresje = []
+    for nazwa, wynik in wyniki["wyniki"].items():
+        bazowy = bazowe["wyniki"].get(nazwa)
+        if bazowy is None or bazowy["czas"] <= 0:
+            continue
+        zmiana = wynik["czas"] / bazowy["czas"] - 1
+        if zmiana > prog:
+            regresje.append((nazwa, bazowy["czas"], wynik["czas"], zmiana))
+    return regresje
+
+
+def main(argumenty=None):
+    """
+    Punkt wejścia wiersza poleceń.
+
+    Args:
+        argumenty (list): Argumenty wiersza poleceń; domyślnie sys.argv[1:].
+
+    Returns:
+        int: Kod wyjścia: 0, jeśli nie wykryto regresji, 1 w przeciwnym razie.
+    """
+    parser = argparse.ArgumentParser(description="Mierzy wydajność aplikacji na syntetycznych danych.")
+    parser.add_argument("--skala", default="mala", choices=sorted(synthetic.SKALE))
+    parser.add_argument("--powtorzenia", type=int, default=3)
+    parser.add_argument("--ziarno", type=int, default=0)
+    parser.add_argument("--wyjscie", help="plik JSON, do którego zostaną zapisane wyniki")
+    parser.add_argument("--bazowe", help="plik JSON z wynikami bazowymi do porównania")
+    parser.add_argument("--prog", type=float, default=PROG_REGRESJI,
+                        help="dopuszczalny względny wzrost czasu (domyślnie 0.25)")
+    argumenty = parser.parse_args(argumenty)
+    logging.basicConfig(level="INFO", format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    wyniki = uruchom(argumenty.skala, argumenty.powtorzenia, argumenty.ziarno)
+    for nazwa, wynik in wyniki["wyniki"].items():
+        logger.info("%-18s %9.4f s %12d operacji %14.1f/s", nazwa, wynik["czas"], wynik["operacje"],
+                    wynik["na_sekunde"])
+    if argumenty.wyjscie:
+        with open(argumenty.wyjscie, "w", encoding="utf-8") as plik:
+            json.dump(wyniki, plik, indent=2)
+    else:
+        json.dump(wyniki, sys.stdout, indent=2)
+        print()
+
+    if argumenty.bazowe:
+        with open(argumenty.bazowe, encoding="utf-8") as plik:
+            regresje = porownaj(wyniki, json.load(plik), argumenty.prog)
+        for nazwa, bazowy, czas, zmiana in regresje:
+            logger.warning("Regresja %s: %.4f s -> %.4f s (%+.0f%%)", nazwa, bazowy, czas, zmiana * 100)
+        return 1 if regresje else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
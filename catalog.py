@@ -0,0 +1,261 @@
+from bisect import bisect_left
+from collections import defaultdict
+
+import api
+import database
+from spatial import IndeksPrzestrzenny
+
+
+def normalizuj(tekst):
+    """
+    Sprowadza nazwę do postaci używanej jako klucz indeksu: bez wielkości liter i nadmiarowych odstępów.
+
+    Args:
+        tekst (str): Nazwa stacji, miasta, województwa lub parametru.
+
+    Returns:
+        str: Znormalizowana nazwa.
+    """
+    return " ".join((tekst or "").casefold().split())
+
+
+class StationCatalog:
+    """
+    Katalog stacji pomiarowych z indeksami budowanymi raz, przy tworzeniu katalogu.
+
+    Wyszukiwanie stacji po identyfikatorze, nazwie, mieście, województwie i mierzonym parametrze
+    odbywa się przez słowniki, a wyszukiwanie po początku nazwy przez wyszukiwanie binarne
+    w posortowanej liście nazw. Katalog może być współdzielony przez GUI i synchronizację bez GUI.
+
+    Attributes:
+        stacje (list): Słowniki stacji w formacie odpowiedzi station/findAll, w kolejności z API.
+    """
+
+    def __init__(self, stacje):
+        """
+        Inicjalizuje obiekt klasy StationCatalog.
+
+        Args:
+            stacje (iterable): Słowniki stacji w formacie odpowiedzi station/findAll.
+        """
+        self.stacje = list(stacje)
+        self._po_id = {}
+        self._po_nazwie = {}
+        self._po_miescie = defaultdict(list)
+        self._po_wojewodztwie = defaultdict(list)
+        self._po_parametrze = defaultdict(dict)
+        self._czujniki = {}
+        self._indeks_przestrzenny = None
+        for stacja in self.stacje:
+            self._po_id[stacja['id']] = stacja
+            self._po_nazwie[stacja['stationName']] = stacja
+            miasto = stacja.get('city') or {}
+            self._po_miescie[normalizuj(miasto.get('name'))].append(stacja)
+            wojewodztwo = (miasto.get('commune') or {}).get('provinceName')
+            self._po_wojewodztwie[normalizuj(wojewodztwo)].append(stacja)
+        self._nazwy = sorted((normalizuj(stacja['stationName']), stacja['stationName']) for stacja in self.stacje)
+        self._klucze_nazw = [klucz for klucz, _ in self._nazwy]
+
+    @classmethod
+    def z_bazy(cls, baza=None):
+        """
+        Tworzy katalog z lokalnej kopii zapisanej w bazie danych.
+
+        Args:
+            baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+
+        Returns:
+            StationCatalog: Katalog stacji (pusty, jeśli kopia nie była zapisana).
+        """
+        return cls(database.pobierz_stacje(baza=baza))
+
+    @classmethod
+    def z_api(cls, klient=None, baza=None):
+        """
+        Pobiera listę stacji z API GIOŚ, zapisuje jej lokalną kopię i tworzy z niej katalog.
+
+        Args:
+            klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient().
+            baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+
+        Returns:
+            StationCatalog: Katalog stacji.
+        """
+        stacje = (klient or api.domyslny_klient()).stacje()
+        database.zapisz_stacje(stacje, baza=baza)
+        return cls(stacje)
+
+    def __len__(self):
+        return len(self.stacje)
+
+    def __iter__(self):
+        return iter(self.stacje)
+
+    def nazwy(self):
+        """
+        Zwraca nazwy wszystkich stacji.
+
+        Returns:
+            list: Nazwy stacji w kolejności z API.
+        """
+        return [stacja['stationName'] for stacja in self.stacje]
+
+    def stacja(self, id_stacji):
+        """
+        Zwraca stację o podanym identyfikatorze.
+
+        Args:
+            id_stacji (int): Identyfikator stacji (także w postaci tekstu).
+
+        Returns:
+            dict: Słownik stacji lub None, jeśli stacji nie ma w katalogu.
+        """
+        return self._po_id.get(int(id_stacji))
+
+    def po_nazwie(self, nazwa):
+        """
+        Zwraca stację o dokładnie takiej nazwie, jak w odpowiedzi API.
+
+        Args:
+            nazwa (str): Nazwa stacji.
+
+        Returns:
+            dict: Słownik stacji lub None, jeśli stacji nie ma w katalogu.
+        """
+        return self._po_nazwie.get(nazwa)
+
+    def w_miescie(self, miasto):
+        """
+        Zwraca stacje położone w mieście.
+
+        Args:
+            miasto (str): Nazwa miasta; wielkość liter i nadmiarowe odstępy nie mają znaczenia.
+
+        Returns:
+            list: Słowniki stacji (pusta lista, jeśli w mieście nie ma stacji).
+        """
+        return list(self._po_miescie.get(normalizuj(miasto), ()))
+
+    def w_wojewodztwie(self, wojewodztwo):
+        """
+        Zwraca stacje położone w województwie.
+
+        Args:
+            wojewodztwo (str): Nazwa województwa; wielkość liter i nadmiarowe odstępy nie mają znaczenia.
+
+        Returns:
+            list: Słowniki stacji (pusta lista, jeśli w województwie nie ma stacji).
+        """
+        return list(self._po_wojewodztwie.get(normalizuj(wojewodztwo), ()))
+
+    def z_parametrem(self, parametr):
+        """
+        Zwraca stacje, dla których dodano czujnik mierzący parametr (nazwa, kod lub wzór, np. "PM10").
+
+        Args:
+            parametr (str): Nazwa, kod lub wzór parametru.
+
+        Returns:
+            list: Słowniki stacji.
+        """
+        return [self._po_id[id_stacji] for id_stacji in self._po_parametrze.get(normalizuj(parametr), ())]
+
+    def dodaj_czujniki(self, id_stacji, czujniki):
+        """
+        Dodaje do katalogu czujniki stacji i indeksuje je po nazwie, kodzie i wzorze parametru.
+
+        Args:
+            id_stacji (int): Identyfikator stacji.
+            czujniki (list): Słowniki czujników w formacie odpowiedzi station/sensors.
+
+        Returns:
+            None
+        """
+        id_stacji = int(id_stacji)
+        for czujnik in self._czujniki.get(id_stacji, {}).values():
+            for klucz in self.klucze_czujnika(czujnik):
+                self._po_parametrze[klucz].pop(id_stacji, None)
+        self._czujniki[id_stacji] = {czujnik['param']['paramName']: czujnik for czujnik in czujniki}
+        for czujnik in czujniki:
+            for klucz in self.klucze_czujnika(czujnik):
+                self._po_parametrze[klucz][id_stacji] = None
+
+    @staticmethod
+    def klucze_czujnika(czujnik):
+        parametr = czujnik['param']
+        return {normalizuj(parametr.get(pole)) for pole in ('paramName', 'paramCode', 'paramFormula')
+                if parametr.get(pole)}
+
+    def czujniki(self, id_stacji):
+        """
+        Zwraca czujniki stacji dodane przez dodaj_czujniki.
+
+        Args:
+            id_stacji (int): Identyfikator stacji.
+
+        Returns:
+            list: Słowniki czujników lub None, jeśli czujniki stacji nie zostały jeszcze dodane.
+        """
+        czujniki = self._czujniki.get(int(id_stacji))
+        return None if czujniki is None else list(czujniki.values())
+
+    def czujnik(self, id_stacji, nazwa_parametru):
+        """
+        Zwraca czujnik stacji mierzący parametr o podanej nazwie.
+
+        Args:
+            id_stacji (int): Identyfikator stacji.
+            nazwa_parametru (str): Nazwa parametru (paramName), np. "pył zawieszony PM10".
+
+        Returns:
+            dict: Słownik czujnika lub None, jeśli czujniki stacji nie zostały dodane lub stacja nie mierzy parametru.
+        """
+        return self._czujniki.get(int(id_stacji), {}).get(nazwa_parametru)
+
+    def szukaj_prefiksu(self, tekst):
+        """
+        Zwraca nazwy stacji zaczynające się od tekstu, w kolejności alfabetycznej.
+
+        Args:
+            tekst (str): Początek nazwy stacji.
+
+        Returns:
+            list: Nazwy stacji.
+        """
+        prefiks = normalizuj(tekst)
+        wynik = []
+        for i in range(bisect_left(self._klucze_nazw, prefiks), len(self._nazwy)):
+            klucz, nazwa = self._nazwy[i]
+            if not klucz.startswith(prefiks):
+                break
+            wynik.append(nazwa)
+        return wynik
+
+    def szukaj(self, tekst):
+        """
+        Zwraca nazwy stacji zawierające tekst; nazwy zaczynające się od tekstu są na początku listy.
+
+        Args:
+            tekst (str): Fragment nazwy stacji.
+
+        Returns:
+            list: Nazwy stacji.
+        """
+        fragment = normalizuj(tekst)
+        if not fragment:
+            return self.nazwy()
+        prefiksowe = self.szukaj_prefiksu(fragment)
+        pozostale = [nazwa for klucz, nazwa in self._nazwy if fragment in klucz and not klucz.startswith(fragment)]
+        return prefiksowe + pozostale
+
+    def indeks_przestrzenny(self):
+        """
+        Zwraca indeks przestrzenny stacji, budując go przy pierwszym użyciu.
+
+        Returns:
+            IndeksPrzestrzenny: Indeks stacji według współrzędnych.
+        """
+        if self._indeks_przestrzenny is None:
+            self._indeks_przestrzenny = IndeksPrzestrzenny(
+                (float(stacja['gegrLat']), float(stacja['gegrLon']), stacja) for stacja in self.stacje)
+        return self._indeks_przestrzenny
@@ -0,0 +1,14 @@
+import pytest
+import database
+
+
+@pytest.fixture(autouse=True)
+def izolowana_baza(tmp_path, monkeypatch):
+    """
+    Uruchamia każdy test w katalogu tymczasowym z bazą dane_pomiarowe.db.
+    """
+    poprzednia = database.SCIEZKA_BAZY
+    monkeypatch.chdir(tmp_path)
+    database.ustaw_sciezke_bazy('dane_pomiarowe.db')
+    yield
+    database.ustaw_sciezke_bazy(poprzednia)
@@ -1,117 +1,998 @@
+import json
+import os
 import sqlite3
+import threading
+import time
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
 
+from online_stats import AkumulatorStatystyk
+from timeseries import TimeSeries
 
-def reset_baza():
+SCIEZKA_BAZY = "air_quality.db"
+TRYBY_DZIENNIKA = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+TRYBY_SYNCHRONIZACJI = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+OKRES_CALOSCI = "*"
+
+# Rozdzielczości agregatów od najdrobniejszej. Pomiary GIOŚ są godzinowe, więc agregaty godzinowe
+# liczone są wprost z tabeli dane, a dzienne i miesięczne odczytywane z tabel zbiorczych.
+ROZDZIELCZOSCI = ("godzina", "dzien", "miesiac")
+GODZIN_W_ROZDZIELCZOSCI = {"godzina": 1, "dzien": 24, "miesiac": 24 * 31}
+
+ZAPIS_POMIARU = """
+INSERT INTO dane (id_czujnika, data, wartosc) VALUES (?, ?, ?)
+ON CONFLICT (id_czujnika, data) DO UPDATE SET wartosc = COALESCE(excluded.wartosc, dane.wartosc)
+"""
+
+
+def _sprawdz_tryby(tryb_dziennika, synchronizacja):
+    if tryb_dziennika is not None and tryb_dziennika.upper() not in TRYBY_DZIENNIKA:
+        raise ValueError(f"Nieznany tryb dziennika: {tryb_dziennika}")
+    if synchronizacja is not None and synchronizacja.upper() not in TRYBY_SYNCHRONIZACJI:
+        raise ValueError(f"Nieznany tryb synchronizacji: {synchronizacja}")
+
+
+# Funkcja śledząca instrukcje SQL (zob. ustaw_sledzenie) i wszystkie istniejące uchwyty baz danych.
+_sledzenie = None
+_bazy = weakref.WeakSet()
+
+
+def ustaw_sledzenie(funkcja):
+    """
+    Ustawia funkcję wywoływaną z treścią każdej instrukcji SQL wykonywanej przez dowolny uchwyt BazaDanych.
+
+    Funkcja obejmuje połączenia już otwarte i otwierane później. Bez śledzenia połączenia nie mają
+    funkcji zwrotnej, więc nie ponoszą żadnego kosztu.
+
+    Args:
+        funkcja (callable): Funkcja przyjmująca treść instrukcji lub None, aby wyłączyć śledzenie.
+
+    Returns:
+        None
+    """
+    global _sledzenie
+    _sledzenie = funkcja
+    for baza in list(_bazy):
+        with baza._blokada:
+            polaczenia = list(baza._polaczenia)
+        for conn in polaczenia:
+            conn.set_trace_callback(funkcja)
+
+
+class BazaDanych:
+    """
+    Uchwyt bazy danych utrzymujący jedno długo żyjące połączenie SQLite na wątek.
+
+    Połączenia są otwierane leniwie przy pierwszym użyciu w danym wątku i trzymane do czasu
+    wywołania zamknij(), dzięki czemu wątek Tk i wątki robocze mogą współdzielić jeden obiekt
+    bez kosztu otwierania połączenia przy każdym zapytaniu. Przygotowane zapytania są
+    przechowywane w pamięci podręcznej instrukcji każdego połączenia.
+
+    Attributes:
+        sciezka (str): Ścieżka do pliku bazy danych.
+        tryb_dziennika (str): Tryb dziennika SQLite ustawiany przy otwarciu połączenia.
+        synchronizacja (str): Tryb PRAGMA synchronous ustawiany przy otwarciu połączenia.
+        limit_zapytan (int): Rozmiar pamięci podręcznej przygotowanych zapytań na połączenie.
+    """
+
+    def __init__(self, sciezka=SCIEZKA_BAZY, tryb_dziennika="WAL", synchronizacja="NORMAL", limit_zapytan=256):
+        """
+        Inicjalizuje obiekt klasy BazaDanych.
+
+        Args:
+            sciezka (str): Ścieżka do pliku bazy danych.
+            tryb_dziennika (str): Tryb dziennika SQLite lub None, aby go nie zmieniać.
+            synchronizacja (str): Tryb PRAGMA synchronous lub None, aby go nie zmieniać.
+            limit_zapytan (int): Rozmiar pamięci podręcznej przygotowanych zapytań na połączenie.
+        """
+        _sprawdz_tryby(tryb_dziennika, synchronizacja)
+        self.sciezka = sciezka
+        self.tryb_dziennika = tryb_dziennika
+        self.synchronizacja = synchronizacja
+        self.limit_zapytan = limit_zapytan
+        self._blokada = threading.Lock()
+        self._lokalne = threading.local()
+        self._polaczenia = []
+        _bazy.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.zamknij()
+
+    def polaczenie(self):
+        """
+        Zwraca połączenie przypisane do bieżącego wątku, otwierając je przy pierwszym użyciu.
+
+        Returns:
+            sqlite3.Connection: Połączenie z bazą danych.
+        """
+        lokalne = self._lokalne
+        conn = getattr(lokalne, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.sciezka, timeout=30, check_same_thread=False,
+                                   cached_statements=self.limit_zapytan)
+            if self.tryb_dziennika is not None:
+                conn.execute(f"PRAGMA journal_mode = {self.tryb_dziennika.upper()}")
+            if self.synchronizacja is not None:
+                conn.execute(f"PRAGMA synchronous = {self.synchronizacja.upper()}")
+            if _sledzenie is not None:
+                conn.set_trace_callback(_sledzenie)
+            lokalne.conn = conn
+            lokalne.glebokosc = 0
+            with self._blokada:
+                self._polaczenia.append(conn)
+        return conn
+
+    @contextmanager
+    def transakcja(self):
+        """
+        Menedżer kontekstu obejmujący operacje jedną transakcją.
+
+        Zagnieżdżone wywołania w tym samym wątku dołączają do zewnętrznej transakcji, a zatwierdzenie
+        lub wycofanie następuje dopiero przy wyjściu z najbardziej zewnętrznego bloku.
+
+        Returns:
+            sqlite3.Connection: Połączenie bieżącego wątku.
+        """
+        conn = self.polaczenie()
+        lokalne = self._lokalne
+        lokalne.glebokosc += 1
+        try:
+            yield conn
+        except BaseException:
+            lokalne.glebokosc -= 1
+            if lokalne.glebokosc == 0:
+                conn.rollback()
+            raise
+        else:
+            lokalne.glebokosc -= 1
+            if lokalne.glebokosc == 0:
+                conn.commit()
+
+    def wykonaj(self, zapytanie, parametry=()):
+        """
+        Wykonuje zapytanie odczytujące na połączeniu bieżącego wątku.
+
+        Args:
+            zapytanie (str): Treść zapytania SQL.
+            parametry (tuple): Parametry zapytania.
+
+        Returns:
+            sqlite3.Cursor: Kursor z wynikami zapytania.
+        """
+        return self.polaczenie().execute(zapytanie, parametry)
+
+    def zamknij(self):
+        """
+        Zamyka wszystkie połączenia otwarte przez ten obiekt we wszystkich wątkach.
+
+        Kolejne użycie obiektu otworzy nowe połączenia.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            polaczenia, self._polaczenia = self._polaczenia, []
+            self._lokalne = threading.local()
+        for conn in polaczenia:
+            conn.close()
+
+
+_baza = None
+_blokada_bazy = threading.Lock()
+
+
+def domyslna_baza():
     """
-    Resetuje bazę danych, usuwając istniejące pliki.
+    Zwraca współdzielony uchwyt bazy danych wskazującej na SCIEZKA_BAZY.
+
+    Returns:
+        BazaDanych: Domyślny uchwyt bazy danych.
+    """
+    global _baza
+    with _blokada_bazy:
+        if _baza is None:
+            _baza = BazaDanych(SCIEZKA_BAZY)
+        return _baza
+
+
+def ustaw_sciezke_bazy(sciezka):
+    """
+    Zmienia plik bazy danych używany przez funkcje modułu, zamykając poprzednie połączenia.
+
+    Args:
+        sciezka (str): Ścieżka do pliku bazy danych.
 
     Returns:
         None
     """
-    import os
-    if os.path.exists("air_quality.db"):
-        os.remove("air_quality.db")
+    global SCIEZKA_BAZY, _baza
+    with _blokada_bazy:
+        if _baza is not None:
+            _baza.zamknij()
+        SCIEZKA_BAZY = sciezka
+        _baza = None
 
 
-def utworz_tabele():
+def reset_baza():
     """
-    Tworzy tabele w bazie danych.
+    Resetuje bazę danych, usuwając istniejące pliki (wraz z plikami dziennika WAL).
 
     Returns:
         None
     """
-    conn = sqlite3.connect("air_quality.db")
-    cursor = conn.cursor()
+    with _blokada_bazy:
+        if _baza is not None:
+            _baza.zamknij()
+    for plik in (SCIEZKA_BAZY, SCIEZKA_BAZY + "-wal", SCIEZKA_BAZY + "-shm"):
+        if os.path.exists(plik):
+            os.remove(plik)
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS czujniki (
+
+def _istnieje_tabela(conn, nazwa):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (nazwa,)).fetchone() is not None
+
+
+def _migracja_1(conn):
+    """
+    Zakłada tabelę dane z kluczem głównym (id_czujnika, data), przenosząc i deduplikując wiersze
+    ze starego układu bez klucza. Dla powtórzonych pomiarów zachowywana jest ostatnia niepusta wartość.
+    """
+    stara = _istnieje_tabela(conn, "dane")
+    if stara:
+        conn.execute("ALTER TABLE dane RENAME TO dane_v0")
+    conn.execute("""
+    CREATE TABLE dane (
+        id_czujnika INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        wartosc REAL,
+        PRIMARY KEY (id_czujnika, data),
+        FOREIGN KEY(id_czujnika) REFERENCES czujniki(id_czujnika)
+    ) WITHOUT ROWID
+    """)
+    if stara:
+        conn.execute("""
+        INSERT INTO dane (id_czujnika, data, wartosc)
+        SELECT id_czujnika, data, wartosc FROM dane_v0
+        WHERE id_czujnika IS NOT NULL AND data IS NOT NULL
+        ORDER BY rowid
+        ON CONFLICT (id_czujnika, data) DO UPDATE SET wartosc = COALESCE(excluded.wartosc, dane.wartosc)
+        """)
+        conn.execute("DROP TABLE dane_v0")
+
+
+def _migracja_2(conn):
+    """
+    Zakłada tabelę znaczników synchronizacji i wypełnia ją datą ostatniego niepustego pomiaru
+    każdego czujnika już obecnego w bazie.
+    """
+    conn.execute("""
+    CREATE TABLE znaczniki_synchronizacji (
         id_czujnika INTEGER PRIMARY KEY,
-        nazwa TEXT
+        ostatnia_data TEXT NOT NULL
     )
     """)
+    conn.execute("""
+    INSERT INTO znaczniki_synchronizacji (id_czujnika, ostatnia_data)
+    SELECT id_czujnika, MAX(data) FROM dane WHERE wartosc IS NOT NULL GROUP BY id_czujnika
+    """)
 
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS dane (
-        id_czujnika INTEGER,
-        data TEXT,
-        wartosc REAL,
-        FOREIGN KEY(id_czujnika) REFERENCES czujniki(id_czujnika)
+
+def _migracja_3(conn):
+    """
+    Zakłada tabelę z lokalną kopią katalogu stacji (odpowiedź station/findAll zapisana jako JSON).
+    """
+    conn.execute("""
+    CREATE TABLE stacje (
+        id_stacji INTEGER PRIMARY KEY,
+        dane TEXT NOT NULL
     )
     """)
 
-    conn.commit()
-    conn.close()
+
+def _migracja_4(conn):
+    """
+    Zakłada tabelę strumieniowych statystyk czujników (cała historia i poszczególne miesiące)
+    i wylicza je z pomiarów już obecnych w bazie.
+    """
+    conn.execute("""
+    CREATE TABLE statystyki_czujnikow (
+        id_czujnika INTEGER NOT NULL,
+        okres TEXT NOT NULL,
+        liczba INTEGER NOT NULL,
+        srednia REAL NOT NULL,
+        m2 REAL NOT NULL,
+        min REAL,
+        min_data TEXT,
+        max REAL,
+        max_data TEXT,
+        histogram TEXT NOT NULL,
+        PRIMARY KEY (id_czujnika, okres)
+    ) WITHOUT ROWID
+    """)
+    akumulatory = defaultdict(AkumulatorStatystyk)
+    for id_czujnika, data, wartosc in conn.execute("SELECT id_czujnika, data, wartosc FROM dane "
+                                                   "WHERE wartosc IS NOT NULL ORDER BY id_czujnika, data"):
+        akumulatory[(id_czujnika, OKRES_CALOSCI)].dodaj(wartosc, data)
+        akumulatory[(id_czujnika, data[:7])].dodaj(wartosc, data)
+    _zapisz_akumulatory(conn, akumulatory)
 
 
-def zapisz_czujnik(id_czujnika, nazwa):
+PRZELICZ_DNI = """
+INSERT OR REPLACE INTO dane_dzienne
+SELECT id_czujnika, substr(data, 1, 10), COUNT(wartosc), SUM(wartosc), MIN(wartosc), MAX(wartosc)
+FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ?
+GROUP BY id_czujnika, substr(data, 1, 10)
+"""
+
+PRZELICZ_MIESIACE = """
+INSERT OR REPLACE INTO dane_miesieczne
+SELECT id_czujnika, substr(dzien, 1, 7), SUM(liczba), SUM(suma), MIN(min), MAX(max)
+FROM dane_dzienne WHERE id_czujnika = ? AND dzien BETWEEN ? AND ?
+GROUP BY id_czujnika, substr(dzien, 1, 7)
+"""
+
+
+def _migracja_5(conn):
+    """
+    Zakłada tabele zbiorcze z dziennymi i miesięcznymi agregatami pomiarów i wypełnia je z tabeli dane.
+    """
+    for tabela, okres in (("dane_dzienne", "dzien"), ("dane_miesieczne", "miesiac")):
+        conn.execute(f"""
+        CREATE TABLE {tabela} (
+            id_czujnika INTEGER NOT NULL,
+            {okres} TEXT NOT NULL,
+            liczba INTEGER NOT NULL,
+            suma REAL,
+            min REAL,
+            max REAL,
+            PRIMARY KEY (id_czujnika, {okres})
+        ) WITHOUT ROWID
+        """)
+    conn.execute("INSERT INTO dane_dzienne SELECT id_czujnika, substr(data, 1, 10), COUNT(wartosc), SUM(wartosc), "
+                 "MIN(wartosc), MAX(wartosc) FROM dane GROUP BY id_czujnika, substr(data, 1, 10)")
+    conn.execute("INSERT INTO dane_miesieczne SELECT id_czujnika, substr(dzien, 1, 7), SUM(liczba), SUM(suma), "
+                 "MIN(min), MAX(max) FROM dane_dzienne GROUP BY id_czujnika, substr(dzien, 1, 7)")
+
+
+def _migracja_6(conn):
+    """
+    Zakłada tabelę przypisania czujników do stacji. Tabela czujniki pozostaje bez zmian,
+    bo jej kolumny są częścią dotychczasowego formatu bazy.
+    """
+    conn.execute("""
+    CREATE TABLE czujniki_stacji (
+        id_czujnika INTEGER PRIMARY KEY,
+        id_stacji INTEGER NOT NULL,
+        parametr TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX czujniki_stacji_id_stacji ON czujniki_stacji (id_stacji)")
+
+
+def _migracja_7(conn):
+    """
+    Zakłada tabelę historii indeksu jakości powietrza stacji. Czas obliczenia indeksu jest
+    przechowywany w sekundach od epoki, a poziom jako liczba, co daje kilkanaście bajtów na wpis.
+    """
+    conn.execute("""
+    CREATE TABLE indeksy (
+        id_stacji INTEGER NOT NULL,
+        czas INTEGER NOT NULL,
+        poziom INTEGER,
+        parametr TEXT,
+        PRIMARY KEY (id_stacji, czas)
+    ) WITHOUT ROWID
+    """)
+
+
+def _migracja_8(conn):
+    """
+    Dodaje kod parametru (np. NO2) do przypisania czujników, aby czujniki parametru można było
+    wybrać zarówno po nazwie, jak i po kodzie.
+    """
+    conn.execute("ALTER TABLE czujniki_stacji ADD COLUMN kod TEXT")
+    conn.execute("CREATE INDEX czujniki_stacji_parametr ON czujniki_stacji (parametr COLLATE NOCASE)")
+
+
+def _migracja_9(conn):
+    """
+    Zakłada tabelę pamięci podręcznej geokodowania (zob. geocoding.PamiecGeokodowania). Wcześniejsze
+    wersje aplikacji zakładały ją same, więc w istniejących bazach tabela może już istnieć.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS geokodowanie (
+        zapytanie TEXT PRIMARY KEY,
+        lat REAL,
+        lon REAL,
+        zrodlo TEXT NOT NULL,
+        zapisano REAL NOT NULL,
+        ostatni_dostep REAL NOT NULL
+    )
+    """)
+
+
+MIGRACJE = [
+    (1, _migracja_1),
+    (2, _migracja_2),
+    (3, _migracja_3),
+    (4, _migracja_4),
+    (5, _migracja_5),
+    (6, _migracja_6),
+    (7, _migracja_7),
+    (8, _migracja_8),
+    (9, _migracja_9),
+]
+WERSJA_SCHEMATU = MIGRACJE[-1][0]
+
+
+def utworz_tabele(baza=None):
+    """
+    Tworzy tabele w bazie danych i wykonuje brakujące migracje schematu.
+
+    Wersja schematu jest przechowywana w PRAGMA user_version.
+
+    Args:
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        None
+    """
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS czujniki (
+            id_czujnika INTEGER PRIMARY KEY,
+            nazwa TEXT
+        )
+        """)
+
+        wersja = conn.execute("PRAGMA user_version").fetchone()[0]
+        for numer, migracja in MIGRACJE:
+            if numer > wersja:
+                migracja(conn)
+                conn.execute(f"PRAGMA user_version = {numer}")
+
+
+def _zapisz_akumulatory(conn, akumulatory):
+    conn.executemany("INSERT OR REPLACE INTO statystyki_czujnikow VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     ((id_czujnika, okres, *akumulator.do_wiersza())
+                      for (id_czujnika, okres), akumulator in akumulatory.items()))
+
+
+def _wczytaj_akumulator(conn, id_czujnika, okres):
+    wiersz = conn.execute("SELECT liczba, srednia, m2, min, min_data, max, max_data, histogram "
+                          "FROM statystyki_czujnikow WHERE id_czujnika = ? AND okres = ?",
+                          (id_czujnika, okres)).fetchone()
+    return AkumulatorStatystyk() if wiersz is None else AkumulatorStatystyk.z_wiersza(wiersz)
+
+
+def _aktualizuj_statystyki(conn, wiersze):
+    """
+    Aktualizuje statystyki czujników o zmiany, które wprowadzi zapis wierszy ZAPIS_POMIARU.
+
+    Funkcję należy wywołać w tej samej transakcji, przed zapisem wierszy. Dla każdego czujnika
+    odczytywane są tylko istniejące pomiary z zakresu dat zapisywanej paczki (przez klucz główny),
+    więc koszt jest proporcjonalny do rozmiaru paczki, a nie do historii czujnika. Jeśli korekta
+    zastępuje minimum lub maksimum miesiąca, skrajne wartości miesiąca są wyznaczane ponownie
+    z jego pomiarów, a statystyki całej historii czujnika składane z miesięcznych.
+    """
+    po_czujniku = defaultdict(list)
+    for wiersz in wiersze:
+        po_czujniku[wiersz[0]].append(wiersz)
+
+    akumulatory = {}
+    for id_czujnika, wiersze_czujnika in po_czujniku.items():
+        daty = [data for _, data, _ in wiersze_czujnika]
+        istniejace = dict(conn.execute("SELECT data, wartosc FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ?",
+                                       (id_czujnika, min(daty), max(daty))))
+        do_przeliczenia = set()
+        for _, data, wartosc in wiersze_czujnika:
+            stara = istniejace.get(data)
+            nowa = stara if wartosc is None else wartosc
+            if nowa == stara:
+                continue
+            istniejace[data] = nowa
+            for okres in (OKRES_CALOSCI, data[:7]):
+                klucz = (id_czujnika, okres)
+                akumulator = akumulatory.get(klucz)
+                if akumulator is None:
+                    akumulator = akumulatory[klucz] = _wczytaj_akumulator(conn, id_czujnika, okres)
+                if stara is not None:
+                    if okres != OKRES_CALOSCI and stara in (akumulator.min, akumulator.max):
+                        do_przeliczenia.add(okres)
+                    akumulator.usun(stara)
+                akumulator.dodaj(nowa, data)
+        if do_przeliczenia:
+            _przelicz_skrajne(conn, id_czujnika, do_przeliczenia, istniejace, akumulatory)
+    _zapisz_akumulatory(conn, akumulatory)
+
+
+def _przelicz_skrajne(conn, id_czujnika, miesiace, zmienione, akumulatory):
+    # Pomiary zapisywanej paczki (zmienione) nie są jeszcze w tabeli dane, więc zastępują odczytane wartości.
+    for miesiac in miesiace:
+        pomiary = dict(conn.execute("SELECT data, wartosc FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ? "
+                                    "AND wartosc IS NOT NULL", (id_czujnika, f"{miesiac}-01", f"{miesiac}-31 23:59:59")))
+        pomiary.update((data, wartosc) for data, wartosc in zmienione.items() if data[:7] == miesiac)
+        akumulatory[(id_czujnika, miesiac)].przelicz_skrajne(
+            (data, wartosc) for data, wartosc in pomiary.items() if wartosc is not None)
+
+    calosc = AkumulatorStatystyk()
+    for okres, *wiersz in conn.execute("SELECT okres, liczba, srednia, m2, min, min_data, max, max_data, histogram "
+                                       "FROM statystyki_czujnikow WHERE id_czujnika = ? AND okres != ?",
+                                       (id_czujnika, OKRES_CALOSCI)):
+        if (id_czujnika, okres) not in akumulatory:
+            calosc.polacz(AkumulatorStatystyk.z_wiersza(wiersz))
+    for (id_, okres), akumulator in akumulatory.items():
+        if id_ == id_czujnika and okres != OKRES_CALOSCI:
+            calosc.polacz(akumulator)
+    akumulatory[(id_czujnika, OKRES_CALOSCI)] = calosc
+
+
+def _aktualizuj_agregaty(conn, wiersze):
+    """
+    Przelicza agregaty dni i miesięcy, których dotyczą zapisane wiersze.
+
+    Funkcję należy wywołać w tej samej transakcji, po zapisie wierszy. Każdy dzień jest przeliczany
+    z jego (co najwyżej 24) pomiarów, a miesiąc z jego agregatów dziennych.
+    """
+    dni = {(id_czujnika, data[:10]) for id_czujnika, data, _ in wiersze}
+    conn.executemany(PRZELICZ_DNI, ((id_czujnika, f"{dzien} 00:00:00", f"{dzien} 23:59:59")
+                                    for id_czujnika, dzien in dni))
+    miesiace = {(id_czujnika, dzien[:7]) for id_czujnika, dzien in dni}
+    conn.executemany(PRZELICZ_MIESIACE, ((id_czujnika, f"{miesiac}-01", f"{miesiac}-31")
+                                         for id_czujnika, miesiac in miesiace))
+
+
+def zapisz_czujnik(id_czujnika, nazwa, baza=None):
     """
     Zapisuje czujnik do bazy danych.
 
     Args:
         id_czujnika (int): Unikalny identyfikator czujnika.
         nazwa (str): Nazwa czujnika.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
 
     Returns:
         None
     """
-    conn = sqlite3.connect("air_quality.db")
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO czujniki (id_czujnika, nazwa) VALUES (?, ?)", (id_czujnika, nazwa))
-    conn.commit()
-    conn.close()
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        conn.execute("INSERT OR IGNORE INTO czujniki (id_czujnika, nazwa) VALUES (?, ?)", (id_czujnika, nazwa))
 
 
-def zapisz_dane(dane):
+def zapisz_dane(dane, baza=None):
     """
     Zapisuje dane pomiarowe do bazy danych.
 
+    Ponowny zapis pomiaru o tym samym czujniku i dacie aktualizuje istniejący wiersz zamiast tworzyć
+    duplikat; pusta wartość (None) nie nadpisuje wcześniej zapisanej. Statystyki i agregaty czujnika
+    są aktualizowane w tej samej transakcji.
+
     Args:
         dane (tuple): Dane pomiarowe w formie krotki (id_czujnika, data, wartosc).
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
 
     Returns:
         None
     """
-    conn = sqlite3.connect("air_quality.db")
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO dane (id_czujnika, data, wartosc) VALUES (?, ?, ?)", dane)
-    conn.commit()
-    conn.close()
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        _aktualizuj_statystyki(conn, [dane])
+        conn.execute(ZAPIS_POMIARU, dane)
+        _aktualizuj_agregaty(conn, [dane])
 
 
-def pobierz_dane(id_czujnika, data_od, data_do):
+def pobierz_dane(id_czujnika, data_od, data_do, baza=None):
     """
     Pobiera dane pomiarowe z bazy danych dla określonego czujnika w podanym przedziale czasowym.
 
     Args:
         id_czujnika (int): Unikalny identyfikator czujnika.
         data_od (str): Data początkowa w formacie yyyy-mm-dd.
-        data_do (str): Data końcowa w formacie yyyy-mm-dd.
+        data_do (str): Data końcowa w formacie yyyy-mm-dd (włącznie z całym dniem) lub yyyy-mm-dd hh:mm:ss.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
 
     Returns:
-        list: Lista krotek zawierających datę i wartość pomiaru.
+        list: Lista krotek zawierających datę i wartość pomiaru, posortowana według daty.
     """
-    conn = sqlite3.connect("air_quality.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT data, wartosc FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ?",
-                   (id_czujnika, data_od, data_do))
-    dane = cursor.fetchall()
-    conn.close()
-    return dane
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT data, wartosc FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ? "
+                        "ORDER BY data", (id_czujnika, data_od, _koniec_dnia(data_do))).fetchall()
 
 
-def pobierz_wszystkie_dane(id_czujnika):
+def pobierz_wszystkie_dane(id_czujnika, baza=None):
     """
     Pobiera wszystkie dane pomiarowe z bazy danych dla określonego czujnika.
 
     Args:
         id_czujnika (int): Unikalny identyfikator czujnika.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
 
     Returns:
         list: Lista krotek zawierających datę i wartość pomiaru.
     """
-    conn = sqlite3.connect("air_quality.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT data, wartosc FROM dane WHERE id_czujnika = ?", (id_czujnika,))
-    dane = cursor.fetchall()
-    conn.close()
-    return dane
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT data, wartosc FROM dane WHERE id_czujnika = ? ORDER BY data", (id_czujnika,)).fetchall()
+
+
+def pobierz_szereg(id_czujnika, data_od=None, data_do=None, baza=None):
+    """
+    Pobiera dane pomiarowe czujnika jako szereg TimeSeries, bez tworzenia listy krotek.
+
+    Daty są zamieniane na sekundy od epoki przez SQLite, a wiersze kursora trafiają wprost do tablic NumPy.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        data_od (str): Data początkowa w formacie yyyy-mm-dd lub None (od pierwszego pomiaru).
+        data_do (str): Data końcowa w formacie yyyy-mm-dd (włącznie z całym dniem) lub None (do ostatniego pomiaru).
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        TimeSeries: Szereg pomiarów posortowany według daty.
+    """
+    baza = baza or domyslna_baza()
+    return TimeSeries.z_kursora(baza.wykonaj(
+        "SELECT CAST(strftime('%s', data) AS INTEGER), wartosc FROM dane "
+        "WHERE id_czujnika = ? AND data BETWEEN ? AND ? ORDER BY data",
+        (id_czujnika, data_od or "", _koniec_dnia(data_do) if data_do else "\uffff")))
+
+
+def _koniec_dnia(data):
+    return f"{data} 23:59:59" if len(data) == 10 else data
+
+
+def dobierz_rozdzielczosc(data_od, data_do, maks_punktow=2000):
+    """
+    Dobiera najdrobniejszą rozdzielczość agregatów, dla której przedział mieści się w maks_punktow punktach.
+
+    Args:
+        data_od (str): Data początkowa w formacie yyyy-mm-dd.
+        data_do (str): Data końcowa w formacie yyyy-mm-dd.
+        maks_punktow (int): Maksymalna liczba punktów (np. szerokość wykresu w pikselach).
+
+    Returns:
+        str: Rozdzielczość z ROZDZIELCZOSCI; dla bardzo długich przedziałów "miesiac".
+    """
+    od = datetime.strptime(data_od[:10], "%Y-%m-%d")
+    do = datetime.strptime(data_do[:10], "%Y-%m-%d")
+    godziny = ((do - od).days + 1) * 24
+    for rozdzielczosc in ROZDZIELCZOSCI:
+        if godziny / GODZIN_W_ROZDZIELCZOSCI[rozdzielczosc] <= maks_punktow:
+            return rozdzielczosc
+    return ROZDZIELCZOSCI[-1]
+
+
+def pobierz_agregaty(id_czujnika, data_od, data_do, rozdzielczosc=None, maks_punktow=2000, baza=None):
+    """
+    Pobiera zagregowane dane pomiarowe czujnika (średnia, minimum, maksimum, liczba pomiarów na okres).
+
+    Agregaty godzinowe są liczone w SQLite zapytaniem GROUP BY, a dzienne i miesięczne odczytywane
+    z tabel zbiorczych aktualizowanych przy zapisie, więc wieloletni przedział zwraca tysiące
+    wierszy zamiast milionów. Okresy dzienne i miesięczne są zwracane w całości, także gdy
+    przedział zaczyna się lub kończy w ich trakcie.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        data_od (str): Data początkowa w formacie yyyy-mm-dd.
+        data_do (str): Data końcowa w formacie yyyy-mm-dd (włącznie).
+        rozdzielczosc (str): "godzina", "dzien" lub "miesiac"; None dobiera ją przez dobierz_rozdzielczosc.
+        maks_punktow (int): Maksymalna liczba punktów przy automatycznym doborze rozdzielczości.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Krotki (początek okresu w formacie yyyy-mm-dd HH:MM:SS, średnia, minimum, maksimum, liczba),
+            posortowane według okresu; średnia, minimum i maksimum są None dla okresów bez wartości.
+    """
+    if rozdzielczosc is None:
+        rozdzielczosc = dobierz_rozdzielczosc(data_od, data_do, maks_punktow)
+    elif rozdzielczosc not in ROZDZIELCZOSCI:
+        raise ValueError(f"Nieznana rozdzielczość: {rozdzielczosc}")
+    baza = baza or domyslna_baza()
+    if rozdzielczosc == "godzina":
+        return baza.wykonaj("SELECT strftime('%Y-%m-%d %H:00:00', data) AS okres, AVG(wartosc), MIN(wartosc), "
+                            "MAX(wartosc), COUNT(wartosc) FROM dane WHERE id_czujnika = ? AND data BETWEEN ? AND ? "
+                            "GROUP BY okres ORDER BY okres",
+                            (id_czujnika, data_od, _koniec_dnia(data_do))).fetchall()
+    if rozdzielczosc == "dzien":
+        return baza.wykonaj("SELECT dzien || ' 00:00:00', suma / liczba, min, max, liczba FROM dane_dzienne "
+                            "WHERE id_czujnika = ? AND dzien BETWEEN ? AND ? ORDER BY dzien",
+                            (id_czujnika, data_od[:10], data_do[:10])).fetchall()
+    return baza.wykonaj("SELECT miesiac || '-01 00:00:00', suma / liczba, min, max, liczba FROM dane_miesieczne "
+                        "WHERE id_czujnika = ? AND miesiac BETWEEN ? AND ? ORDER BY miesiac",
+                        (id_czujnika, data_od[:7], data_do[:7])).fetchall()
+
+
+def zapisz_dane_wsadowo(wiersze, rozmiar_paczki=5000, synchronizacja=None, baza=None):
+    """
+    Zapisuje wiele pomiarów do bazy danych w paczkach executemany.
+
+    Każda paczka jest zapisywana w osobnej transakcji, więc koszt commit (fsync) ponoszony jest
+    raz na paczkę, a nie raz na wiersz jak w zapisz_dane. Wiersze są pobierane leniwie, dlatego
+    można przekazać generator bez budowania całej listy w pamięci. Tryb dziennika (np. WAL)
+    ustawia uchwyt bazy danych przy otwarciu połączenia. Istniejące pomiary są aktualizowane
+    tak samo jak w zapisz_dane, a statystyki i agregaty czujników aktualizowane w transakcji każdej paczki.
+
+    Args:
+        wiersze (iterable): Iterowalny obiekt lub generator krotek (id_czujnika, data, wartosc).
+        rozmiar_paczki (int): Liczba wierszy zapisywanych w jednej transakcji.
+        synchronizacja (str): Tryb PRAGMA synchronous na czas zapisu (np. "OFF") lub None,
+            aby użyć ustawienia uchwytu bazy danych.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        dict: Statystyki zapisu: liczba wierszy, liczba paczek, czas w sekundach i liczba wierszy na sekundę.
+    """
+    if rozmiar_paczki < 1:
+        raise ValueError("Rozmiar paczki musi być dodatni.")
+    _sprawdz_tryby(None, synchronizacja)
+    baza = baza or domyslna_baza()
+
+    start = time.perf_counter()
+    liczba_wierszy = 0
+    liczba_paczek = 0
+    conn = baza.polaczenie()
+    if synchronizacja is not None:
+        poprzednia = conn.execute("PRAGMA synchronous").fetchone()[0]
+        conn.execute(f"PRAGMA synchronous = {synchronizacja.upper()}")
+    try:
+        iterator = iter(wiersze)
+        while True:
+            paczka = list(islice(iterator, rozmiar_paczki))
+            if not paczka:
+                break
+            with baza.transakcja() as conn:
+                _aktualizuj_statystyki(conn, paczka)
+                conn.executemany(ZAPIS_POMIARU, paczka)
+                _aktualizuj_agregaty(conn, paczka)
+            liczba_wierszy += len(paczka)
+            liczba_paczek += 1
+    finally:
+        if synchronizacja is not None:
+            conn.execute(f"PRAGMA synchronous = {poprzednia}")
+
+    czas = time.perf_counter() - start
+    return {
+        "wiersze": liczba_wierszy,
+        "paczki": liczba_paczek,
+        "czas": czas,
+        "wierszy_na_sekunde": liczba_wierszy / czas if czas > 0 else float("inf"),
+    }
+
+
+def pobierz_znacznik(id_czujnika, baza=None):
+    """
+    Pobiera znacznik synchronizacji czujnika, czyli datę ostatniego zapisanego niepustego pomiaru.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        str: Data w formacie yyyy-mm-dd HH:MM:SS lub None, jeśli czujnik nie był synchronizowany.
+    """
+    baza = baza or domyslna_baza()
+    wiersz = baza.wykonaj("SELECT ostatnia_data FROM znaczniki_synchronizacji WHERE id_czujnika = ?",
+                          (id_czujnika,)).fetchone()
+    return wiersz[0] if wiersz else None
+
+
+def zapisz_znacznik(id_czujnika, data, baza=None):
+    """
+    Przesuwa znacznik synchronizacji czujnika do podanej daty. Znacznik nigdy nie cofa się w czasie.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        data (str): Data ostatniego zapisanego niepustego pomiaru.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        None
+    """
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        conn.execute("""
+        INSERT INTO znaczniki_synchronizacji (id_czujnika, ostatnia_data) VALUES (?, ?)
+        ON CONFLICT (id_czujnika) DO UPDATE SET ostatnia_data = MAX(ostatnia_data, excluded.ostatnia_data)
+        """, (id_czujnika, data))
+
+
+def pobierz_id_czujnikow(baza=None):
+    """
+    Pobiera identyfikatory wszystkich czujników zapisanych w bazie danych.
+
+    Args:
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista krotek (id_czujnika, nazwa).
+    """
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT id_czujnika, nazwa FROM czujniki ORDER BY id_czujnika").fetchall()
+
+
+def zapisz_stacje(stacje, baza=None):
+    """
+    Zastępuje lokalną kopię katalogu stacji pomiarowych.
+
+    Args:
+        stacje (list): Lista słowników stacji w formacie odpowiedzi station/findAll.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        None
+    """
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        conn.execute("DELETE FROM stacje")
+        conn.executemany("INSERT INTO stacje (id_stacji, dane) VALUES (?, ?)",
+                         ((stacja['id'], json.dumps(stacja, ensure_ascii=False)) for stacja in stacje))
+
+
+def pobierz_stacje(baza=None):
+    """
+    Pobiera lokalną kopię katalogu stacji pomiarowych.
+
+    Args:
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista słowników stacji w formacie odpowiedzi station/findAll (pusta, jeśli katalog nie był zapisany).
+    """
+    baza = baza or domyslna_baza()
+    return [json.loads(dane) for (dane,) in baza.wykonaj("SELECT dane FROM stacje ORDER BY id_stacji")]
+
+
+def pobierz_akumulator(id_czujnika, od_miesiaca=None, do_miesiaca=None, baza=None):
+    """
+    Pobiera strumieniowe statystyki czujnika dla całej historii albo dla zakresu miesięcy.
+
+    Statystyki całej historii są odczytywane jednym wierszem, niezależnie od liczby pomiarów;
+    dla zakresu łączone są akumulatory poszczególnych miesięcy.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        od_miesiaca (str): Pierwszy miesiąc zakresu w formacie yyyy-mm lub None.
+        do_miesiaca (str): Ostatni miesiąc zakresu w formacie yyyy-mm lub None.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        AkumulatorStatystyk: Akumulator statystyk (pusty, jeśli brak pomiarów).
+    """
+    baza = baza or domyslna_baza()
+    conn = baza.polaczenie()
+    if od_miesiaca is None and do_miesiaca is None:
+        return _wczytaj_akumulator(conn, id_czujnika, OKRES_CALOSCI)
+    akumulator = AkumulatorStatystyk()
+    for wiersz in conn.execute("SELECT liczba, srednia, m2, min, min_data, max, max_data, histogram "
+                               "FROM statystyki_czujnikow WHERE id_czujnika = ? AND okres != ? "
+                               "AND okres BETWEEN ? AND ?",
+                               (id_czujnika, OKRES_CALOSCI, od_miesiaca or "0000-00", do_miesiaca or "9999-99")):
+        akumulator.polacz(AkumulatorStatystyk.z_wiersza(wiersz))
+    return akumulator
+
+
+def pobierz_statystyki(id_czujnika, od_miesiaca=None, do_miesiaca=None, baza=None):
+    """
+    Pobiera podsumowanie strumieniowych statystyk czujnika (zob. pobierz_akumulator).
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        od_miesiaca (str): Pierwszy miesiąc zakresu w formacie yyyy-mm lub None.
+        do_miesiaca (str): Ostatni miesiąc zakresu w formacie yyyy-mm lub None.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        dict: Statystyki (min, max, średnia, mediana, percentyle, odchylenie) lub None, jeśli brak pomiarów.
+    """
+    return pobierz_akumulator(id_czujnika, od_miesiaca, do_miesiaca, baza).podsumowanie()
+
+
+def zapisz_czujniki_stacji(id_stacji, czujniki, baza=None):
+    """
+    Zapisuje przypisanie czujników do stacji.
+
+    Args:
+        id_stacji (int): Identyfikator stacji.
+        czujniki (list): Słowniki czujników w formacie odpowiedzi station/sensors.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        None
+    """
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        conn.executemany("INSERT OR REPLACE INTO czujniki_stacji VALUES (?, ?, ?, ?)",
+                         ((czujnik['id'], id_stacji, czujnik['param']['paramName'], czujnik['param'].get('paramCode'))
+                          for czujnik in czujniki))
+
+
+def pobierz_czujniki_stacji(id_stacji, baza=None):
+    """
+    Pobiera czujniki przypisane do stacji.
+
+    Args:
+        id_stacji (int): Identyfikator stacji.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista krotek (id_czujnika, parametr) posortowana według identyfikatora czujnika.
+    """
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT id_czujnika, parametr FROM czujniki_stacji WHERE id_stacji = ? ORDER BY id_czujnika",
+                        (id_stacji,)).fetchall()
+
+
+def pobierz_czujniki_parametru(parametr, baza=None):
+    """
+    Pobiera czujniki wszystkich stacji mierzące parametr.
+
+    Args:
+        parametr (str): Nazwa (np. "pył zawieszony PM10") lub kod parametru (np. "PM10"); wielkość liter
+            nie ma znaczenia.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista krotek (id_czujnika, id_stacji, parametr, kod) posortowana według identyfikatora czujnika.
+    """
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT id_czujnika, id_stacji, parametr, kod FROM czujniki_stacji "
+                        "WHERE parametr = ?1 COLLATE NOCASE OR kod = ?1 COLLATE NOCASE ORDER BY id_czujnika",
+                        (parametr,)).fetchall()
+
+
+def zapisz_indeksy(indeksy, baza=None):
+    """
+    Zapisuje odczyty indeksu jakości powietrza; odczyty już zapisane (ta sama stacja i czas) są pomijane.
+
+    Args:
+        indeksy (iterable): Krotki (id_stacji, czas w sekundach od epoki, poziom lub None, parametr lub None).
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        int: Liczba nowych wpisów.
+    """
+    baza = baza or domyslna_baza()
+    with baza.transakcja() as conn:
+        przed = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO indeksy VALUES (?, ?, ?, ?)", indeksy)
+        return conn.total_changes - przed
+
+
+def pobierz_biezace_indeksy(baza=None):
+    """
+    Pobiera najnowszy zapisany odczyt indeksu każdej stacji.
+
+    Args:
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista krotek (id_stacji, czas, poziom, parametr).
+    """
+    baza = baza or domyslna_baza()
+    # Przy agregacji MAX SQLite zwraca pozostałe kolumny z wiersza, w którym wystąpiło maksimum.
+    return baza.wykonaj("SELECT id_stacji, MAX(czas), poziom, parametr FROM indeksy GROUP BY id_stacji").fetchall()
+
+
+def pobierz_historie_indeksu(id_stacji, czas_od=None, czas_do=None, baza=None):
+    """
+    Pobiera historię indeksu jakości powietrza stacji.
+
+    Args:
+        id_stacji (int): Identyfikator stacji.
+        czas_od (int): Początek przedziału w sekundach od epoki lub None.
+        czas_do (int): Koniec przedziału (włącznie) w sekundach od epoki lub None.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie domyslna_baza().
+
+    Returns:
+        list: Lista krotek (czas, poziom, parametr) posortowana według czasu.
+    """
+    baza = baza or domyslna_baza()
+    return baza.wykonaj("SELECT czas, poziom, parametr FROM indeksy WHERE id_stacji = ? AND czas BETWEEN ? AND ? "
+                        "ORDER BY czas", (id_stacji, czas_od or 0, 2 ** 62 if czas_do is None else czas_do)).fetchall()
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import database
+
+logger = logging.getLogger(__name__)
+
+ZRODLO_GEOKODER = "geokoder"
+ZRODLO_KATALOG = "katalog"
+
+
+def normalizuj_zapytanie(zapytanie):
+    """
+    Sprowadza zapytanie do postaci kanonicznej: bez wielkości liter i nadmiarowych odstępów.
+
+    Args:
+        zapytanie (str): Nazwa miejsca wpisana przez użytkownika.
+
+    Returns:
+        str: Znormalizowane zapytanie.
+    """
+    return " ".join(zapytanie.casefold().replace(",", " ").split())
+
+
+class PamiecGeokodowania:
+    """
+    Trwała pamięć podręczna wyników geokodowania z wygasaniem (TTL) i usuwaniem najdawniej używanych wpisów.
+
+    Wyniki są przechowywane w tabeli geokodowanie bazy danych aplikacji (zakładanej przez migracje
+    database.MIGRACJE), a ostatnio używane dodatkowo w pamięci operacyjnej. Nazwy miast z katalogu
+    stacji można zasiać z góry, dzięki czemu popularne zapytania nie wymagają połączenia z Nominatim.
+    Gdy geokoder jest niedostępny, zwracany jest przeterminowany wpis, jeśli taki istnieje.
+
+    Attributes:
+        geokoder (callable): Funkcja przyjmująca zapytanie i zwracająca obiekt z polami latitude
+            i longitude albo None, np. Nominatim.geocode.
+        czas_zycia (float): Czas życia wpisu z geokodera w sekundach.
+        maks_wpisow (int): Maksymalna liczba wpisów w bazie danych.
+        min_odstep (float): Minimalny odstęp między zapytaniami do geokodera w sekundach.
+    """
+
+    def __init__(self, geokoder, baza=None, czas_zycia=30 * 24 * 3600, maks_wpisow=10000, maks_wpisow_w_pamieci=256,
+                 min_odstep=1.0):
+        """
+        Inicjalizuje obiekt klasy PamiecGeokodowania.
+
+        Args:
+            geokoder (callable): Funkcja geokodująca zapytanie.
+            baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+            czas_zycia (float): Czas życia wpisu z geokodera w sekundach.
+            maks_wpisow (int): Maksymalna liczba wpisów w bazie danych.
+            maks_wpisow_w_pamieci (int): Maksymalna liczba wpisów w pamięci operacyjnej.
+            min_odstep (float): Minimalny odstęp między zapytaniami do geokodera w sekundach.
+        """
+        self.geokoder = geokoder
+        self.czas_zycia = czas_zycia
+        self.maks_wpisow = maks_wpisow
+        self.maks_wpisow_w_pamieci = maks_wpisow_w_pamieci
+        self.min_odstep = min_odstep
+        self._baza = baza or database.domyslna_baza()
+        self._blokada = threading.Lock()
+        self._blokada_geokodera = threading.Lock()
+        self._ostatnie_zapytanie = 0.0
+        self._w_pamieci = OrderedDict()
+        self._liczniki = {"trafienia": 0, "chybienia": 0, "awarie": 0}
+        database.utworz_tabele(self._baza)
+
+    def _zlicz(self, licznik):
+        with self._blokada:
+            self._liczniki[licznik] += 1
+
+    def _wpis(self, klucz):
+        with self._blokada:
+            wpis = self._w_pamieci.get(klucz)
+            if wpis is not None:
+                self._w_pamieci.move_to_end(klucz)
+                return wpis
+        wiersz = self._baza.wykonaj("SELECT lat, lon, zrodlo, zapisano FROM geokodowanie WHERE zapytanie = ?",
+                                    (klucz,)).fetchone()
+        if wiersz is None:
+            return None
+        with self._baza.transakcja() as conn:
+            conn.execute("UPDATE geokodowanie SET ostatni_dostep = ? WHERE zapytanie = ?", (time.time(), klucz))
+        wpis = (None if wiersz[0] is None else (wiersz[0], wiersz[1]), wiersz[2], wiersz[3])
+        self._do_pamieci(klucz, wpis)
+        return wpis
+
+    def _do_pamieci(self, klucz, wpis):
+        with self._blokada:
+            self._w_pamieci[klucz] = wpis
+            self._w_pamieci.move_to_end(klucz)
+            while len(self._w_pamieci) > self.maks_wpisow_w_pamieci:
+                self._w_pamieci.popitem(last=False)
+
+    def _zapisz(self, wiersze):
+        teraz = time.time()
+        with self._baza.transakcja() as conn:
+            conn.executemany("INSERT OR REPLACE INTO geokodowanie VALUES (?, ?, ?, ?, ?, ?)",
+                             ((klucz, *(wspolrzedne or (None, None)), zrodlo, teraz, teraz)
+                              for klucz, wspolrzedne, zrodlo in wiersze))
+            nadmiar = conn.execute("SELECT COUNT(*) FROM geokodowanie").fetchone()[0] - self.maks_wpisow
+            if nadmiar > 0:
+                conn.execute("DELETE FROM geokodowanie WHERE zapytanie IN "
+                             "(SELECT zapytanie FROM geokodowanie ORDER BY ostatni_dostep LIMIT ?)", (nadmiar,))
+                with self._blokada:
+                    self._w_pamieci.clear()
+        for klucz, wspolrzedne, zrodlo in wiersze:
+            self._do_pamieci(klucz, (wspolrzedne, zrodlo, teraz))
+
+    def _swiezy(self, wpis):
+        _, zrodlo, zapisano = wpis
+        return zrodlo == ZRODLO_KATALOG or time.time() - zapisano < self.czas_zycia
+
+    def geokoduj(self, zapytanie):
+        """
+        Zwraca współrzędne miejsca z pamięci podręcznej albo z geokodera.
+
+        Args:
+            zapytanie (str): Nazwa miejsca.
+
+        Returns:
+            tuple: Współrzędne (lat, lon) lub None, jeśli miejsca nie znaleziono.
+        """
+        klucz = normalizuj_zapytanie(zapytanie)
+        if not klucz:
+            return None
+        wpis = self._wpis(klucz)
+        if wpis is not None and self._swiezy(wpis):
+            self._zlicz("trafienia")
+            return wpis[0]
+
+        self._zlicz("chybienia")
+        try:
+            with self._blokada_geokodera:
+                odczekaj = self._ostatnie_zapytanie + self.min_odstep - time.monotonic()
+                if odczekaj > 0:
+                    time.sleep(odczekaj)
+                try:
+                    lokalizacja = self.geokoder(zapytanie)
+                finally:
+                    self._ostatnie_zapytanie = time.monotonic()
+        except Exception as e:
+            self._zlicz("awarie")
+            if wpis is None:
+                logger.warning("Geokodowanie '%s' nie powiodło się: %s", zapytanie, e)
+                return None
+            logger.warning("Geokoder niedostępny, używam zapisanego wyniku dla '%s': %s", zapytanie, e)
+            return wpis[0]
+
+        wspolrzedne = None if lokalizacja is None else (lokalizacja.latitude, lokalizacja.longitude)
+        self._zapisz([(klucz, wspolrzedne, ZRODLO_GEOKODER)])
+        return wspolrzedne
+
+    def zasiej_z_katalogu(self, stacje):
+        """
+        Zapisuje współrzędne miast z katalogu stacji (średnie położenie stacji w mieście).
+
+        Wpisy z katalogu nie wygasają, ale nie zastępują wyników geokodera dla tych samych nazw.
+
+        Args:
+            stacje (iterable): Słowniki stacji w formacie odpowiedzi station/findAll.
+
+        Returns:
+            int: Liczba zasianych nazw miast.
+        """
+        wspolrzedne = defaultdict(list)
+        for stacja in stacje:
+            miasto = (stacja.get('city') or {}).get('name')
+            if miasto:
+                wspolrzedne[normalizuj_zapytanie(miasto)].append((float(stacja['gegrLat']), float(stacja['gegrLon'])))
+        istniejace = {klucz for (klucz,) in self._baza.wykonaj(
+            "SELECT zapytanie FROM geokodowanie WHERE zrodlo = ?", (ZRODLO_GEOKODER,))}
+        wiersze = [(klucz, (sum(p[0] for p in punkty) / len(punkty), sum(p[1] for p in punkty) / len(punkty)),
+                    ZRODLO_KATALOG)
+                   for klucz, punkty in wspolrzedne.items() if klucz not in istniejace]
+        self._zapisz(wiersze)
+        return len(wiersze)
+
+    def statystyki(self):
+        """
+        Zwraca liczniki trafień, chybień i awarii geokodera oraz współczynnik trafień.
+
+        Returns:
+            dict: Liczniki i współczynnik trafień (0-1).
+        """
+        with self._blokada:
+            liczniki = dict(self._liczniki)
+        zapytania = liczniki["trafienia"] + liczniki["chybienia"]
+        liczniki["wspolczynnik_trafien"] = liczniki["trafienia"] / zapytania if zapytania else 0.0
+        return liczniki
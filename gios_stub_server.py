@@ -0,0 +1,272 @@
+"""
+Lokalny serwer HTTP zastępujący API GIOŚ w testach obciążeniowych bez dostępu do sieci.
+
+Serwer udostępnia pod /pjp-api/rest/ te same ścieżki co API GIOŚ (station/findAll, station/sensors,
+data/getData, aqindex/getIndex) z danymi z synthetic.py, z konfigurowalnym opóźnieniem,
+udziałem błędów i limitem zapytań na sekundę (odpowiedź 429 z nagłówkiem Retry-After).
+
+Przykład:
+
+    python gios_stub_server.py --port 8080 --stacje 300 --opoznienie 0.2 --bledy 0.05 --limit 50
+    python main.py ...  # z KlientGios(baza_url="http://127.0.0.1:8080/pjp-api/rest/")
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic
+
+PREFIKS = "/pjp-api/rest/"
+NAZWY_INDEKSU = ("Bardzo dobry", "Dobry", "Umiarkowany", "Dostateczny", "Zły", "Bardzo zły")
+
+_SCIEZKI = (
+    (re.compile(r"station/findAll$"), "_stacje"),
+    (re.compile(r"station/sensors/(\d+)$"), "_czujniki"),
+    (re.compile(r"data/getData/(\d+)$"), "_dane"),
+    (re.compile(r"aqindex/getIndex/(\d+)$"), "_indeks"),
+)
+
+
+class SerwerZastepczy:
+    """
+    Serwer HTTP zwracający syntetyczne odpowiedzi w formacie API GIOŚ.
+
+    Odpowiedzi zależą wyłącznie od parametrów serwera i ziarna (dane pomiarowe także od chwili
+    teraz), więc przebiegi testów są powtarzalne. Każda odpowiedź ma nagłówek ETag; zapytanie
+    z pasującym If-None-Match otrzymuje odpowiedź 304.
+
+    Attributes:
+        stacje (list): Słowniki stacji.
+        czujniki (dict): Słownik id_stacji -> lista czujników.
+        godziny (int): Liczba godzin pomiarów zwracanych przez data/getData.
+        opoznienie (float): Stałe opóźnienie odpowiedzi w sekundach.
+        rozrzut (float): Maksymalne dodatkowe losowe opóźnienie w sekundach.
+        bledy (float): Udział zapytań kończonych błędem 500 (0-1).
+        limit (float): Limit zapytań na sekundę lub None.
+        teraz (datetime): Chwila, do której sięgają dane pomiarowe.
+        liczniki (dict): Liczby zapytań, odpowiedzi 304, błędów i odrzuceń (429).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, stacje=50, czujniki_na_stacje=2, godziny=72, opoznienie=0.0,
+                 rozrzut=0.0, bledy=0.0, limit=None, ziarno=0, teraz=None):
+        """
+        Inicjalizuje obiekt klasy SerwerZastepczy.
+
+        Args:
+            host (str): Adres nasłuchiwania.
+            port (int): Port; 0 oznacza dowolny wolny port.
+            stacje (int): Liczba stacji.
+            czujniki_na_stacje (int): Liczba czujników na stację.
+            godziny (int): Liczba godzin pomiarów zwracanych przez data/getData.
+            opoznienie (float): Stałe opóźnienie odpowiedzi w sekundach.
+            rozrzut (float): Maksymalne dodatkowe losowe opóźnienie w sekundach.
+            bledy (float): Udział zapytań kończonych błędem 500 (0-1).
+            limit (float): Limit zapytań na sekundę; nadmiarowe otrzymują odpowiedź 429. None wyłącza limit.
+            ziarno (int): Ziarno generatora danych, opóźnień i błędów.
+            teraz (datetime): Chwila, do której sięgają dane; domyślnie bieżąca pełna godzina.
+        """
+        self.stacje = synthetic.generuj_stacje(stacje, ziarno)
+        self.czujniki = synthetic.generuj_czujniki(self.stacje, czujniki_na_stacje)
+        self._po_czujniku = {czujnik["id"]: czujnik for lista in self.czujniki.values() for czujnik in lista}
+        self.godziny = godziny
+        self.opoznienie = opoznienie
+        self.rozrzut = rozrzut
+        self.bledy = bledy
+        self.limit = limit
+        self.ziarno = ziarno
+        self.teraz = teraz or datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.liczniki = {"zapytania": 0, "niezmienione": 0, "bledy": 0, "odrzucone": 0}
+        self._losowe = random.Random(ziarno)
+        self._blokada = threading.Lock()
+        self._zetony = max(1.0, limit or 0.0)
+        self._uzupelniono = time.monotonic()
+        self._watek = None
+
+        serwer = self
+
+        class Obsluga(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                serwer._obsluz(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, port), Obsluga)
+        self._http.daemon_threads = True
+
+    @property
+    def adres(self):
+        """
+        Adres bazowy API do przekazania jako baza_url klienta api.KlientGios.
+        """
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}{PREFIKS}"
+
+    def uruchom(self):
+        """
+        Uruchamia serwer w wątku w tle.
+
+        Returns:
+            SerwerZastepczy: Ten serwer.
+        """
+        self._watek = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._watek.start()
+        return self
+
+    def zatrzymaj(self):
+        """
+        Zatrzymuje serwer i zamyka gniazdo.
+
+        Returns:
+            None
+        """
+        if self._watek is not None:
+            self._http.shutdown()
+            self._watek.join()
+            self._watek = None
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.uruchom()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.zatrzymaj()
+
+    def _zlicz(self, licznik):
+        with self._blokada:
+            self.liczniki[licznik] += 1
+
+    def _przepusc(self):
+        # Kubełek żetonów: limit żetonów na sekundę, pojemność równa limitowi (co najmniej 1).
+        if self.limit is None:
+            return True
+        with self._blokada:
+            teraz = time.monotonic()
+            self._zetony = min(max(1.0, self.limit), self._zetony + (teraz - self._uzupelniono) * self.limit)
+            self._uzupelniono = teraz
+            if self._zetony >= 1:
+                self._zetony -= 1
+                return True
+            return False
+
+    def _obsluz(self, zadanie):
+        self._zlicz("zapytania")
+        with self._blokada:
+            opoznienie = self.opoznienie + self._losowe.uniform(0, self.rozrzut)
+            blad = self._losowe.random() < self.bledy
+        if opoznienie > 0:
+            time.sleep(opoznienie)
+        if not self._przepusc():
+            self._zlicz("odrzucone")
+            self._wyslij(zadanie, 429, {"error": "Too Many Requests"},
+                         {"Retry-After": str(max(1, math.ceil(1 / self.limit)))})
+            return
+        if blad:
+            self._zlicz("bledy")
+            self._wyslij(zadanie, 500, {"error": "Internal Server Error"})
+            return
+
+        sciezka = zadanie.path.split("?", 1)[0]
+        obiekt = None
+        if sciezka.startswith(PREFIKS):
+            for wzorzec, metoda in _SCIEZKI:
+                dopasowanie = wzorzec.match(sciezka[len(PREFIKS):])
+                if dopasowanie:
+                    obiekt = getattr(self, metoda)(*map(int, dopasowanie.groups()))
+                    break
+        if obiekt is None:
+            self._wyslij(zadanie, 404, {"error": "Not Found"})
+            return
+        tresc = json.dumps(obiekt, ensure_ascii=False).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(tresc).hexdigest()
+        if zadanie.headers.get("If-None-Match") == etag:
+            self._zlicz("niezmienione")
+            self._wyslij(zadanie, 304, None, {"ETag": etag})
+            return
+        self._wyslij(zadanie, 200, tresc, {"ETag": etag})
+
+    @staticmethod
+    def _wyslij(zadanie, status, tresc, naglowki=None):
+        if tresc is not None and not isinstance(tresc, bytes):
+            tresc = json.dumps(tresc).encode("utf-8")
+        zadanie.send_response(status)
+        for nazwa, wartosc in (naglowki or {}).items():
+            zadanie.send_header(nazwa, wartosc)
+        if tresc is not None:
+            zadanie.send_header("Content-Type", "application/json;charset=UTF-8")
+        zadanie.send_header("Content-Length", str(len(tresc or b"")))
+        zadanie.end_headers()
+        if tresc:
+            zadanie.wfile.write(tresc)
+
+    def _stacje(self):
+        return self.stacje
+
+    def _czujniki(self, id_stacji):
+        return self.czujniki.get(id_stacji)
+
+    def _dane(self, id_czujnika):
+        czujnik = self._po_czujniku.get(id_czujnika)
+        if czujnik is None:
+            return None
+        parametr = synthetic.PARAMETRY[czujnik["param"]["idParam"]]
+        dni = -(-self.godziny // 24)
+        poczatek = self.teraz - timedelta(hours=dni * 24 - 1)
+        daty, wartosci = synthetic.generuj_szereg(id_czujnika, dni, poczatek.isoformat(), parametr[2], self.ziarno)
+        wartosci = [None if wartosc != wartosc else wartosc for wartosc in wartosci.tolist()]
+        pomiary = list(zip(daty.tolist(), wartosci))[-self.godziny:]
+        return {"key": parametr[1], "values": [{"date": data, "value": wartosc} for data, wartosc in reversed(pomiary)]}
+
+    def _indeks(self, id_stacji):
+        if id_stacji not in self.czujniki:
+            return None
+        data = self.teraz.strftime("%Y-%m-%d %H:%M:%S")
+        poziom = (id_stacji * 7 + self.teraz.hour // 3 + self.ziarno) % len(NAZWY_INDEKSU)
+        return {
+            "id": id_stacji,
+            "stCalcDate": data,
+            "stIndexLevel": {"id": poziom, "indexLevelName": NAZWY_INDEKSU[poziom]},
+            "stSourceDataDate": data,
+            "stIndexStatus": True,
+            "stIndexCrParam": "PYL",
+        }
+
+
+def main(argumenty=None):
+    parser = argparse.ArgumentParser(description="Lokalny serwer zastępujący API GIOŚ.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--stacje", type=int, default=300)
+    parser.add_argument("--czujniki-na-stacje", type=int, default=3)
+    parser.add_argument("--godziny", type=int, default=72)
+    parser.add_argument("--opoznienie", type=float, default=0.0, help="stałe opóźnienie odpowiedzi w sekundach")
+    parser.add_argument("--rozrzut", type=float, default=0.0, help="maksymalne losowe opóźnienie w sekundach")
+    parser.add_argument("--bledy", type=float, default=0.0, help="udział odpowiedzi 500 (0-1)")
+    parser.add_argument("--limit", type=float, help="limit zapytań na sekundę (odpowiedź 429 powyżej)")
+    parser.add_argument("--ziarno", type=int, default=0)
+    argumenty = parser.parse_args(argumenty)
+
+    serwer = SerwerZastepczy(argumenty.host, argumenty.port, argumenty.stacje, argumenty.czujniki_na_stacje,
+                             argumenty.godziny, argumenty.opoznienie, argumenty.rozrzut, argumenty.bledy,
+                             argumenty.limit, argumenty.ziarno)
+    print(f"Serwer zastępczy API GIOŚ: {serwer.adres}")
+    try:
+        serwer._http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serwer._http.server_close()
+        print(json.dumps(serwer.liczniki))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,30 @@
+import time
+
+_START = time.perf_counter()
+
+import logging
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from ttkthemes import ThemedTk
 from datetime import datetime
-import requests
-import certifi
+import api
 import database
-import visualization
 import analysis
-import folium
+import sync
+import instrumentation
+from aqindex import SilnikIndeksow
+from scheduler import PlanistaZadan
+from geocoding import PamiecGeokodowania
+from catalog import StationCatalog
+from timeseries import TimeSeries
 import webbrowser
 import os
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 
-# Testowanie połączenia z API
-response = requests.get('https://api.gios.gov.pl', verify=certifi.where())
-print(response.text)
+# Moduły matplotlib (visualization), folium i geopy są importowane dopiero przy pierwszym użyciu
+# wykresu, mapy lub filtra promienia, aby nie opóźniać pojawienia się okna.
+_CZAS_IMPORTOW = time.perf_counter() - _START
+
+logger = logging.getLogger(__name__)
 
 class WejscieZPlaceholder(ttk.Entry):
     """
@@ -89,7 +98,11 @@ class AplikacjaJakosciPowietrza:
 
     Attributes:
         root (tk.Tk): Główne okno aplikacji.
-        stacja_id (str): Identyfikator wybranej stacji pomiarowej.
+        planista (PlanistaZadan): Planista wykonujący operacje sieciowe, bazodanowe i analityczne w tle.
+        pamiec_geokodowania (PamiecGeokodowania): Pamięć podręczna wyników geokodowania Nominatim.
+        katalog (StationCatalog): Katalog stacji pomiarowych z indeksami wyszukiwania.
+        indeksy (SilnikIndeksow): Bieżące indeksy jakości powietrza stacji odświeżane cyklicznie w tle.
+        stacja_id (int): Identyfikator wybranej stacji pomiarowej.
         czujnik_id (str): Identyfikator wybranego czujnika pomiarowego.
     """
 
@@ -105,12 +118,34 @@ class AplikacjaJakosciPowietrza:
         """
         self.root = root
         self.root.title("Monitorowanie Jakości Powietrza")
-        self.utworz_widzety()
-        database.reset_baza()
-        database.utworz_tabele()
+        self.katalog = StationCatalog([])
+        self.dane = TimeSeries()
         self.stacja_id = None
         self.czujnik_id = None
-        self.geolocator = Nominatim(user_agent="geoapiExercises")
+        self._geolocator = None
+        self.planista = PlanistaZadan(root, przy_zmianie=self.pokaz_postep)
+        self.wykres = None
+        self._serie_wykresu = {}
+        self._odswiezenie_zakresu = None
+        self.okno_diagnostyki = None
+        database.utworz_tabele()
+        self.indeksy = SilnikIndeksow()
+        self.indeksy.wczytaj()
+        self.pamiec_geokodowania = PamiecGeokodowania(lambda zapytanie: self.geolocator.geocode(zapytanie))
+        self.utworz_widzety()
+
+    @property
+    def geolocator(self):
+        """
+        Geokoder Nominatim tworzony przy pierwszym użyciu filtra promienia.
+
+        Returns:
+            Nominatim: Geokoder.
+        """
+        if self._geolocator is None:
+            from geopy.geocoders import Nominatim
+            self._geolocator = Nominatim(user_agent="geoapiExercises")
+        return self._geolocator
 
     def utworz_widzety(self):
         """
@@ -131,6 +166,7 @@ class AplikacjaJakosciPowietrza:
         self.kombobox_stacji = ttk.Combobox(stacja_frame)
         self.kombobox_stacji.pack(fill=tk.X, padx=5, pady=5, expand=True)
         self.kombobox_stacji.bind("<<ComboboxSelected>>", self.wybor_stacji)
+        self.kombobox_stacji.bind("<KeyRelease>", self.podpowiedz_stacje)
 
         czujnik_frame = ttk.Frame(main_frame, padding="5")
         czujnik_frame.pack(fill=tk.X)
@@ -168,9 +204,31 @@ class AplikacjaJakosciPowietrza:
         self.przycisk_analityka = ttk.Button(przyciski_frame, text="Analizuj Dane", command=self.analizuj_dane)
         self.przycisk_analityka.pack(side=tk.LEFT, padx=5, pady=5)
 
+        self.przycisk_ranking = ttk.Button(przyciski_frame, text="Ranking Stacji", command=self.pokaz_ranking)
+        self.przycisk_ranking.pack(side=tk.LEFT, padx=5, pady=5)
+
         self.przycisk_mapa = ttk.Button(przyciski_frame, text="Pokaż Mapę", command=self.pokaz_mape)
         self.przycisk_mapa.pack(side=tk.LEFT, padx=5, pady=5)
 
+        self.przycisk_wyczysc = ttk.Button(przyciski_frame, text="Wyczyść Wykres", command=self.wyczysc_wykres)
+        self.przycisk_wyczysc.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.przycisk_diagnostyka = ttk.Button(przyciski_frame, text="Diagnostyka", command=self.pokaz_diagnostyke)
+        self.przycisk_diagnostyka.pack(side=tk.RIGHT, padx=5, pady=5)
+
+        # Wykres jest tworzony w tej ramce przy pierwszym użyciu, aby nie importować matplotlib przy starcie.
+        self.wykres_frame = ttk.Frame(main_frame)
+        self.wykres_frame.pack(fill=tk.BOTH, expand=True)
+
+        stan_frame = ttk.Frame(self.root, padding="5")
+        stan_frame.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.etykieta_stanu = ttk.Label(stan_frame, text="Gotowe")
+        self.etykieta_stanu.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.pasek_postepu = ttk.Progressbar(stan_frame, mode="indeterminate", length=150)
+        self.pasek_postepu.pack(side=tk.RIGHT, padx=5, pady=5)
+
         self.laduj_stacje()
         self.utworz_filtrowanie()
 
@@ -214,24 +272,63 @@ class AplikacjaJakosciPowietrza:
         self.przycisk_filtr_promien = ttk.Button(promien_frame, text="Filtruj po promieniu", command=self.filtruj_po_promieniu)
         self.przycisk_filtr_promien.pack(side=tk.LEFT, padx=5, pady=5)
 
+    def pokaz_postep(self, aktywne):
+        """
+        Aktualizuje pasek postępu i etykietę stanu na podstawie liczby trwających zadań.
+
+        Args:
+            aktywne (int): Liczba zadań wykonywanych w tle.
+
+        Returns:
+            None
+        """
+        if aktywne:
+            self.etykieta_stanu['text'] = f"Trwa przetwarzanie ({aktywne})..."
+            self.pasek_postepu.start(10)
+        else:
+            self.etykieta_stanu['text'] = "Gotowe"
+            self.pasek_postepu.stop()
+
+    @instrumentation.zdarzenie
     def laduj_stacje(self):
         """
-        Ładuje listę stacji pomiarowych z API GIOŚ.
+        Wypełnia listę stacji z lokalnie zapisanego katalogu i odświeża go w tle z API GIOŚ.
 
         Returns:
             None
         """
-        try:
-            response = requests.get("https://api.gios.gov.pl/pjp-api/rest/station/findAll", verify=certifi.where())
-            response.raise_for_status()
-            self.stacje = {str(stacja['id']): stacja for stacja in response.json()}
-            self.kombobox_stacji['values'] = [stacja['stationName'] for stacja in self.stacje.values()]
-        except requests.RequestException as e:
+        self._ustaw_stacje(database.pobierz_stacje())
+        self.planista.uruchom("stacje", self._odswiez_stacje, po_sukcesie=self._ustaw_stacje,
+                              po_bledzie=self._blad_stacji)
+
+    @instrumentation.zdarzenie
+    def _odswiez_stacje(self):
+        stacje = api.pobierz_stacje()
+        database.zapisz_stacje(stacje)
+        self.pamiec_geokodowania.zasiej_z_katalogu(stacje)
+        return stacje
+
+    def _blad_stacji(self, e):
+        if len(self.katalog):
+            logger.warning("Nie udało się odświeżyć katalogu stacji: %s", e)
+        else:
             messagebox.showerror("Błąd", f"Nie udało się załadować stacji: {e}")
 
+    @instrumentation.zdarzenie
+    def _ustaw_stacje(self, stacje):
+        stary, self.katalog = self.katalog, StationCatalog(stacje)
+        for stacja in stary:
+            czujniki = stary.czujniki(stacja['id'])
+            if czujniki is not None and self.katalog.stacja(stacja['id']):
+                self.katalog.dodaj_czujniki(stacja['id'], czujniki)
+        self.kombobox_stacji['values'] = self.katalog.szukaj(self.kombobox_stacji.get())
+        if len(self.katalog):
+            self.indeksy.uruchom(lambda: [stacja['id'] for stacja in self.katalog])
+
+    @instrumentation.zdarzenie
     def wybor_stacji(self, event):
         """
-        Obsługuje wybór stacji pomiarowej przez użytkownika.
+        Obsługuje wybór stacji pomiarowej przez użytkownika. Nowszy wybór zastępuje trwające pobieranie.
 
         Args:
             event: Zdarzenie wyboru z Combobox.
@@ -239,20 +336,30 @@ class AplikacjaJakosciPowietrza:
         Returns:
             None
         """
-        stacja_nazwa = self.kombobox_stacji.get()
-        self.stacja_id = next((id for id, stacja in self.stacje.items() if stacja['stationName'] == stacja_nazwa), None)
+        stacja = self.katalog.po_nazwie(self.kombobox_stacji.get())
+        self.stacja_id = stacja['id'] if stacja else None
         if self.stacja_id:
-            try:
-                response = requests.get(f"https://api.gios.gov.pl/pjp-api/rest/station/sensors/{self.stacja_id}", verify=certifi.where())
-                response.raise_for_status()
-                self.czujniki = response.json()
-                self.kombobox_czujnika['values'] = [czujnik['param']['paramName'] for czujnik in self.czujniki]
-            except requests.RequestException as e:
-                messagebox.showerror("Błąd", f"Nie udało się załadować czujników: {e}")
-
+            self.planista.anuluj("dane")
+            czujniki = self.katalog.czujniki(self.stacja_id)
+            if czujniki is not None:
+                self.planista.anuluj("czujniki")
+                self._ustaw_czujniki(czujniki)
+                return
+            katalog, id_stacji = self.katalog, self.stacja_id
+            self.planista.uruchom("czujniki", sync.synchronizuj_czujniki_stacji, id_stacji,
+                                  po_sukcesie=lambda czujniki: self._ustaw_czujniki(czujniki, katalog, id_stacji),
+                                  po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się załadować czujników: {e}"))
+
+    @instrumentation.zdarzenie
+    def _ustaw_czujniki(self, czujniki, katalog=None, id_stacji=None):
+        if katalog is not None:
+            katalog.dodaj_czujniki(id_stacji, czujniki)
+        self.kombobox_czujnika['values'] = [czujnik['param']['paramName'] for czujnik in czujniki]
+
+    @instrumentation.zdarzenie
     def wybor_czujnika(self, event):
         """
-        Obsługuje wybór stanowiska pomiarowego przez użytkownika.
+        Obsługuje wybór stanowiska pomiarowego przez użytkownika. Dane są pobierane i zapisywane w tle.
 
         Args:
             event: Zdarzenie wyboru z Combobox.
@@ -260,23 +367,25 @@ class AplikacjaJakosciPowietrza:
         Returns:
             None
         """
-        czujnik_nazwa = self.kombobox_czujnika.get()
-        czujnik = next((czujnik for czujnik in self.czujniki if czujnik['param']['paramName'] == czujnik_nazwa), None)
+        czujnik = self.katalog.czujnik(self.stacja_id, self.kombobox_czujnika.get()) if self.stacja_id else None
         if czujnik:
             self.czujnik_id = czujnik['id']
-            try:
-                response = requests.get(f"https://api.gios.gov.pl/pjp-api/rest/data/getData/{self.czujnik_id}", verify=certifi.where())
-                response.raise_for_status()
-                dane = response.json()
-                self.dane = [(entry['date'], entry['value']) for entry in dane['values']]
-                messagebox.showinfo("Informacja", "Dane zostały załadowane.")
-                self.zapisz_dane_do_bazy(self.czujnik_id, czujnik['param']['paramName'], dane)
-            except requests.RequestException as e:
-                messagebox.showerror("Błąd", f"Nie udało się załadować danych: {e}")
+            self.planista.uruchom("dane", self.zapisz_dane_do_bazy, self.czujnik_id, czujnik['param']['paramName'],
+                                  po_sukcesie=self._ustaw_dane,
+                                  po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się załadować danych: {e}"))
+
+    @instrumentation.zdarzenie
+    def _ustaw_dane(self, dane):
+        self.dane = TimeSeries.z_json(dane)
+        if self.wykres is not None and self.czujnik_id in self._serie_wykresu.values():
+            self._odswiez_zakres(*self.wykres.zakres())
+        messagebox.showinfo("Informacja", "Dane zostały załadowane.")
 
-    def zapisz_dane_do_bazy(self, id_czujnika, nazwa, dane):
+    @instrumentation.zdarzenie
+    def zapisz_dane_do_bazy(self, id_czujnika, nazwa, dane=None):
         """
-        Zapisuje dane pomiarowe do bazy danych.
+        Pobiera dane czujnika (jeśli nie zostały podane) i zapisuje do bazy danych pomiary nowsze niż
+        znacznik synchronizacji czujnika. Metoda jest wykonywana w wątku roboczym.
 
         Args:
             id_czujnika (int): Unikalny identyfikator czujnika.
@@ -284,98 +393,214 @@ class AplikacjaJakosciPowietrza:
             dane (dict): Dane pomiarowe w formacie JSON.
 
         Returns:
-            None
+            dict: Dane pomiarowe w formacie JSON.
         """
+        if dane is None:
+            dane = api.pobierz_dane(id_czujnika)
         try:
-            database.zapisz_czujnik(id_czujnika, nazwa)
-            for entry in dane['values']:
-                database.zapisz_dane((id_czujnika, entry['date'], entry['value']))
+            sync.synchronizuj_czujnik(id_czujnika, nazwa, dane)
         except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się zapisać danych do bazy: {e}")
+            raise RuntimeError(f"Nie udało się zapisać danych do bazy: {e}") from e
+        return dane
 
+    @instrumentation.zdarzenie
     def pokaz_wykres(self):
         """
-        Wyświetla wykres danych pomiarowych dla wybranego czujnika.
+        Dodaje do wykresu serię danych pomiarowych wybranego czujnika. Dane są odczytywane z bazy w tle.
 
         Returns:
             None
         """
+        if self.czujnik_id is not None:
+            data_od = self.wejscie_od.get()
+            data_do = self.wejscie_do.get()
+            nazwa = f"{self.kombobox_stacji.get()} - {self.kombobox_czujnika.get()}"
+            id_czujnika = self.czujnik_id
+            self.planista.uruchom("wykres", self._dane_wykresu, id_czujnika, data_od, data_do,
+                                  po_sukcesie=lambda dane: self._rysuj_wykres(nazwa, id_czujnika, dane),
+                                  po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się wyświetlić wykresu: {e}"))
+        else:
+            messagebox.showerror("Błąd", "Nie wybrano stanowiska pomiarowego.")
+
+    @staticmethod
+    @instrumentation.zdarzenie
+    def _dane_wykresu(id_czujnika, data_od, data_do):
+        # Długie przedziały są odczytywane z agregatów dziennych lub miesięcznych zamiast surowych pomiarów.
+        agregaty = database.pobierz_agregaty(id_czujnika, data_od, data_do)
+        return [(okres, srednia) for okres, srednia, _, _, _ in agregaty]
+
+    @instrumentation.zdarzenie
+    def _rysuj_wykres(self, nazwa, id_czujnika, dane):
         try:
-            if self.czujnik_id is not None:
-                data_od = self.wejscie_od.get()
-                data_do = self.wejscie_do.get()
-                dane = database.pobierz_dane(self.czujnik_id, data_od, data_do)
-                visualization.wykres_danych(dane, data_od, data_do)
-            else:
-                messagebox.showerror("Błąd", "Nie wybrano stanowiska pomiarowego.")
+            if self.wykres is None:
+                import visualization
+                self.wykres = visualization.WykresNaZywo.w_oknie(self.wykres_frame,
+                                                                 przy_zmianie_zakresu=self._zmiana_zakresu_wykresu)
+            self._serie_wykresu[nazwa] = id_czujnika
+            self.wykres.ustaw_serie(nazwa, dane)
         except Exception as e:
             messagebox.showerror("Błąd", f"Nie udało się wyświetlić wykresu: {e}")
 
+    @instrumentation.zdarzenie
+    def wyczysc_wykres(self):
+        """
+        Usuwa z wykresu wszystkie serie.
+
+        Returns:
+            None
+        """
+        self._serie_wykresu.clear()
+        if self.wykres is not None:
+            self.wykres.usun_serie()
+
+    def _zmiana_zakresu_wykresu(self, data_od, data_do, liczba_punktow):
+        # Przesuwanie generuje wiele zmian zakresu; dane są pobierane dopiero, gdy zakres przestanie się zmieniać.
+        if self._odswiezenie_zakresu is not None:
+            self.root.after_cancel(self._odswiezenie_zakresu)
+        self._odswiezenie_zakresu = self.root.after(200, self._odswiez_zakres, data_od, data_do, liczba_punktow)
+
+    @instrumentation.zdarzenie
+    def _odswiez_zakres(self, data_od, data_do, liczba_punktow):
+        self._odswiezenie_zakresu = None
+        if self._serie_wykresu:
+            self.planista.uruchom("zakres_wykresu", self._serie_w_zakresie, dict(self._serie_wykresu), data_od, data_do,
+                                  liczba_punktow, po_sukcesie=self._ustaw_serie_wykresu,
+                                  po_bledzie=lambda e: logger.warning("Nie udało się odświeżyć wykresu: %s", e))
+
+    @staticmethod
+    @instrumentation.zdarzenie
+    def _serie_w_zakresie(serie, data_od, data_do, liczba_punktow):
+        # Rozdzielczość agregatów jest dobierana do szerokości widocznego przedziału.
+        return {nazwa: [(okres, srednia) for okres, srednia, _, _, _ in
+                        database.pobierz_agregaty(id_czujnika, data_od, data_do, maks_punktow=liczba_punktow)]
+                for nazwa, id_czujnika in serie.items()}
+
+    @instrumentation.zdarzenie
+    def _ustaw_serie_wykresu(self, serie):
+        for nazwa, dane in serie.items():
+            if nazwa in self._serie_wykresu:
+                self.wykres.ustaw_serie(nazwa, dane, dopasuj=False)
+
+    @instrumentation.zdarzenie
     def analizuj_dane(self):
         """
-        Przeprowadza analizę danych pomiarowych i wyświetla wyniki.
+        Przeprowadza analizę danych pomiarowych w tle i wyświetla wyniki.
 
         Returns:
             None
         """
-        try:
-            if self.czujnik_id is not None:
-                wyniki = analysis.analizuj_dane(self.dane)
-                if wyniki:
-                    messagebox.showinfo("Analiza danych",
-                                        f"Min: {wyniki['min']} ({wyniki['min_data']})\n"
-                                        f"Max: {wyniki['max']} ({wyniki['max_data']})\n"
-                                        f"Średnia: {wyniki['srednia']}\n"
-                                        f"Trend: {wyniki['trend']}")
-                else:
-                    messagebox.showwarning("Brak danych", "Brak wystarczających danych do analizy.")
-            else:
-                messagebox.showerror("Błąd", "Nie wybrano stanowiska pomiarowego.")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się przeanalizować danych: {e}")
+        if self.czujnik_id is not None:
+            self.planista.uruchom("analiza", self._analiza, self.dane, self.czujnik_id, self.kombobox_czujnika.get(),
+                                  po_sukcesie=lambda wynik: self._pokaz_analize(*wynik),
+                                  po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się przeanalizować danych: {e}"))
+        else:
+            messagebox.showerror("Błąd", "Nie wybrano stanowiska pomiarowego.")
+
+    @staticmethod
+    @instrumentation.zdarzenie
+    def _analiza(dane, id_czujnika, parametr):
+        # Statystyki całej historii są odczytywane z akumulatorów aktualizowanych przy zapisie.
+        return analysis.analizuj_dane(dane, parametr), database.pobierz_statystyki(id_czujnika)
+
+    @instrumentation.zdarzenie
+    def _pokaz_analize(self, wyniki, historia=None):
+        if wyniki:
+            tekst = (f"Min: {wyniki['min']} ({wyniki['min_data']})\n"
+                     f"Max: {wyniki['max']} ({wyniki['max_data']})\n"
+                     f"Średnia: {wyniki['srednia']:.2f}\n"
+                     f"Mediana: {wyniki['mediana']:.2f} (P90: {wyniki['percentyle']['P90']:.2f}, "
+                     f"P98: {wyniki['percentyle']['P98']:.2f})\n"
+                     f"Odchylenie standardowe: {wyniki['odchylenie_standardowe']:.2f}\n"
+                     f"Trend: {wyniki['trend']} ({wyniki['nachylenie_trendu']:+.3f} na dobę)")
+            if wyniki['norma']:
+                tekst += (f"\nPrzekroczenia normy {wyniki['norma']['wartosc']:g} µg/m³ ({wyniki['norma']['okres']}): "
+                          f"{wyniki['przekroczenia']}")
+                if wyniki['dni_przekroczen'] is not None:
+                    tekst += f", dni z przekroczeniem: {wyniki['dni_przekroczen']}"
+            if historia:
+                tekst += (f"\n\nCała historia ({historia['liczba']} pomiarów):\n"
+                          f"Średnia: {historia['srednia']:.2f}, mediana: ~{historia['mediana']:.2f}, "
+                          f"P98: ~{historia['percentyle']['P98']:.2f}\n"
+                          f"Max: {historia['max']} ({historia['max_data']})")
+            messagebox.showinfo("Analiza danych", tekst)
+        else:
+            messagebox.showwarning("Brak danych", "Brak wystarczających danych do analizy.")
+
+    @instrumentation.zdarzenie
+    def pokaz_ranking(self):
+        """
+        Tworzy w tle ranking wszystkich stacji mierzących parametr wybranego czujnika w wybranym przedziale
+        dat i wyświetla go w osobnym oknie.
 
+        Returns:
+            None
+        """
+        parametr = self.kombobox_czujnika.get()
+        if self.czujnik_id is None or not parametr:
+            messagebox.showerror("Błąd", "Nie wybrano stanowiska pomiarowego.")
+            return
+        self.planista.uruchom("ranking", analysis.ranking_parametru, parametr, self.wejscie_od.get(),
+                              self.wejscie_do.get(),
+                              po_sukcesie=lambda ranking: self._pokaz_ranking(parametr, ranking),
+                              po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się utworzyć rankingu: {e}"))
+
+    @instrumentation.zdarzenie
+    def _pokaz_ranking(self, parametr, ranking):
+        if not ranking:
+            messagebox.showwarning("Brak danych", "Brak zapisanych pomiarów parametru w wybranym przedziale dat.")
+            return
+        okno = tk.Toplevel(self.root)
+        okno.title(f"Ranking stacji - {parametr}")
+        kolumny = ("srednia", "max", "przekroczenia", "dni_przekroczen", "trend", "liczba")
+        tabela = ttk.Treeview(okno, columns=kolumny, height=20)
+        tabela.heading("#0", text="Stacja")
+        tabela.column("#0", width=320)
+        for kolumna, naglowek in zip(kolumny, ("Średnia", "Maks", "Przekroczenia", "Dni przekroczeń",
+                                               "Trend [na dobę]", "Pomiary")):
+            tabela.heading(kolumna, text=naglowek)
+            tabela.column(kolumna, width=110, anchor=tk.E)
+        for wiersz in ranking:
+            przekroczenia, dni = ("" if wiersz[klucz] is None else wiersz[klucz]
+                                  for klucz in ("przekroczenia", "dni_przekroczen"))
+            tabela.insert("", tk.END, text=wiersz["stacja"],
+                          values=(f"{wiersz['srednia']:.2f}", f"{wiersz['max']:.2f}", przekroczenia, dni,
+                                  f"{wiersz['nachylenie_trendu']:+.3f}", wiersz["liczba"]))
+        tabela.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    @instrumentation.zdarzenie
     def pokaz_mape(self):
         """
         Wyświetla mapę z zaznaczonymi stacjami pomiarowymi. Wybrana stacja jest zaznaczona na czerwono.
+        Mapa jest generowana w tle; czas generowania i rozmiar pliku są pokazywane na pasku stanu.
 
         Returns:
             None
         """
+        promien = self.wejscie_promien.get()
+        if promien == self.wejscie_promien.placeholder:
+            promien = ""
         try:
-            mapa = folium.Map(location=[52.2296756, 21.0122287], zoom_start=6)
-            lokalizacja_centralna = None
-            for stacja in self.stacje.values():
-                if str(stacja['id']) == self.stacja_id:
-                    marker_color = "red"
-                    lokalizacja_centralna = (stacja['gegrLat'], stacja['gegrLon'])
-                else:
-                    marker_color = "blue"
-                folium.Marker(
-                    location=[stacja['gegrLat'], stacja['gegrLon']],
-                    popup=stacja['stationName'],
-                    icon=folium.Icon(color=marker_color, icon="info-sign"),
-                ).add_to(mapa)
-            if lokalizacja_centralna:
-                promien = self.wejscie_promien.get()
-                try:
-                    if promien:
-                        promien = float(promien)
-                        folium.Circle(
-                            location=lokalizacja_centralna,
-                            radius=promien * 1000,
-                            color='green',
-                            fill=True,
-                            fill_color='green'
-                        ).add_to(mapa)
-                except ValueError:
-                    messagebox.showerror("Błąd", "Wartość promienia nie jest poprawną liczbą.")
-            mapa_file = "mapa.html"
-            mapa.save(mapa_file)
-            absolute_path = os.path.abspath(mapa_file)
-            webbrowser.open(f"file://{absolute_path}")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Nie udało się wyświetlić mapy: {e}")
-
+            promien = float(promien) if promien else None
+        except ValueError:
+            messagebox.showerror("Błąd", "Wartość promienia nie jest poprawną liczbą.")
+            promien = None
+        self.planista.uruchom("mapa", self._generuj_mape, self.stacja_id, promien,
+                              po_sukcesie=self._otworz_mape,
+                              po_bledzie=lambda e: messagebox.showerror("Błąd", f"Nie udało się wyświetlić mapy: {e}"))
+
+    @instrumentation.zdarzenie
+    def _generuj_mape(self, stacja_id, promien):
+        import maps
+        kolory = {id_stacji: maps.kolor_indeksu(poziom) for id_stacji, poziom in self.indeksy.poziomy().items()}
+        return maps.generuj_mape(self.katalog, wybrana=stacja_id, promien_km=promien, kolory=kolory)
+
+    @instrumentation.zdarzenie
+    def _otworz_mape(self, raport):
+        self.etykieta_stanu['text'] = (f"Mapa: {raport['czas'] * 1000:.0f} ms, {raport['rozmiar'] / 1024:.0f} kB "
+                                       f"(+ warstwa stacji {raport['rozmiar_warstwy'] / 1024:.0f} kB)")
+        webbrowser.open(f"file://{raport['sciezka']}")
+
+    @instrumentation.zdarzenie
     def filtruj_po_miescie(self):
         """
         Filtruje stacje pomiarowe na podstawie nazwy miasta.
@@ -384,46 +609,181 @@ class AplikacjaJakosciPowietrza:
             None
         """
         miasto = self.wejscie_miasto.get()
-        stacje_filtr = [stacja['stationName'] for stacja in self.stacje.values() if stacja['city']['name'].lower() == miasto.lower()]
-        self.kombobox_stacji['values'] = stacje_filtr
+        self.kombobox_stacji['values'] = [stacja['stationName'] for stacja in self.katalog.w_miescie(miasto)]
 
+    @instrumentation.zdarzenie
+    def podpowiedz_stacje(self, event):
+        """
+        Zawęża listę stacji w polu wyboru do nazw zawierających wpisany tekst.
+
+        Args:
+            event: Zdarzenie zwolnienia klawisza w Combobox.
+
+        Returns:
+            None
+        """
+        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"):
+            return
+        self.kombobox_stacji['values'] = self.katalog.szukaj(self.kombobox_stacji.get())
+
+    @instrumentation.zdarzenie
     def filtruj_po_promieniu(self):
         """
-        Filtruje stacje pomiarowe na podstawie promienia od określonej lokalizacji.
+        Filtruje stacje pomiarowe na podstawie promienia od określonej lokalizacji, sortując je według odległości.
+        Bez podanego promienia pokazuje wszystkie stacje od najbliższej. Geokodowanie i wyszukiwanie w indeksie
+        przestrzennym odbywa się w tle.
 
         Returns:
             None
         """
-        try:
-            lokalizacja_nazwa = self.wejscie_lokalizacja.get()
-            lokalizacja = self.geolocator.geocode(lokalizacja_nazwa)
-            if lokalizacja:
-                lokalizacja_koordynaty = (lokalizacja.latitude, lokalizacja.longitude)
-            else:
-                lat = self.wejscie_lat.get()
-                lon = self.wejscie_lon.get()
-                if lat and lon:
-                    lokalizacja_koordynaty = (float(lat), float(lon))
-                else:
-                    messagebox.showerror("Błąd", "Nie udało się znaleźć lokalizacji ani współrzędnych.")
-                    return
-
-            promien = self.wejscie_promien.get()
-            if promien:
-                promien = float(promien)
-                stacje_filtr = [stacja['stationName'] for stacja in self.stacje.values()
-                                if geodesic(lokalizacja_koordynaty, (stacja['gegrLat'], stacja['gegrLon'])).km <= promien]
-            else:
-                stacje_filtr = [stacja['stationName'] for stacja in self.stacje.values()
-                                if geodesic(lokalizacja_koordynaty, (stacja['gegrLat'], stacja['gegrLon'])).km]
+        self.planista.uruchom("promien", self._stacje_w_promieniu, self.wejscie_lokalizacja.get(),
+                              self.wejscie_lat.get(), self.wejscie_lon.get(), self.wejscie_promien.get(),
+                              po_sukcesie=self._ustaw_stacje_w_promieniu, po_bledzie=self._blad_promienia)
 
+    @instrumentation.zdarzenie
+    def _stacje_w_promieniu(self, lokalizacja_nazwa, lat, lon, promien):
+        lokalizacja_koordynaty = self.pamiec_geokodowania.geokoduj(lokalizacja_nazwa)
+        if not lokalizacja_koordynaty:
+            if lat and lon:
+                lokalizacja_koordynaty = (float(lat), float(lon))
+            else:
+                return None
+
+        indeks = self.katalog.indeks_przestrzenny()
+        if promien:
+            wynik = indeks.w_promieniu(*lokalizacja_koordynaty, float(promien))
+        else:
+            wynik = indeks.najblizsze(*lokalizacja_koordynaty, k=len(indeks))
+        return [stacja['stationName'] for _, stacja in wynik]
+
+    @instrumentation.zdarzenie
+    def _ustaw_stacje_w_promieniu(self, stacje_filtr):
+        if stacje_filtr is None:
+            messagebox.showerror("Błąd", "Nie udało się znaleźć lokalizacji ani współrzędnych.")
+        else:
             self.kombobox_stacji['values'] = stacje_filtr
-        except ValueError:
+
+    def _blad_promienia(self, e):
+        if isinstance(e, ValueError):
             messagebox.showerror("Błąd", "Proszę wprowadzić poprawne dane dla promienia i lokalizacji.")
-        except Exception as e:
+        else:
             messagebox.showerror("Błąd", f"Nie udało się przetworzyć lokalizacji: {e}")
 
+    def pokaz_diagnostyke(self):
+        """
+        Otwiera okno diagnostyki z czasami operacji (p50/p95/p99), licznikami zapytań HTTP i SQL
+        oraz wynikiem profilowania. Okno odświeża się co sekundę.
+
+        Returns:
+            None
+        """
+        if self.okno_diagnostyki is not None and self.okno_diagnostyki.winfo_exists():
+            self.okno_diagnostyki.lift()
+            return
+        okno = self.okno_diagnostyki = tk.Toplevel(self.root)
+        okno.title("Diagnostyka")
+
+        sterowanie = ttk.Frame(okno, padding="5")
+        sterowanie.pack(fill=tk.X)
+        self.pomiary_wlaczone = tk.BooleanVar(value=instrumentation.wlaczone())
+        ttk.Checkbutton(sterowanie, text="Pomiary włączone", variable=self.pomiary_wlaczone,
+                        command=self._przelacz_pomiary).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sterowanie, text="Wyzeruj", command=instrumentation.rejestr.wyzeruj).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sterowanie, text="Zapisz JSON",
+                   command=lambda: self._zapisz_pomiary(".json")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sterowanie, text="Zapisz Prometheus",
+                   command=lambda: self._zapisz_pomiary(".prom")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sterowanie, text="Profiluj następne",
+                   command=self._profiluj_nastepne).pack(side=tk.LEFT, padx=5)
+
+        kolumny = ("liczba", "p50", "p95", "p99", "maks", "bledy")
+        self.tabela_diagnostyki = ttk.Treeview(okno, columns=kolumny, height=15)
+        self.tabela_diagnostyki.heading("#0", text="Operacja")
+        self.tabela_diagnostyki.column("#0", width=280)
+        for kolumna, naglowek in zip(kolumny, ("Liczba", "p50 [ms]", "p95 [ms]", "p99 [ms]", "Maks [ms]", "Błędy")):
+            self.tabela_diagnostyki.heading(kolumna, text=naglowek)
+            self.tabela_diagnostyki.column(kolumna, width=80, anchor=tk.E)
+        self.tabela_diagnostyki.pack(fill=tk.BOTH, expand=True, padx=5)
+
+        self.etykieta_licznikow = ttk.Label(okno, padding="5")
+        self.etykieta_licznikow.pack(fill=tk.X)
+        self.tekst_profilu = tk.Text(okno, height=12, font="TkFixedFont", wrap=tk.NONE)
+        self.tekst_profilu.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self._pokazany_profil = None
+        self._odswiez_diagnostyke()
+
+    def _odswiez_diagnostyke(self):
+        if self.okno_diagnostyki is None or not self.okno_diagnostyki.winfo_exists():
+            self.okno_diagnostyki = None
+            return
+        migawka = instrumentation.rejestr.migawka()
+        wybrana = self.tabela_diagnostyki.selection()
+        self.tabela_diagnostyki.delete(*self.tabela_diagnostyki.get_children())
+        for nazwa, wynik in migawka["operacje"].items():
+            wartosci = [wynik["liczba"]]
+            wartosci += ["" if wynik[klucz] is None else f"{wynik[klucz] * 1000:.2f}"
+                         for klucz in ("p50", "p95", "p99", "maks")]
+            self.tabela_diagnostyki.insert("", tk.END, iid=nazwa, text=nazwa, values=wartosci + [wynik["bledy"]])
+        self.tabela_diagnostyki.selection_set([nazwa for nazwa in wybrana if nazwa in migawka["operacje"]])
+        self.etykieta_licznikow['text'] = "  ".join(f"{nazwa}: {wartosc}" for nazwa, wartosc
+                                                     in migawka["liczniki"].items()) or "Brak liczników"
+        profil = instrumentation.ostatni_profil()
+        if profil is not None and profil is not self._pokazany_profil:
+            self._pokazany_profil = profil
+            self.tekst_profilu.delete("1.0", tk.END)
+            self.tekst_profilu.insert("1.0", f"{profil['operacja']}\n{profil['statystyki']}")
+        self.okno_diagnostyki.after(1000, self._odswiez_diagnostyke)
+
+    def _przelacz_pomiary(self):
+        if self.pomiary_wlaczone.get():
+            instrumentation.wlacz()
+        else:
+            instrumentation.wylacz()
+
+    def _profiluj_nastepne(self):
+        # Bez zaznaczonej operacji profilowane jest następne zdarzenie interfejsu lub mierzona operacja.
+        wybrana = self.tabela_diagnostyki.selection()
+        nazwa = wybrana[0] if wybrana else instrumentation.DOWOLNA
+        instrumentation.profiluj_nastepne(nazwa)
+        self.etykieta_stanu['text'] = f"Profilowanie następnego wywołania: {nazwa}"
+
+    def _zapisz_pomiary(self, rozszerzenie):
+        sciezka = filedialog.asksaveasfilename(parent=self.okno_diagnostyki, defaultextension=rozszerzenie,
+                                               initialfile=f"pomiary{rozszerzenie}")
+        if not sciezka:
+            return
+        rejestr = instrumentation.rejestr
+        with open(sciezka, "w", encoding="utf-8") as plik:
+            plik.write(rejestr.jako_json() if rozszerzenie == ".json" else rejestr.jako_prometheus())
+
+def raport_startu(root):
+    """
+    Mierzy czas pierwszego narysowania okna i zapisuje raport czasu startu w logu.
+
+    Funkcję należy wywołać po utworzeniu interfejsu; pomiar kończy się, gdy Tk obsłuży wszystkie
+    zdarzenia oczekujące po pierwszym wyświetleniu okna.
+
+    Args:
+        root (tk.Tk): Główne okno aplikacji.
+
+    Returns:
+        dict: Czas importów i czas do pierwszego narysowania okna w milisekundach.
+    """
+    root.update_idletasks()
+    raport = {
+        "importy_ms": _CZAS_IMPORTOW * 1000,
+        "pierwsze_rysowanie_ms": (time.perf_counter() - _START) * 1000,
+    }
+    logger.info("Start: importy %.1f ms, pierwsze rysowanie %.1f ms",
+                raport["importy_ms"], raport["pierwsze_rysowanie_ms"])
+    return raport
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if os.environ.get("GIOS_POMIARY") == "1":
+        instrumentation.wlacz()
     root = ThemedTk(theme="radiance")
     app = AplikacjaJakosciPowietrza(root)
+    root.after_idle(raport_startu, root)
     root.mainloop()
@@ -0,0 +1,250 @@
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import database
+
+SCIEZKA_PAMIECI = ".gios_cache.db"
+
+# Czas życia odpowiedzi (w sekundach) dla poszczególnych klas zapytań API GIOŚ.
+CZASY_ZYCIA = {
+    "stacje": 24 * 3600,
+    "czujniki": 24 * 3600,
+    "dane": 10 * 60,
+    "indeks": 10 * 60,
+}
+
+_PREFIKSY_KLAS = (
+    ("station/findAll", "stacje"),
+    ("station/sensors/", "czujniki"),
+    ("data/getData/", "dane"),
+    ("aqindex/getIndex/", "indeks"),
+)
+
+WpisPamieci = namedtuple("WpisPamieci", "obiekt etag ostatnia_modyfikacja zapisano")
+
+
+def klasa_sciezki(sciezka):
+    """
+    Określa klasę zapytania na podstawie ścieżki API.
+
+    Args:
+        sciezka (str): Ścieżka względem adresu bazowego API.
+
+    Returns:
+        str: Klasa zapytania ("stacje", "czujniki", "dane", "indeks") lub None dla nieznanej ścieżki.
+    """
+    for prefiks, klasa in _PREFIKSY_KLAS:
+        if sciezka.startswith(prefiks):
+            return klasa
+    return None
+
+
+class PamiecPodrecznaHttp:
+    """
+    Dyskowa pamięć podręczna odpowiedzi API z warstwą w pamięci operacyjnej.
+
+    Odpowiedzi są przechowywane w pliku SQLite razem z nagłówkami ETag i Last-Modified, które
+    pozwalają na warunkowe odświeżenie przeterminowanego wpisu. Ostatnio używane, zdekodowane
+    odpowiedzi są dodatkowo trzymane w pamięci, więc trafienie nie wymaga dekodowania JSON.
+    Zwracane obiekty są współdzielone i nie powinny być modyfikowane.
+
+    Attributes:
+        czasy_zycia (dict): Czas życia wpisu w sekundach dla każdej klasy zapytania.
+        maks_rozmiar (int): Maksymalny łączny rozmiar odpowiedzi na dysku w bajtach.
+        maks_wpisow_w_pamieci (int): Maksymalna liczba zdekodowanych odpowiedzi w pamięci.
+    """
+
+    def __init__(self, sciezka=SCIEZKA_PAMIECI, czasy_zycia=None, maks_rozmiar=64 * 1024 * 1024,
+                 maks_wpisow_w_pamieci=512):
+        """
+        Inicjalizuje obiekt klasy PamiecPodrecznaHttp.
+
+        Args:
+            sciezka (str): Ścieżka do pliku pamięci podręcznej.
+            czasy_zycia (dict): Nadpisania czasów życia dla wybranych klas zapytań.
+            maks_rozmiar (int): Maksymalny łączny rozmiar odpowiedzi na dysku w bajtach.
+            maks_wpisow_w_pamieci (int): Maksymalna liczba zdekodowanych odpowiedzi w pamięci.
+        """
+        self.czasy_zycia = {**CZASY_ZYCIA, **(czasy_zycia or {})}
+        self.maks_rozmiar = maks_rozmiar
+        self.maks_wpisow_w_pamieci = maks_wpisow_w_pamieci
+        self._baza = database.BazaDanych(sciezka)
+        self._blokada = threading.Lock()
+        self._w_pamieci = OrderedDict()
+        self._liczniki = {"trafienia": 0, "chybienia": 0, "rewalidacje": 0, "niezmienione": 0,
+                          "zapisy": 0, "eksmisje": 0}
+        with self._baza.transakcja() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS odpowiedzi (
+                klucz TEXT PRIMARY KEY,
+                tresc BLOB NOT NULL,
+                etag TEXT,
+                ostatnia_modyfikacja TEXT,
+                zapisano REAL NOT NULL,
+                ostatni_dostep REAL NOT NULL,
+                rozmiar INTEGER NOT NULL
+            )
+            """)
+
+    def zamknij(self):
+        self._baza.zamknij()
+
+    def _zlicz(self, licznik):
+        with self._blokada:
+            self._liczniki[licznik] += 1
+
+    def _do_pamieci(self, klucz, wpis):
+        with self._blokada:
+            self._w_pamieci[klucz] = wpis
+            self._w_pamieci.move_to_end(klucz)
+            while len(self._w_pamieci) > self.maks_wpisow_w_pamieci:
+                self._w_pamieci.popitem(last=False)
+
+    def pobierz(self, klucz):
+        """
+        Zwraca wpis dla klucza niezależnie od jego świeżości.
+
+        Args:
+            klucz (str): Klucz wpisu (ścieżka zapytania).
+
+        Returns:
+            WpisPamieci: Wpis lub None, jeśli klucza nie ma w pamięci podręcznej.
+        """
+        with self._blokada:
+            wpis = self._w_pamieci.get(klucz)
+            if wpis is not None:
+                self._w_pamieci.move_to_end(klucz)
+                return wpis
+        wiersz = self._baza.wykonaj("SELECT tresc, etag, ostatnia_modyfikacja, zapisano FROM odpowiedzi "
+                                    "WHERE klucz = ?", (klucz,)).fetchone()
+        if wiersz is None:
+            return None
+        with self._baza.transakcja() as conn:
+            conn.execute("UPDATE odpowiedzi SET ostatni_dostep = ? WHERE klucz = ?", (time.time(), klucz))
+        wpis = WpisPamieci(json.loads(wiersz[0]), wiersz[1], wiersz[2], wiersz[3])
+        self._do_pamieci(klucz, wpis)
+        return wpis
+
+    def swiezy(self, klucz, wpis):
+        """
+        Sprawdza, czy wpis nie przekroczył czasu życia swojej klasy zapytania.
+
+        Args:
+            klucz (str): Klucz wpisu (ścieżka zapytania).
+            wpis (WpisPamieci): Sprawdzany wpis.
+
+        Returns:
+            bool: True, jeśli wpis można zwrócić bez kontaktu z serwerem.
+        """
+        czas_zycia = self.czasy_zycia.get(klasa_sciezki(klucz), 0)
+        return time.time() - wpis.zapisano < czas_zycia
+
+    def zapisz(self, klucz, tresc, etag=None, ostatnia_modyfikacja=None, obiekt=None):
+        """
+        Zapisuje odpowiedź serwera i usuwa najdawniej używane wpisy po przekroczeniu limitu rozmiaru.
+
+        Args:
+            klucz (str): Klucz wpisu (ścieżka zapytania).
+            tresc (bytes): Surowa treść odpowiedzi JSON.
+            etag (str): Wartość nagłówka ETag.
+            ostatnia_modyfikacja (str): Wartość nagłówka Last-Modified.
+            obiekt: Zdekodowana treść, jeśli jest już dostępna.
+
+        Returns:
+            WpisPamieci: Zapisany wpis.
+        """
+        teraz = time.time()
+        wpis = WpisPamieci(json.loads(tresc) if obiekt is None else obiekt, etag, ostatnia_modyfikacja, teraz)
+        with self._baza.transakcja() as conn:
+            conn.execute("INSERT OR REPLACE INTO odpowiedzi VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (klucz, tresc, etag, ostatnia_modyfikacja, teraz, teraz, len(tresc)))
+            self._eksmituj(conn)
+        self._do_pamieci(klucz, wpis)
+        self._zlicz("zapisy")
+        return wpis
+
+    def odnow(self, klucz, wpis):
+        """
+        Oznacza wpis jako świeży po potwierdzeniu przez serwer (odpowiedź 304 Not Modified).
+
+        Args:
+            klucz (str): Klucz wpisu (ścieżka zapytania).
+            wpis (WpisPamieci): Odnawiany wpis.
+
+        Returns:
+            WpisPamieci: Odnowiony wpis.
+        """
+        teraz = time.time()
+        wpis = wpis._replace(zapisano=teraz)
+        with self._baza.transakcja() as conn:
+            conn.execute("UPDATE odpowiedzi SET zapisano = ?, ostatni_dostep = ? WHERE klucz = ?",
+                         (teraz, teraz, klucz))
+        self._do_pamieci(klucz, wpis)
+        return wpis
+
+    def _eksmituj(self, conn):
+        rozmiar = conn.execute("SELECT COALESCE(SUM(rozmiar), 0) FROM odpowiedzi").fetchone()[0]
+        if rozmiar <= self.maks_rozmiar:
+            return
+        usuniete = []
+        for klucz, rozmiar_wpisu in conn.execute("SELECT klucz, rozmiar FROM odpowiedzi "
+                                                 "ORDER BY ostatni_dostep").fetchall():
+            if rozmiar <= self.maks_rozmiar:
+                break
+            usuniete.append((klucz,))
+            rozmiar -= rozmiar_wpisu
+        conn.executemany("DELETE FROM odpowiedzi WHERE klucz = ?", usuniete)
+        with self._blokada:
+            for (klucz,) in usuniete:
+                self._w_pamieci.pop(klucz, None)
+            self._liczniki["eksmisje"] += len(usuniete)
+
+    def pobierz_przez(self, klucz, zapytanie):
+        """
+        Zwraca odpowiedź z pamięci podręcznej albo pobiera ją funkcją zapytanie.
+
+        Świeży wpis jest zwracany bez kontaktu z serwerem. Przeterminowany wpis jest odświeżany
+        zapytaniem warunkowym (If-None-Match / If-Modified-Since), a odpowiedź 304 jedynie odnawia
+        jego czas życia.
+
+        Args:
+            klucz (str): Klucz wpisu (ścieżka zapytania).
+            zapytanie (callable): Funkcja przyjmująca słownik nagłówków i zwracająca requests.Response.
+
+        Returns:
+            dict | list: Zdekodowana odpowiedź.
+        """
+        wpis = self.pobierz(klucz)
+        if wpis is not None and self.swiezy(klucz, wpis):
+            self._zlicz("trafienia")
+            return wpis.obiekt
+
+        naglowki = {}
+        if wpis is None:
+            self._zlicz("chybienia")
+        else:
+            self._zlicz("rewalidacje")
+            if wpis.etag:
+                naglowki["If-None-Match"] = wpis.etag
+            if wpis.ostatnia_modyfikacja:
+                naglowki["If-Modified-Since"] = wpis.ostatnia_modyfikacja
+
+        odpowiedz = zapytanie(naglowki)
+        if odpowiedz.status_code == 304 and wpis is not None:
+            self._zlicz("niezmienione")
+            return self.odnow(klucz, wpis).obiekt
+        odpowiedz.raise_for_status()
+        return self.zapisz(klucz, odpowiedz.content, odpowiedz.headers.get("ETag"),
+                           odpowiedz.headers.get("Last-Modified")).obiekt
+
+    def statystyki(self):
+        """
+        Zwraca liczniki trafień, chybień, rewalidacji, zapisów i eksmisji.
+
+        Returns:
+            dict: Kopia liczników pamięci podręcznej.
+        """
+        with self._blokada:
+            return dict(self._liczniki)
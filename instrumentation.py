@@ -0,0 +1,431 @@
+"""
+Lekkie pomiary czasu operacji, liczniki zapytań HTTP i SQL oraz profilowanie pojedynczych wywołań.
+
+Pomiary są domyślnie wyłączone. wlacz() podmienia publiczne funkcje i metody modułów api, database,
+analysis i visualization na wersje mierzące czas, a wylacz() przywraca oryginały, więc wyłączone
+pomiary nie kosztują nic. Procedury obsługi zdarzeń interfejsu są oznaczone dekoratorem zdarzenie,
+który przy wyłączonych pomiarach sprawdza jedynie dwie zmienne modułu.
+
+Przykład:
+
+    instrumentation.wlacz()
+    ...
+    print(instrumentation.rejestr.jako_prometheus())
+"""
+import cProfile
+import functools
+import importlib
+import inspect
+import io
+import json
+import math
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+MODULY = ("api", "database", "analysis", "visualization")
+ROZMIAR_PROBKI = 1024
+PERCENTYLE = (0.5, 0.95, 0.99)
+LIMIT_PROFILU = 40
+DOWOLNA = "*"
+
+
+def _percentyl(posortowane, q):
+    # Metoda najbliższej rangi.
+    if not posortowane:
+        return None
+    return posortowane[max(0, math.ceil(q * len(posortowane)) - 1)]
+
+
+class Histogram:
+    """
+    Rozkład czasów jednej operacji: liczniki z całego okresu pomiarów i percentyle z ostatnich próbek.
+
+    Attributes:
+        liczba (int): Liczba wywołań.
+        suma (float): Łączny czas w sekundach.
+        maks (float): Najdłuższy czas w sekundach.
+        bledy (int): Liczba wywołań zakończonych wyjątkiem.
+    """
+
+    __slots__ = ("liczba", "suma", "maks", "bledy", "_probki")
+
+    def __init__(self, rozmiar_probki=ROZMIAR_PROBKI):
+        """
+        Inicjalizuje obiekt klasy Histogram.
+
+        Args:
+            rozmiar_probki (int): Liczba ostatnich czasów, z których liczone są percentyle.
+        """
+        self.liczba = 0
+        self.suma = 0.0
+        self.maks = 0.0
+        self.bledy = 0
+        self._probki = deque(maxlen=rozmiar_probki)
+
+    def dodaj(self, sekundy, blad=False):
+        """
+        Dodaje czas jednego wywołania.
+
+        Args:
+            sekundy (float): Czas wywołania w sekundach.
+            blad (bool): Czy wywołanie zakończyło się wyjątkiem.
+
+        Returns:
+            None
+        """
+        self.liczba += 1
+        self.suma += sekundy
+        self.maks = max(self.maks, sekundy)
+        self.bledy += blad
+        self._probki.append(sekundy)
+
+    def percentyl(self, q):
+        """
+        Zwraca percentyl czasu z ostatnich próbek.
+
+        Args:
+            q (float): Rząd percentyla z przedziału (0, 1], np. 0.95.
+
+        Returns:
+            float: Czas w sekundach lub None, jeśli nie ma próbek.
+        """
+        return _percentyl(sorted(self._probki), q)
+
+    def podsumowanie(self):
+        """
+        Zwraca podsumowanie rozkładu.
+
+        Returns:
+            dict: Liczba wywołań, błędów, suma, średnia i maksimum czasu oraz percentyle p50, p95 i p99 w sekundach.
+        """
+        probki = sorted(self._probki)
+        wynik = {"liczba": self.liczba, "bledy": self.bledy, "suma": self.suma,
+                 "srednia": self.suma / self.liczba if self.liczba else None, "maks": self.maks}
+        for q in PERCENTYLE:
+            wynik[f"p{round(q * 100)}"] = _percentyl(probki, q)
+        return wynik
+
+
+class Rejestr:
+    """
+    Bezpieczny wątkowo zbiór rozkładów czasów operacji i liczników zdarzeń.
+
+    Attributes:
+        operacje (dict): Słownik nazwa operacji -> Histogram.
+        liczniki (dict): Słownik nazwa licznika -> wartość.
+    """
+
+    def __init__(self):
+        """
+        Inicjalizuje obiekt klasy Rejestr.
+        """
+        self.operacje = {}
+        self.liczniki = {}
+        self._blokada = threading.Lock()
+
+    def zlicz(self, nazwa, ile=1):
+        """
+        Zwiększa licznik.
+
+        Args:
+            nazwa (str): Nazwa licznika, np. "http.bajty".
+            ile (int): Wartość dodawana do licznika.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            self.liczniki[nazwa] = self.liczniki.get(nazwa, 0) + ile
+
+    def zapisz_czas(self, nazwa, sekundy, blad=False):
+        """
+        Dodaje czas wywołania operacji do jej rozkładu.
+
+        Args:
+            nazwa (str): Nazwa operacji, np. "database.pobierz_dane".
+            sekundy (float): Czas wywołania w sekundach.
+            blad (bool): Czy wywołanie zakończyło się wyjątkiem.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            histogram = self.operacje.get(nazwa)
+            if histogram is None:
+                histogram = self.operacje[nazwa] = Histogram()
+            histogram.dodaj(sekundy, blad)
+
+    def wyzeruj(self):
+        """
+        Usuwa wszystkie pomiary i liczniki.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            self.operacje = {}
+            self.liczniki = {}
+
+    def migawka(self):
+        """
+        Zwraca bieżący stan pomiarów.
+
+        Returns:
+            dict: Podsumowania operacji ("operacje", zob. Histogram.podsumowanie) i liczniki ("liczniki").
+        """
+        with self._blokada:
+            return {"operacje": {nazwa: histogram.podsumowanie() for nazwa, histogram in sorted(self.operacje.items())},
+                    "liczniki": dict(sorted(self.liczniki.items()))}
+
+    def jako_json(self):
+        """
+        Zwraca migawkę pomiarów w formacie JSON.
+
+        Returns:
+            str: Dokument JSON.
+        """
+        return json.dumps(self.migawka(), indent=2)
+
+    def jako_prometheus(self, prefiks="gios"):
+        """
+        Zwraca migawkę pomiarów w tekstowym formacie ekspozycji Prometheus.
+
+        Czasy operacji są eksportowane jako metryka typu summary z etykietą operacja, a liczniki jako
+        metryki typu counter (np. licznik "http.bajty" jako gios_http_bajty_total).
+
+        Args:
+            prefiks (str): Prefiks nazw metryk.
+
+        Returns:
+            str: Metryki w formacie tekstowym Prometheus.
+        """
+        migawka = self.migawka()
+        nazwa = f"{prefiks}_operacja_sekundy"
+        wiersze = [f"# HELP {nazwa} Czas wykonania operacji.", f"# TYPE {nazwa} summary"]
+        for operacja, wynik in migawka["operacje"].items():
+            etykieta = 'operacja="%s"' % operacja.replace("\\", "\\\\").replace('"', '\\"')
+            for q in PERCENTYLE:
+                wartosc = wynik[f"p{round(q * 100)}"]
+                wiersze.append(f'{nazwa}{{{etykieta},quantile="{q}"}} {"NaN" if wartosc is None else repr(wartosc)}')
+            wiersze.append(f"{nazwa}_sum{{{etykieta}}} {wynik['suma']!r}")
+            wiersze.append(f"{nazwa}_count{{{etykieta}}} {wynik['liczba']}")
+        bledy = f"{prefiks}_operacja_bledy_total"
+        wiersze += [f"# TYPE {bledy} counter"]
+        wiersze += [f'{bledy}{{operacja="{operacja}"}} {wynik["bledy"]}' for operacja, wynik in migawka["operacje"].items()]
+        for licznik, wartosc in migawka["liczniki"].items():
+            metryka = f"{prefiks}_{re.sub(r'[^A-Za-z0-9_]', '_', licznik)}_total"
+            wiersze += [f"# TYPE {metryka} counter", f"{metryka} {wartosc}"]
+        return "\n".join(wiersze) + "\n"
+
+
+rejestr = Rejestr()
+
+_blokada = threading.Lock()
+_wlaczone = False
+_podmiany = []
+_profilowane = None
+_profil = None
+
+
+def wlaczone():
+    """
+    Zwraca, czy pomiary są włączone.
+
+    Returns:
+        bool: True, jeśli pomiary są włączone.
+    """
+    return _wlaczone
+
+
+def _zajmij_profil(nazwa):
+    # Profilowane jest tylko jedno, pierwsze pasujące wywołanie, nawet gdy kilka wątków trafi tu naraz.
+    global _profilowane
+    with _blokada:
+        if _profilowane in (DOWOLNA, nazwa):
+            _profilowane = None
+            return True
+    return False
+
+
+def _profiluj(nazwa, funkcja, args, kwargs):
+    global _profil
+    profil = cProfile.Profile()
+    start = time.perf_counter()
+    blad = True
+    try:
+        wynik = profil.runcall(funkcja, *args, **kwargs)
+        blad = False
+        return wynik
+    finally:
+        czas = time.perf_counter() - start
+        rejestr.zapisz_czas(nazwa, czas, blad)
+        strumien = io.StringIO()
+        pstats.Stats(profil, stream=strumien).sort_stats("cumulative").print_stats(LIMIT_PROFILU)
+        _profil = {"operacja": nazwa, "czas": czas, "statystyki": strumien.getvalue(), "profil": profil}
+
+
+def _mierzona(funkcja, nazwa, po_wyniku=None):
+    @functools.wraps(funkcja)
+    def mierzona(*args, **kwargs):
+        if _profilowane is not None and _zajmij_profil(nazwa):
+            wynik = _profiluj(nazwa, funkcja, args, kwargs)
+        else:
+            start = time.perf_counter()
+            try:
+                wynik = funkcja(*args, **kwargs)
+            except BaseException:
+                rejestr.zapisz_czas(nazwa, time.perf_counter() - start, True)
+                raise
+            rejestr.zapisz_czas(nazwa, time.perf_counter() - start)
+        if po_wyniku is not None:
+            po_wyniku(wynik)
+        return wynik
+
+    return mierzona
+
+
+def zdarzenie(funkcja=None, *, nazwa=None):
+    """
+    Dekorator procedury obsługi zdarzenia interfejsu mierzący jej czas, gdy pomiary są włączone.
+
+    Wywołanie oznaczonej funkcji może też zostać sprofilowane (zob. profiluj_nastepne), również przy
+    wyłączonych pomiarach.
+
+    Args:
+        funkcja (callable): Dekorowana funkcja.
+        nazwa (str): Nazwa operacji; domyślnie "gui." + nazwa funkcji.
+
+    Returns:
+        callable: Funkcja opakowana pomiarem.
+    """
+    if funkcja is None:
+        return functools.partial(zdarzenie, nazwa=nazwa)
+    mierzona = _mierzona(funkcja, nazwa or f"gui.{funkcja.__name__}")
+
+    @functools.wraps(funkcja)
+    def obsluga(*args, **kwargs):
+        if _wlaczone or _profilowane is not None:
+            return mierzona(*args, **kwargs)
+        return funkcja(*args, **kwargs)
+
+    return obsluga
+
+
+def _zlicz_wiersze(wynik):
+    if isinstance(wynik, list):
+        rejestr.zlicz("sql.wiersze", len(wynik))
+
+
+def _zlicz_sql(instrukcja):
+    rejestr.zlicz("sql.instrukcje")
+
+
+def _zlicz_http(odpowiedz):
+    rejestr.zlicz("http.zapytania")
+    rejestr.zlicz(f"http.status.{odpowiedz.status_code}")
+    rejestr.zlicz("http.bajty", len(odpowiedz.content))
+
+
+def _funkcje(modul):
+    # Publiczne funkcje modułu i publiczne metody jego klas. Funkcje już opakowane dekoratorami
+    # (np. contextmanager) i generatory są pomijane: ich czas wywołania nie odpowiada czasowi pracy.
+    def mierzalna(obiekt):
+        return (inspect.isfunction(obiekt) and not hasattr(obiekt, "__wrapped__")
+                and not inspect.isgeneratorfunction(obiekt))
+
+    for nazwa, obiekt in list(vars(modul).items()):
+        if nazwa.startswith("_") or getattr(obiekt, "__module__", None) != modul.__name__:
+            continue
+        if mierzalna(obiekt):
+            yield modul, nazwa, obiekt, f"{modul.__name__}.{nazwa}"
+        elif inspect.isclass(obiekt):
+            for nazwa_metody, metoda in list(vars(obiekt).items()):
+                if not nazwa_metody.startswith("_") and mierzalna(metoda):
+                    yield obiekt, nazwa_metody, metoda, f"{modul.__name__}.{nazwa}.{nazwa_metody}"
+
+
+def _podmien(wlasciciel, nazwa, nowa):
+    _podmiany.append((wlasciciel, nazwa, getattr(wlasciciel, nazwa) if inspect.ismodule(wlasciciel)
+                      else vars(wlasciciel)[nazwa]))
+    setattr(wlasciciel, nazwa, nowa)
+
+
+def wlacz(moduly=MODULY):
+    """
+    Włącza pomiary: opakowuje publiczne funkcje i metody modułów pomiarem czasu i włącza liczniki
+    zapytań HTTP (api.KlientGios) oraz instrukcji SQL (database.ustaw_sledzenie).
+
+    Moduły są importowane, jeśli nie były jeszcze załadowane. Funkcje zaimportowane do innych modułów
+    przez "from modul import funkcja" pozostają niemierzone.
+
+    Args:
+        moduly (iterable): Nazwy mierzonych modułów.
+
+    Returns:
+        None
+    """
+    global _wlaczone
+    with _blokada:
+        if _wlaczone:
+            return
+        for nazwa_modulu in moduly:
+            modul = importlib.import_module(nazwa_modulu)
+            po_wyniku = _zlicz_wiersze if nazwa_modulu == "database" else None
+            for wlasciciel, nazwa, funkcja, operacja in _funkcje(modul):
+                _podmien(wlasciciel, nazwa, _mierzona(funkcja, operacja, po_wyniku))
+            if nazwa_modulu == "api":
+                _podmien(modul.KlientGios, "_zapytanie", _mierzona(modul.KlientGios._zapytanie, "api.http", _zlicz_http))
+            elif nazwa_modulu == "database":
+                modul.ustaw_sledzenie(_zlicz_sql)
+        _wlaczone = True
+
+
+def wylacz():
+    """
+    Wyłącza pomiary i przywraca oryginalne funkcje. Zebrane pomiary pozostają w rejestrze.
+
+    Returns:
+        None
+    """
+    global _wlaczone
+    with _blokada:
+        while _podmiany:
+            wlasciciel, nazwa, oryginal = _podmiany.pop()
+            setattr(wlasciciel, nazwa, oryginal)
+        database = sys.modules.get("database")
+        if database is not None:
+            database.ustaw_sledzenie(None)
+        _wlaczone = False
+
+
+def profiluj_nastepne(nazwa=DOWOLNA):
+    """
+    Zleca sprofilowanie (cProfile) następnego wywołania operacji, w dowolnym wątku.
+
+    Operacje modułów są profilowane tylko przy włączonych pomiarach; procedury obsługi zdarzeń
+    oznaczone dekoratorem zdarzenie zawsze. Wynik zwraca ostatni_profil().
+
+    Args:
+        nazwa (str): Nazwa operacji, np. "gui.pokaz_wykres"; DOWOLNA oznacza pierwszą mierzoną operację.
+
+    Returns:
+        None
+    """
+    global _profilowane
+    with _blokada:
+        _profilowane = nazwa
+
+
+def ostatni_profil():
+    """
+    Zwraca wynik ostatniego profilowania.
+
+    Returns:
+        dict: Nazwa operacji ("operacja"), czas w sekundach ("czas"), tekst statystyk pstats posortowanych
+            według czasu skumulowanego ("statystyki") i obiekt cProfile.Profile ("profil") lub None.
+    """
+    return _profil
@@ -1,16 +1,233 @@
-# This is a sample Python script.
+"""
+Synchronizacja danych pomiarowych GIOŚ bez interfejsu graficznego.
 
-# Press ⌃R to execute it or replace it with your code.
-# Press Double ⇧ to search everywhere for classes, files, tool windows, actions, and settings.
+Przykład uruchamiania co godzinę z crona:
 
+    0 * * * * cd /sciezka/do/aplikacji && python main.py --wojewodztwo mazowieckie --parametr PM10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
 
-def print_hi(name):
-    # Use a breakpoint in the code line below to debug your script.
-    print(f'Hi, {name}')  # Press ⌘F8 to toggle the breakpoint.
+import api
+import database
+import instrumentation
+import sync
+import transport
+from aqindex import SilnikIndeksow
+from catalog import StationCatalog, normalizuj
 
+logger = logging.getLogger("main")
 
-# Press the green button in the gutter to run the script.
-if __name__ == '__main__':
-    print_hi('PyCharm')
+PUNKT_KONTROLNY = ".sync_checkpoint.json"
+WAZNOSC_PUNKTU = 3600
+CO_ILE_ZAPISYWAC_PUNKT = 25
+
+
+def _wczytaj_punkt(sciezka, filtr, waznosc):
+    """
+    Wczytuje identyfikatory czujników zsynchronizowanych przez przerwane uruchomienie.
+
+    Punkt kontrolny jest pomijany, jeśli dotyczy innego filtra albo jest starszy niż waznosc sekund,
+    bo czujniki zsynchronizowane dawno trzeba odświeżyć ponownie.
+    """
+    try:
+        with open(sciezka, encoding="utf-8") as plik:
+            punkt = json.load(plik)
+    except FileNotFoundError:
+        return set()
+    except (OSError, ValueError) as e:
+        logger.warning("Pomijam uszkodzony punkt kontrolny %s: %s", sciezka, e)
+        return set()
+    if punkt.get("filtr") != filtr or time.time() - punkt.get("zapisano", 0) > waznosc:
+        return set()
+    return set(punkt.get("zrobione", ()))
+
+
+def _zapisz_punkt(sciezka, filtr, zrobione):
+    tymczasowa = f"{sciezka}.tmp"
+    with open(tymczasowa, "w", encoding="utf-8") as plik:
+        json.dump({"filtr": filtr, "zapisano": time.time(), "zrobione": sorted(zrobione)}, plik)
+    os.replace(tymczasowa, sciezka)
+
+
+def _loguj_faze(nazwa, start, zapytania, wiersze=None):
+    czas = time.perf_counter() - start
+    komunikat = f"Faza {nazwa}: {czas:.2f} s, {zapytania} zapytań ({zapytania / czas if czas else 0:.1f}/s)"
+    if wiersze is not None:
+        komunikat += f", {wiersze} wierszy ({wiersze / czas if czas else 0:.0f}/s)"
+    logger.info(komunikat)
+    return czas
+
+
+def synchronizuj(klient=None, baza=None, miasta=(), wojewodztwa=(), parametry=(), maks_watkow=8,
+                 punkt_kontrolny=PUNKT_KONTROLNY, waznosc_punktu=WAZNOSC_PUNKTU):
+    """
+    Synchronizuje czujniki wszystkich stacji lub stacji spełniających filtr.
+
+    Synchronizacja przebiega w trzech fazach: pobranie listy stacji, pobranie czujników wybranych
+    stacji i pobranie nowych pomiarów czujników. Czujniki i dane są pobierane równolegle
+    (co najwyżej maks_watkow zapytań naraz). Identyfikatory zsynchronizowanych czujników są
+    zapisywane w punkcie kontrolnym, więc ponowne uruchomienie po awarii pomija je; po udanej
+    synchronizacji punkt kontrolny jest usuwany.
+
+    Args:
+        klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient().
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+        miasta (iterable): Nazwy miast; puste oznacza wszystkie.
+        wojewodztwa (iterable): Nazwy województw; puste oznacza wszystkie.
+        parametry (iterable): Nazwy, kody lub wzory parametrów (np. "PM10"); puste oznacza wszystkie.
+        maks_watkow (int): Maksymalna liczba równoległych zapytań.
+        punkt_kontrolny (str): Ścieżka pliku punktu kontrolnego lub None, aby go nie używać.
+        waznosc_punktu (float): Wiek punktu kontrolnego w sekundach, po którym jest pomijany.
+
+    Returns:
+        dict: Liczba stacji, czujników, zsynchronizowanych czujników, nowych wierszy, błędów
+            i czasy faz w sekundach.
+    """
+    klient = klient or api.domyslny_klient()
+    baza = baza or database.domyslna_baza()
+    database.utworz_tabele(baza)
+    filtr = {"miasta": sorted(normalizuj(m) for m in miasta),
+             "wojewodztwa": sorted(normalizuj(w) for w in wojewodztwa),
+             "parametry": sorted(normalizuj(p) for p in parametry)}
+    wynik = {"stacje": 0, "czujniki": 0, "zsynchronizowane": 0, "pominiete": 0, "wiersze": 0, "bledy": 0,
+             "czasy": {}}
+
+    start = time.perf_counter()
+    katalog = StationCatalog.z_api(klient, baza)
+    stacje = list(katalog)
+    if filtr["miasta"]:
+        stacje = [stacja for miasto in filtr["miasta"] for stacja in katalog.w_miescie(miasto)]
+    if filtr["wojewodztwa"]:
+        w_wojewodztwach = {stacja['id'] for wojewodztwo in filtr["wojewodztwa"]
+                           for stacja in katalog.w_wojewodztwie(wojewodztwo)}
+        stacje = [stacja for stacja in stacje if stacja['id'] in w_wojewodztwach]
+    wynik["stacje"] = len(stacje)
+    wynik["czasy"]["stacje"] = _loguj_faze("stacje", start, 1)
+
+    start = time.perf_counter()
+    nazwy = {}
+    for id_stacji, czujniki, blad in klient.czujniki_wielu([stacja['id'] for stacja in stacje], maks_watkow):
+        if blad is not None:
+            logger.warning("Nie udało się pobrać czujników stacji %s: %s", id_stacji, blad)
+            wynik["bledy"] += 1
+            continue
+        katalog.dodaj_czujniki(id_stacji, czujniki)
+        database.zapisz_czujniki_stacji(id_stacji, czujniki, baza=baza)
+        for czujnik in czujniki:
+            if not filtr["parametry"] or katalog.klucze_czujnika(czujnik) & set(filtr["parametry"]):
+                nazwy[czujnik['id']] = czujnik['param']['paramName']
+    wynik["czujniki"] = len(nazwy)
+    wynik["czasy"]["czujniki"] = _loguj_faze("czujniki", start, len(stacje))
+
+    zrobione = _wczytaj_punkt(punkt_kontrolny, filtr, waznosc_punktu) if punkt_kontrolny else set()
+    do_synchronizacji = {id_czujnika: nazwa for id_czujnika, nazwa in nazwy.items() if id_czujnika not in zrobione}
+    wynik["pominiete"] = len(nazwy) - len(do_synchronizacji)
+    if wynik["pominiete"]:
+        logger.info("Wznawiam przerwaną synchronizację: pomijam %d czujników", wynik["pominiete"])
 
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+    start = time.perf_counter()
+    for id_czujnika, wynik_czujnika, blad in sync.synchronizuj_wiele(do_synchronizacji, baza, klient, maks_watkow):
+        if blad is not None:
+            logger.warning("Nie udało się pobrać danych czujnika %s: %s", id_czujnika, blad)
+            wynik["bledy"] += 1
+            continue
+        wynik["wiersze"] += wynik_czujnika["nowe"]
+        wynik["zsynchronizowane"] += 1
+        zrobione.add(id_czujnika)
+        if punkt_kontrolny and wynik["zsynchronizowane"] % CO_ILE_ZAPISYWAC_PUNKT == 0:
+            _zapisz_punkt(punkt_kontrolny, filtr, zrobione)
+    wynik["czasy"]["dane"] = _loguj_faze("dane", start, len(do_synchronizacji), wynik["wiersze"])
+
+    if punkt_kontrolny:
+        if wynik["bledy"]:
+            _zapisz_punkt(punkt_kontrolny, filtr, zrobione)
+        elif os.path.exists(punkt_kontrolny):
+            os.remove(punkt_kontrolny)
+    return wynik
+
+
+def parsuj_argumenty(argumenty=None):
+    """
+    Odczytuje argumenty wiersza poleceń synchronizacji.
+
+    Args:
+        argumenty (list): Argumenty wiersza poleceń; domyślnie sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: Odczytane argumenty.
+    """
+    parser = argparse.ArgumentParser(description="Synchronizuje dane pomiarowe GIOŚ z lokalną bazą danych.")
+    parser.add_argument("--miasto", action="append", default=[], help="nazwa miasta (można podać wielokrotnie)")
+    parser.add_argument("--wojewodztwo", action="append", default=[],
+                        help="nazwa województwa (można podać wielokrotnie)")
+    parser.add_argument("--parametr", action="append", default=[],
+                        help="nazwa, kod lub wzór parametru, np. PM10 (można podać wielokrotnie)")
+    parser.add_argument("--watki", type=int, default=8, help="maksymalna liczba równoległych zapytań (domyślnie 8)")
+    parser.add_argument("--na-sekunde", type=float,
+                        help="maksymalna liczba zapytań do API na sekundę (domyślnie bez ograniczenia)")
+    parser.add_argument("--baza", default=database.SCIEZKA_BAZY, help="ścieżka bazy danych")
+    parser.add_argument("--api", default=api.BAZA_URL, help="adres bazowy API, np. serwera gios_stub_server.py")
+    nagrania = parser.add_mutually_exclusive_group()
+    nagrania.add_argument("--nagrywaj", metavar="KATALOG", help="zapisuj odpowiedzi API do katalogu nagrań")
+    nagrania.add_argument("--odtwarzaj", metavar="KATALOG", help="odtwarzaj nagrane odpowiedzi API bez sieci")
+    parser.add_argument("--punkt-kontrolny", default=PUNKT_KONTROLNY, help="ścieżka pliku punktu kontrolnego")
+    parser.add_argument("--od-nowa", action="store_true", help="ignoruj punkt kontrolny przerwanej synchronizacji")
+    parser.add_argument("--indeksy", action="store_true",
+                        help="zapisz także migawkę indeksu jakości powietrza wszystkich stacji")
+    parser.add_argument("--metryki", metavar="PLIK",
+                        help="zapisz pomiary czasu i liczniki zapytań (JSON; format Prometheus dla rozszerzenia .prom)")
+    parser.add_argument("--poziom-logow", default="INFO", choices=("DEBUG", "INFO", "WARNING", "ERROR"))
+    return parser.parse_args(argumenty)
+
+
+def main(argumenty=None):
+    """
+    Punkt wejścia wiersza poleceń.
+
+    Args:
+        argumenty (list): Argumenty wiersza poleceń; domyślnie sys.argv[1:].
+
+    Returns:
+        int: Kod wyjścia: 0 po udanej synchronizacji, 1 jeśli wystąpiły błędy.
+    """
+    argumenty = parsuj_argumenty(argumenty)
+    logging.basicConfig(level=argumenty.poziom_logow, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if argumenty.od_nowa and os.path.exists(argumenty.punkt_kontrolny):
+        os.remove(argumenty.punkt_kontrolny)
+
+    if argumenty.odtwarzaj:
+        wybrany = transport.TransportOdtwarzajacy(argumenty.odtwarzaj)
+    elif argumenty.nagrywaj:
+        wybrany = transport.TransportNagrywajacy(argumenty.nagrywaj, transport.TransportRequests(argumenty.watki))
+    else:
+        wybrany = None
+
+    if argumenty.metryki:
+        instrumentation.wlacz()
+
+    start = time.perf_counter()
+    with database.BazaDanych(argumenty.baza) as baza, \
+            api.KlientGios(argumenty.api, maks_polaczen=argumenty.watki, transport=wybrany,
+                           na_sekunde=argumenty.na_sekunde) as klient:
+        wynik = synchronizuj(klient, baza, argumenty.miasto, argumenty.wojewodztwo, argumenty.parametr,
+                             argumenty.watki, argumenty.punkt_kontrolny)
+        if argumenty.indeksy:
+            silnik = SilnikIndeksow(klient, baza, maks_watkow=argumenty.watki)
+            wynik["bledy"] += silnik.odswiez([stacja['id'] for stacja in database.pobierz_stacje(baza)])["bledy"]
+    logger.info("Zsynchronizowano %d z %d czujników (%d stacji, %d nowych wierszy, %d błędów) w %.2f s",
+                wynik["zsynchronizowane"] + wynik["pominiete"], wynik["czujniki"], wynik["stacje"],
+                wynik["wiersze"], wynik["bledy"], time.perf_counter() - start)
+    if argumenty.metryki:
+        rejestr = instrumentation.rejestr
+        with open(argumenty.metryki, "w", encoding="utf-8") as plik:
+            plik.write(rejestr.jako_prometheus() if argumenty.metryki.endswith(".prom") else rejestr.jako_json())
+    return 1 if wynik["bledy"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
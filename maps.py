@@ -0,0 +1,171 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+SRODEK_MAPY = (52.2296756, 21.0122287)
+PREFIKS_WARSTWY = "mapa_stacje_"
+KOLOR_DOMYSLNY = "#3388ff"
+KOLOR_WYBRANEJ = "red"
+
+# Kolory poziomów indeksu jakości powietrza GIOŚ (0 - bardzo dobry ... 5 - bardzo zły).
+KOLORY_INDEKSU = {
+    0: "#57b108",
+    1: "#b0dd10",
+    2: "#ffd911",
+    3: "#e58100",
+    4: "#e50000",
+    5: "#990000",
+}
+
+_SKRYPT_WARSTWY = """
+{% macro script(this, kwargs) %}
+(function () {
+    var kolory = {{ this.kolory }};
+    var wybrana = {{ this.wybrana }};
+    L.geoJSON(STACJE, {
+        pointToLayer: function (stacja, polozenie) {
+            var id = stacja.properties.id;
+            return L.circleMarker(polozenie, {
+                radius: id === wybrana ? 9 : 6,
+                color: id === wybrana ? "{{ this.kolor_wybranej }}" : "#333333",
+                weight: id === wybrana ? 3 : 1,
+                fillColor: kolory[id] || "{{ this.kolor_domyslny }}",
+                fillOpacity: 0.9
+            });
+        },
+        onEachFeature: function (stacja, warstwa) {
+            warstwa.bindPopup(function () {
+                return document.createTextNode(stacja.properties.nazwa);
+            });
+        }
+    }).addTo({{ this._parent.get_name() }});
+})();
+{% endmacro %}
+"""
+
+
+def warstwa_stacji(stacje):
+    """
+    Tworzy skrypt JavaScript z warstwą stacji w formacie GeoJSON i skrót jej zawartości.
+
+    Args:
+        stacje (iterable): Słowniki stacji w formacie odpowiedzi station/findAll.
+
+    Returns:
+        tuple: Skrót zawartości (12 znaków szesnastkowych) i treść skryptu definiującego zmienną STACJE.
+    """
+    cechy = [{
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [float(stacja['gegrLon']), float(stacja['gegrLat'])]},
+        "properties": {"id": stacja['id'], "nazwa": stacja['stationName']},
+    } for stacja in sorted(stacje, key=lambda stacja: stacja['id'])]
+    geojson = json.dumps({"type": "FeatureCollection", "features": cechy}, ensure_ascii=False, separators=(",", ":"))
+    skrot = hashlib.sha1(geojson.encode("utf-8")).hexdigest()[:12]
+    return skrot, f"var STACJE = {geojson};\n"
+
+
+def zapisz_warstwe(stacje, katalog="."):
+    """
+    Zapisuje warstwę stacji do pliku mapa_stacje_<skrót>.js, jeśli katalog stacji się zmienił.
+
+    Nazwa pliku zawiera skrót zawartości, więc niezmieniona warstwa nie jest zapisywana ponownie,
+    a przeglądarka może ją trzymać w pamięci podręcznej. Pliki poprzednich wersji są usuwane.
+
+    Args:
+        stacje (iterable): Słowniki stacji w formacie odpowiedzi station/findAll.
+        katalog (str): Katalog, w którym zapisywana jest mapa.
+
+    Returns:
+        tuple: Nazwa pliku warstwy i informacja, czy plik został zapisany ponownie.
+    """
+    skrot, tresc = warstwa_stacji(stacje)
+    nazwa = f"{PREFIKS_WARSTWY}{skrot}.js"
+    sciezka = os.path.join(katalog, nazwa)
+    if os.path.exists(sciezka):
+        return nazwa, False
+    tymczasowa = f"{sciezka}.tmp"
+    with open(tymczasowa, "w", encoding="utf-8") as plik:
+        plik.write(tresc)
+    os.replace(tymczasowa, sciezka)
+    for stara in glob.glob(os.path.join(katalog, f"{PREFIKS_WARSTWY}*.js")):
+        if os.path.basename(stara) != nazwa:
+            os.remove(stara)
+    return nazwa, True
+
+
+def kolor_indeksu(poziom):
+    """
+    Zwraca kolor poziomu indeksu jakości powietrza.
+
+    Args:
+        poziom (int): Identyfikator poziomu indeksu (0-5) lub None.
+
+    Returns:
+        str: Kolor w formacie #rrggbb; KOLOR_DOMYSLNY dla nieznanego poziomu.
+    """
+    return KOLORY_INDEKSU.get(poziom, KOLOR_DOMYSLNY)
+
+
+def generuj_mape(stacje, wybrana=None, promien_km=None, kolory=None, sciezka="mapa.html"):
+    """
+    Generuje mapę stacji pomiarowych.
+
+    Stacje są rysowane na kanwie jako znaczniki kołowe z warstwy GeoJSON zapisanej w osobnym
+    pliku (zob. zapisz_warstwe), więc przy zmianie wyboru generowany jest tylko niewielki plik HTML
+    z wybraną stacją, okręgiem promienia i kolorami stacji.
+
+    Args:
+        stacje (iterable): Słowniki stacji w formacie odpowiedzi station/findAll.
+        wybrana (int): Identyfikator wybranej stacji (zaznaczonej na czerwono) lub None.
+        promien_km (float): Promień okręgu wokół wybranej stacji w kilometrach lub None.
+        kolory (dict): Słownik identyfikator stacji -> kolor wypełnienia (np. z kolor_indeksu) lub None.
+        sciezka (str): Ścieżka zapisywanego pliku HTML.
+
+    Returns:
+        dict: Raport: ścieżka bezwzględna mapy, czas generowania w sekundach, rozmiar HTML i warstwy
+            w bajtach oraz informacja, czy warstwa stacji została zapisana ponownie.
+    """
+    import folium
+    from branca.element import MacroElement, Template
+
+    start = time.perf_counter()
+    stacje = list(stacje)
+    katalog = os.path.dirname(os.path.abspath(sciezka))
+    plik_warstwy, odswiezona = zapisz_warstwe(stacje, katalog)
+
+    mapa = folium.Map(location=list(SRODEK_MAPY), zoom_start=6, prefer_canvas=True)
+    mapa.get_root().header.add_child(folium.Element(f'<script src="{plik_warstwy}"></script>'))
+    wybrana_stacja = next((stacja for stacja in stacje if stacja['id'] == wybrana), None)
+    if wybrana_stacja is not None and promien_km:
+        folium.Circle(
+            location=(float(wybrana_stacja['gegrLat']), float(wybrana_stacja['gegrLon'])),
+            radius=promien_km * 1000,
+            color='green',
+            fill=True,
+            fill_color='green'
+        ).add_to(mapa)
+    # Skrypt warstwy jest elementem potomnym mapy, więc trafia do strony po utworzeniu obiektu mapy.
+    warstwa = MacroElement()
+    warstwa._template = Template(_SKRYPT_WARSTWY)
+    warstwa.kolory = json.dumps({str(id_stacji): kolor for id_stacji, kolor in (kolory or {}).items()})
+    warstwa.wybrana = json.dumps(wybrana)
+    warstwa.kolor_wybranej = KOLOR_WYBRANEJ
+    warstwa.kolor_domyslny = KOLOR_DOMYSLNY
+    warstwa.add_to(mapa)
+    mapa.save(sciezka)
+
+    raport = {
+        "sciezka": os.path.abspath(sciezka),
+        "czas": time.perf_counter() - start,
+        "rozmiar": os.path.getsize(sciezka),
+        "rozmiar_warstwy": os.path.getsize(os.path.join(katalog, plik_warstwy)),
+        "warstwa_odswiezona": odswiezona,
+    }
+    logger.info("Mapa wygenerowana w %.0f ms: HTML %d B, warstwa stacji %d B%s", raport["czas"] * 1000,
+                raport["rozmiar"], raport["rozmiar_warstwy"], " (zapisana ponownie)" if odswiezona else "")
+    return raport
@@ -0,0 +1,211 @@
+import json
+import math
+
+# Względna dokładność szkicu kwantyli: każdy kwantyl jest wyznaczany z błędem względnym nie większym niż 1%.
+DOKLADNOSC_KWANTYLI = 0.01
+_GAMMA = (1 + DOKLADNOSC_KWANTYLI) / (1 - DOKLADNOSC_KWANTYLI)
+_LOG_GAMMA = math.log(_GAMMA)
+_KOSZYK_ZERA = "z"
+
+
+def _koszyk(wartosc):
+    if wartosc <= 0:
+        return _KOSZYK_ZERA
+    return str(math.ceil(math.log(wartosc) / _LOG_GAMMA))
+
+
+def _wartosc_koszyka(koszyk):
+    if koszyk == _KOSZYK_ZERA:
+        return 0.0
+    return 2 * _GAMMA ** int(koszyk) / (_GAMMA + 1)
+
+
+class AkumulatorStatystyk:
+    """
+    Strumieniowe statystyki szeregu pomiarowego aktualizowane pojedynczymi wartościami.
+
+    Średnia i wariancja są liczone algorytmem Welforda, a kwantyle przybliżane szkicem
+    z koszykami o logarytmicznej szerokości (błąd względny DOKLADNOSC_KWANTYLI). Akumulatory
+    z rozłącznych okresów można łączyć metodą polacz, a wartość zastąpioną korektą usunąć metodą
+    usun. Usunięcie nie cofa minimum i maksimum; jeśli usunięta wartość była skrajna, należy je
+    wyznaczyć ponownie metodą przelicz_skrajne z pomiarów okresu.
+
+    Attributes:
+        liczba (int): Liczba wartości.
+        srednia (float): Średnia wartości.
+        m2 (float): Suma kwadratów odchyleń od średniej.
+        min (float): Najmniejsza wartość.
+        min_data (str): Data najmniejszej wartości.
+        max (float): Największa wartość.
+        max_data (str): Data największej wartości.
+        histogram (dict): Liczności koszyków szkicu kwantyli.
+    """
+
+    __slots__ = ("liczba", "srednia", "m2", "min", "min_data", "max", "max_data", "histogram")
+
+    def __init__(self):
+        """
+        Inicjalizuje pusty obiekt klasy AkumulatorStatystyk.
+        """
+        self.liczba = 0
+        self.srednia = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.min_data = None
+        self.max = None
+        self.max_data = None
+        self.histogram = {}
+
+    def dodaj(self, wartosc, data=None):
+        """
+        Dodaje wartość do statystyk.
+
+        Args:
+            wartosc (float): Wartość pomiaru.
+            data (str): Data pomiaru.
+
+        Returns:
+            None
+        """
+        self.liczba += 1
+        delta = wartosc - self.srednia
+        self.srednia += delta / self.liczba
+        self.m2 += delta * (wartosc - self.srednia)
+        if self.min is None or wartosc < self.min:
+            self.min, self.min_data = wartosc, data
+        if self.max is None or wartosc > self.max:
+            self.max, self.max_data = wartosc, data
+        koszyk = _koszyk(wartosc)
+        self.histogram[koszyk] = self.histogram.get(koszyk, 0) + 1
+
+    def usun(self, wartosc):
+        """
+        Usuwa wcześniej dodaną wartość (np. zastąpioną korektą pomiaru).
+
+        Args:
+            wartosc (float): Usuwana wartość pomiaru.
+
+        Returns:
+            None
+        """
+        if self.liczba <= 1:
+            self.liczba, self.srednia, self.m2, self.histogram = 0, 0.0, 0.0, {}
+            return
+        delta = wartosc - self.srednia
+        self.liczba -= 1
+        self.srednia -= delta / self.liczba
+        self.m2 = max(self.m2 - delta * (wartosc - self.srednia), 0.0)
+        koszyk = _koszyk(wartosc)
+        if self.histogram.get(koszyk, 0) > 1:
+            self.histogram[koszyk] -= 1
+        else:
+            self.histogram.pop(koszyk, None)
+
+    def przelicz_skrajne(self, pomiary):
+        """
+        Wyznacza minimum i maksimum od nowa z pomiarów okresu (np. po usunięciu wartości skrajnej).
+
+        Args:
+            pomiary (iterable): Pary (data, wartosc) wszystkich pomiarów okresu z wartością różną od None.
+
+        Returns:
+            None
+        """
+        pomiary = list(pomiary)
+        if not pomiary:
+            self.min = self.min_data = self.max = self.max_data = None
+            return
+        self.min_data, self.min = min(pomiary, key=lambda pomiar: (pomiar[1], pomiar[0]))
+        self.max_data, self.max = min(pomiary, key=lambda pomiar: (-pomiar[1], pomiar[0]))
+
+    def polacz(self, inny):
+        """
+        Dołącza statystyki innego akumulatora (np. z innego okresu).
+
+        Args:
+            inny (AkumulatorStatystyk): Dołączany akumulator.
+
+        Returns:
+            AkumulatorStatystyk: Ten akumulator.
+        """
+        if inny.liczba:
+            liczba = self.liczba + inny.liczba
+            delta = inny.srednia - self.srednia
+            self.srednia += delta * inny.liczba / liczba
+            self.m2 += inny.m2 + delta * delta * self.liczba * inny.liczba / liczba
+            self.liczba = liczba
+            for koszyk, licznosc in inny.histogram.items():
+                self.histogram[koszyk] = self.histogram.get(koszyk, 0) + licznosc
+        if inny.min is not None and (self.min is None or inny.min < self.min):
+            self.min, self.min_data = inny.min, inny.min_data
+        if inny.max is not None and (self.max is None or inny.max > self.max):
+            self.max, self.max_data = inny.max, inny.max_data
+        return self
+
+    def wariancja(self):
+        return self.m2 / self.liczba if self.liczba else 0.0
+
+    def kwantyl(self, q):
+        """
+        Zwraca przybliżony kwantyl rzędu q.
+
+        Args:
+            q (float): Rząd kwantyla z przedziału [0, 1].
+
+        Returns:
+            float: Przybliżona wartość kwantyla lub None dla pustego akumulatora.
+        """
+        if not self.liczba:
+            return None
+        pozycja = q * (self.liczba - 1)
+        suma = 0
+        for koszyk in sorted(self.histogram, key=lambda k: -math.inf if k == _KOSZYK_ZERA else int(k)):
+            suma += self.histogram[koszyk]
+            if suma > pozycja:
+                return _wartosc_koszyka(koszyk)
+        return self.max
+
+    def podsumowanie(self, percentyle=(50, 90, 98)):
+        """
+        Zwraca statystyki w postaci słownika o kluczach zgodnych z analysis.analizuj_szereg.
+
+        Args:
+            percentyle (tuple): Wyliczane percentyle.
+
+        Returns:
+            dict: Słownik ze statystykami lub None dla pustego akumulatora.
+        """
+        if not self.liczba:
+            return None
+        return {
+            "min": self.min,
+            "min_data": self.min_data,
+            "max": self.max,
+            "max_data": self.max_data,
+            "srednia": self.srednia,
+            "mediana": self.kwantyl(0.5),
+            "percentyle": {f"P{p}": self.kwantyl(p / 100) for p in percentyle},
+            "odchylenie_standardowe": math.sqrt(self.wariancja()),
+            "liczba": self.liczba,
+        }
+
+    def do_wiersza(self):
+        return (self.liczba, self.srednia, self.m2, self.min, self.min_data, self.max, self.max_data,
+                json.dumps(self.histogram, separators=(",", ":")))
+
+    @classmethod
+    def z_wiersza(cls, wiersz):
+        """
+        Odtwarza akumulator z krotki zwróconej przez do_wiersza.
+
+        Args:
+            wiersz (tuple): Krotka (liczba, srednia, m2, min, min_data, max, max_data, histogram).
+
+        Returns:
+            AkumulatorStatystyk: Odtworzony akumulator.
+        """
+        akumulator = cls()
+        (akumulator.liczba, akumulator.srednia, akumulator.m2, akumulator.min, akumulator.min_data,
+         akumulator.max, akumulator.max_data, histogram) = wiersz
+        akumulator.histogram = json.loads(histogram)
+        return akumulator
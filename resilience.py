@@ -0,0 +1,275 @@
+"""
+Mechanizmy odporności klienta API: ograniczanie liczby zapytań, ponawianie z wykładniczym
+opóźnieniem, wyłączniki obwodu i scalanie jednoczesnych identycznych zapytań.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Kody odpowiedzi, po których zapytanie warto ponowić: przeciążenie serwera lub przekroczenie limitu.
+KODY_PONAWIANE = frozenset((429, 500, 502, 503, 504))
+
+
+class ObwodOtwarty(requests.RequestException):
+    """
+    Błąd zgłaszany bez wysyłania zapytania, gdy wyłącznik obwodu punktu końcowego jest otwarty.
+    """
+
+
+class KubelekZetonow:
+    """
+    Ogranicznik liczby zapytań na sekundę (algorytm kubełka żetonów), wspólny dla wielu wątków.
+
+    Zapytania mogą wystąpić serią do pojemności kubełka, a w dłuższym okresie nie częściej niż
+    na_sekunde razy na sekundę. Wątek, który nie dostał żetonu, czeka na swoją kolej.
+
+    Attributes:
+        na_sekunde (float): Liczba żetonów przybywających w ciągu sekundy lub None (bez ograniczenia).
+        pojemnosc (float): Maksymalna liczba zgromadzonych żetonów.
+    """
+
+    def __init__(self, na_sekunde=None, pojemnosc=None, zegar=time.monotonic, uspij=time.sleep):
+        """
+        Inicjalizuje obiekt klasy KubelekZetonow.
+
+        Args:
+            na_sekunde (float): Liczba zapytań na sekundę; None wyłącza ograniczenie (zostaje tylko wstrzymanie).
+            pojemnosc (float): Pojemność kubełka; domyślnie na_sekunde, ale co najmniej 1.
+            zegar (callable): Źródło czasu monotonicznego w sekundach.
+            uspij (callable): Funkcja usypiająca wątek na podaną liczbę sekund.
+        """
+        self.na_sekunde = na_sekunde
+        self.pojemnosc = pojemnosc or max(1.0, na_sekunde or 1.0)
+        self._zegar = zegar
+        self._uspij = uspij
+        self._zetony = self.pojemnosc
+        self._uzupelniono = zegar()
+        self._wstrzymano_do = 0.0
+        self._blokada = threading.Lock()
+
+    def pobierz(self):
+        """
+        Pobiera jeden żeton, czekając na niego w razie potrzeby.
+
+        Returns:
+            float: Czas oczekiwania w sekundach.
+        """
+        with self._blokada:
+            teraz = self._zegar()
+            czekaj = max(0.0, self._wstrzymano_do - teraz)
+            if self.na_sekunde is not None:
+                self._zetony = min(self.pojemnosc, self._zetony + (teraz - self._uzupelniono) * self.na_sekunde)
+                self._uzupelniono = teraz
+                # Żeton jest rezerwowany od razu (stan może być ujemny), więc czekające wątki ustawiają się w kolejce.
+                self._zetony -= 1
+                if self._zetony < 0:
+                    czekaj = max(czekaj, -self._zetony / self.na_sekunde)
+        if czekaj > 0:
+            self._uspij(czekaj)
+        return czekaj
+
+    def wstrzymaj(self, sekundy):
+        """
+        Wstrzymuje wydawanie żetonów wszystkim wątkom, np. po odpowiedzi 429 z nagłówkiem Retry-After.
+
+        Args:
+            sekundy (float): Czas wstrzymania w sekundach.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            self._wstrzymano_do = max(self._wstrzymano_do, self._zegar() + sekundy)
+
+
+class WylacznikObwodu:
+    """
+    Wyłącznik obwodu jednego punktu końcowego API.
+
+    Po prog_bledow kolejnych błędach obwód otwiera się i zapytania są odrzucane bez kontaktu
+    z serwerem przez czas_otwarcia sekund. Następnie przepuszczane jest jedno zapytanie próbne:
+    jego powodzenie zamyka obwód, a błąd otwiera go ponownie.
+
+    Attributes:
+        prog_bledow (int): Liczba kolejnych błędów otwierająca obwód.
+        czas_otwarcia (float): Czas w sekundach, przez który otwarty obwód odrzuca zapytania.
+        stan (str): "zamkniety", "otwarty" albo "polotwarty".
+    """
+
+    def __init__(self, prog_bledow=5, czas_otwarcia=30.0, zegar=time.monotonic):
+        """
+        Inicjalizuje obiekt klasy WylacznikObwodu.
+
+        Args:
+            prog_bledow (int): Liczba kolejnych błędów otwierająca obwód.
+            czas_otwarcia (float): Czas w sekundach, przez który otwarty obwód odrzuca zapytania.
+            zegar (callable): Źródło czasu monotonicznego w sekundach.
+        """
+        self.prog_bledow = prog_bledow
+        self.czas_otwarcia = czas_otwarcia
+        self.stan = "zamkniety"
+        self._zegar = zegar
+        self._bledy = 0
+        self._otwarto = 0.0
+        self._proba_w_toku = False
+        self._blokada = threading.Lock()
+
+    def zezwol(self):
+        """
+        Sprawdza, czy zapytanie może zostać wysłane.
+
+        Returns:
+            bool: False, jeśli obwód jest otwarty lub trwa już zapytanie próbne.
+        """
+        with self._blokada:
+            if self.stan == "otwarty" and self._zegar() - self._otwarto >= self.czas_otwarcia:
+                self.stan = "polotwarty"
+            if self.stan == "zamkniety":
+                return True
+            if self.stan == "polotwarty" and not self._proba_w_toku:
+                self._proba_w_toku = True
+                return True
+            return False
+
+    def sukces(self):
+        """
+        Odnotowuje udane zapytanie i zamyka obwód.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            self.stan = "zamkniety"
+            self._bledy = 0
+            self._proba_w_toku = False
+
+    def blad(self):
+        """
+        Odnotowuje nieudane zapytanie; otwiera obwód po prog_bledow kolejnych błędach lub po nieudanej próbie.
+
+        Returns:
+            None
+        """
+        with self._blokada:
+            self._bledy += 1
+            if self.stan == "polotwarty" or self._bledy >= self.prog_bledow:
+                self.stan = "otwarty"
+                self._otwarto = self._zegar()
+            self._proba_w_toku = False
+
+
+class PolitykaPonowien:
+    """
+    Zasady ponawiania zapytań: liczba prób i wykładnie rosnące opóźnienie z losowym rozrzutem.
+
+    Attributes:
+        maks_prob (int): Maksymalna liczba prób jednego zapytania (1 wyłącza ponawianie).
+        opoznienie_bazowe (float): Opóźnienie przed pierwszym ponowieniem w sekundach (przed rozrzutem).
+        maks_opoznienie (float): Górna granica opóźnienia w sekundach.
+    """
+
+    def __init__(self, maks_prob=4, opoznienie_bazowe=0.5, maks_opoznienie=30.0, losowe=None):
+        """
+        Inicjalizuje obiekt klasy PolitykaPonowien.
+
+        Args:
+            maks_prob (int): Maksymalna liczba prób jednego zapytania.
+            opoznienie_bazowe (float): Opóźnienie przed pierwszym ponowieniem w sekundach.
+            maks_opoznienie (float): Górna granica opóźnienia w sekundach.
+            losowe (random.Random): Generator rozrzutu; domyślnie nowy random.Random().
+        """
+        self.maks_prob = maks_prob
+        self.opoznienie_bazowe = opoznienie_bazowe
+        self.maks_opoznienie = maks_opoznienie
+        self._losowe = losowe or random.Random()
+
+    def opoznienie(self, proba, retry_after=None):
+        """
+        Zwraca opóźnienie przed kolejną próbą.
+
+        Bez nagłówka Retry-After opóźnienie jest losowane z przedziału [0, min(maks, baza * 2^proba)]
+        ("full jitter"), co rozprasza ponowienia wielu wątków w czasie. Czas wskazany przez serwer
+        w Retry-After jest respektowany, a losowy dodatek zapobiega jednoczesnemu powrotowi wątków.
+
+        Args:
+            proba (int): Numer nieudanej próby, licząc od 0.
+            retry_after (float): Czas w sekundach z nagłówka Retry-After lub None.
+
+        Returns:
+            float: Opóźnienie w sekundach.
+        """
+        if retry_after is not None:
+            return min(self.maks_opoznienie, retry_after) + self._losowe.uniform(0, self.opoznienie_bazowe)
+        return self._losowe.uniform(0, min(self.maks_opoznienie, self.opoznienie_bazowe * 2 ** proba))
+
+
+def retry_after(odpowiedz):
+    """
+    Odczytuje z odpowiedzi nagłówek Retry-After podany w sekundach lub jako data HTTP.
+
+    Args:
+        odpowiedz (requests.Response): Odpowiedź serwera.
+
+    Returns:
+        float: Liczba sekund do odczekania lub None, jeśli nagłówka nie ma lub jest niepoprawny.
+    """
+    wartosc = odpowiedz.headers.get("Retry-After")
+    if wartosc is None:
+        return None
+    try:
+        return max(0.0, float(wartosc))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(wartosc) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class ScalanieZapytan:
+    """
+    Scala jednoczesne wywołania o tym samym kluczu: funkcja jest wykonywana raz, a wszystkie
+    oczekujące wątki otrzymują jej wynik albo wyjątek.
+
+    Scalane są tylko wywołania w toku; wynik nie jest przechowywany po ich zakończeniu.
+    Wszyscy wywołujący otrzymują ten sam obiekt wyniku, więc nie należy go modyfikować.
+    """
+
+    def __init__(self):
+        """
+        Inicjalizuje obiekt klasy ScalanieZapytan.
+        """
+        self._w_toku = {}
+        self._blokada = threading.Lock()
+
+    def wykonaj(self, klucz, funkcja):
+        """
+        Wykonuje funkcję albo dołącza do trwającego wywołania o tym samym kluczu.
+
+        Args:
+            klucz (hashable): Klucz wywołania, np. ścieżka zapytania.
+            funkcja (callable): Funkcja bez argumentów.
+
+        Returns:
+            Wynik funkcji.
+        """
+        with self._blokada:
+            przyszly = self._w_toku.get(klucz)
+            wykonujacy = przyszly is None
+            if wykonujacy:
+                przyszly = self._w_toku[klucz] = Future()
+        if not wykonujacy:
+            return przyszly.result()
+        try:
+            przyszly.set_result(funkcja())
+        except BaseException as e:
+            przyszly.set_exception(e)
+        finally:
+            with self._blokada:
+                del self._w_toku[klucz]
+        return przyszly.result()
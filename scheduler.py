@@ -0,0 +1,147 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Zadanie:
+    __slots__ = ("klucz", "generacja", "funkcja", "argumenty", "po_sukcesie", "po_bledzie", "przyszly")
+
+    def __init__(self, klucz, generacja, funkcja, argumenty, po_sukcesie, po_bledzie):
+        self.klucz = klucz
+        self.generacja = generacja
+        self.funkcja = funkcja
+        self.argumenty = argumenty
+        self.po_sukcesie = po_sukcesie
+        self.po_bledzie = po_bledzie
+        self.przyszly = None
+
+
+class PlanistaZadan:
+    """
+    Wykonuje zadania w puli wątków roboczych i przekazuje ich wyniki z powrotem do wątku Tk.
+
+    Każde zadanie ma klucz (np. "czujniki"). Nowe zadanie o tym samym kluczu zastępuje poprzednie:
+    jeśli poprzednie jeszcze nie wystartowało, jest anulowane, a jeśli trwa, jego wynik zostanie
+    pominięty. Ponowne zlecenie identycznego zadania (ten sam klucz, funkcja i argumenty), które
+    jest już w toku, nie uruchamia go drugi raz. Wyniki są odbierane z kolejki przez root.after,
+    więc funkcje zwrotne zawsze wykonują się w wątku Tk. Metody planisty należy wywoływać z wątku Tk.
+
+    Attributes:
+        root (tk.Tk): Główne okno aplikacji.
+        interwal_ms (int): Odstęp między sprawdzeniami kolejki wyników w milisekundach.
+        przy_zmianie (callable): Funkcja wywoływana z liczbą aktywnych zadań po każdej zmianie.
+    """
+
+    def __init__(self, root, maks_watkow=4, interwal_ms=30, przy_zmianie=None):
+        """
+        Inicjalizuje obiekt klasy PlanistaZadan.
+
+        Args:
+            root (tk.Tk): Główne okno aplikacji.
+            maks_watkow (int): Liczba wątków roboczych.
+            interwal_ms (int): Odstęp między sprawdzeniami kolejki wyników w milisekundach.
+            przy_zmianie (callable): Funkcja wywoływana z liczbą aktywnych zadań po każdej zmianie.
+        """
+        self.root = root
+        self.interwal_ms = interwal_ms
+        self.przy_zmianie = przy_zmianie
+        self._pula = ThreadPoolExecutor(max_workers=maks_watkow, thread_name_prefix="planista")
+        self._wyniki = queue.Queue()
+        self._w_toku = {}
+        self._generacje = {}
+        self._odbieranie = None
+
+    def uruchom(self, klucz, funkcja, *argumenty, po_sukcesie=None, po_bledzie=None):
+        """
+        Zleca wykonanie funkcji w wątku roboczym.
+
+        Args:
+            klucz (str): Klucz zadania; nowsze zadanie o tym samym kluczu zastępuje starsze.
+            funkcja (callable): Funkcja wykonywana w wątku roboczym.
+            *argumenty: Argumenty funkcji.
+            po_sukcesie (callable): Funkcja wywoływana w wątku Tk z wynikiem zadania.
+            po_bledzie (callable): Funkcja wywoływana w wątku Tk z wyjątkiem zgłoszonym przez zadanie.
+
+        Returns:
+            int: Numer generacji zadania dla danego klucza.
+        """
+        poprzednie = self._w_toku.get(klucz)
+        if poprzednie is not None:
+            if poprzednie.funkcja == funkcja and poprzednie.argumenty == argumenty:
+                poprzednie.po_sukcesie = po_sukcesie
+                poprzednie.po_bledzie = po_bledzie
+                return poprzednie.generacja
+            poprzednie.przyszly.cancel()
+
+        generacja = self._generacje.get(klucz, 0) + 1
+        self._generacje[klucz] = generacja
+        zadanie = _Zadanie(klucz, generacja, funkcja, argumenty, po_sukcesie, po_bledzie)
+        self._w_toku[klucz] = zadanie
+        zadanie.przyszly = self._pula.submit(funkcja, *argumenty)
+        zadanie.przyszly.add_done_callback(lambda przyszly: self._wyniki.put((zadanie, przyszly)))
+        self._powiadom()
+        if self._odbieranie is None:
+            self._odbieranie = self.root.after(self.interwal_ms, self._odbierz)
+        return generacja
+
+    def anuluj(self, klucz):
+        """
+        Anuluje zadanie o podanym kluczu; jego wynik zostanie pominięty.
+
+        Args:
+            klucz (str): Klucz zadania.
+
+        Returns:
+            None
+        """
+        zadanie = self._w_toku.pop(klucz, None)
+        if zadanie is not None:
+            zadanie.przyszly.cancel()
+            self._powiadom()
+
+    def aktywne(self):
+        """
+        Zwraca liczbę zadań, na których wynik oczekuje planista.
+
+        Returns:
+            int: Liczba aktywnych zadań.
+        """
+        return len(self._w_toku)
+
+    def zamknij(self):
+        """
+        Anuluje oczekujące zadania i zatrzymuje pulę wątków bez czekania na trwające zadania.
+
+        Returns:
+            None
+        """
+        if self._odbieranie is not None:
+            self.root.after_cancel(self._odbieranie)
+            self._odbieranie = None
+        self._w_toku.clear()
+        self._pula.shutdown(wait=False, cancel_futures=True)
+
+    def _odbierz(self):
+        self._odbieranie = None
+        try:
+            while True:
+                try:
+                    zadanie, przyszly = self._wyniki.get_nowait()
+                except queue.Empty:
+                    break
+                if przyszly.cancelled() or self._w_toku.get(zadanie.klucz) is not zadanie:
+                    continue
+                del self._w_toku[zadanie.klucz]
+                self._powiadom()
+                blad = przyszly.exception()
+                if blad is None:
+                    if zadanie.po_sukcesie is not None:
+                        zadanie.po_sukcesie(przyszly.result())
+                elif zadanie.po_bledzie is not None:
+                    zadanie.po_bledzie(blad)
+        finally:
+            if self._w_toku and self._odbieranie is None:
+                self._odbieranie = self.root.after(self.interwal_ms, self._odbierz)
+
+    def _powiadom(self):
+        if self.przy_zmianie is not None:
+            self.przy_zmianie(len(self._w_toku))
@@ -0,0 +1,181 @@
+import heapq
+import math
+
+PROMIEN_ZIEMI_KM = 6371.0088
+
+# Odległość na kuli (haversine) różni się od odległości na elipsoidzie WGS84 o mniej niż 0,5%.
+# Punkty, których odległość sferyczna mieści się w tym marginesie wokół promienia, są sprawdzane
+# dokładnie funkcją geopy.distance.geodesic.
+MARGINES_WZGLEDNY = 0.006
+
+
+def _wektor(lat, lon):
+    lat = math.radians(lat)
+    lon = math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+
+def _cieciwa(odleglosc_km):
+    kat = min(odleglosc_km / PROMIEN_ZIEMI_KM, math.pi)
+    return 2 * math.sin(kat / 2)
+
+
+def _odleglosc_z_cieciwy(cieciwa):
+    return 2 * math.asin(min(cieciwa / 2, 1.0)) * PROMIEN_ZIEMI_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Oblicza odległość po okręgu wielkim między dwoma punktami na kuli ziemskiej.
+
+    Args:
+        lat1 (float): Szerokość geograficzna pierwszego punktu.
+        lon1 (float): Długość geograficzna pierwszego punktu.
+        lat2 (float): Szerokość geograficzna drugiego punktu.
+        lon2 (float): Długość geograficzna drugiego punktu.
+
+    Returns:
+        float: Odległość w kilometrach.
+    """
+    fi1, fi2 = math.radians(lat1), math.radians(lat2)
+    d_fi = fi2 - fi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_fi / 2) ** 2 + math.cos(fi1) * math.cos(fi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * PROMIEN_ZIEMI_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+class IndeksPrzestrzenny:
+    """
+    Indeks przestrzenny (drzewo k-d) punktów o współrzędnych geograficznych.
+
+    Punkty są przechowywane jako wektory jednostkowe w przestrzeni 3D, w której odległość euklidesowa
+    (cięciwa) rośnie monotonicznie z odległością po powierzchni kuli. Zapytania odwiedzają więc tylko
+    gałęzie drzewa, które mogą zawierać wynik, zamiast liczyć odległość do każdego punktu.
+    Zwracane odległości są sferyczne (haversine); przynależność do promienia w pobliżu jego granicy
+    jest rozstrzygana dokładną odległością geodezyjną.
+
+    Attributes:
+        punkty (list): Krotki (lat, lon, element) w kolejności węzłów drzewa.
+    """
+
+    def __init__(self, punkty):
+        """
+        Inicjalizuje obiekt klasy IndeksPrzestrzenny.
+
+        Args:
+            punkty (iterable): Krotki (lat, lon, element), gdzie element jest dowolnym obiektem, np. stacją.
+        """
+        self.punkty = [(float(lat), float(lon), element) for lat, lon, element in punkty]
+        self._wektory = [_wektor(lat, lon) for lat, lon, _ in self.punkty]
+        kolejnosc = list(range(len(self.punkty)))
+        self._buduj(kolejnosc, 0, len(kolejnosc), 0)
+        self.punkty = [self.punkty[i] for i in kolejnosc]
+        self._wektory = [self._wektory[i] for i in kolejnosc]
+
+    def __len__(self):
+        return len(self.punkty)
+
+    def _buduj(self, kolejnosc, poczatek, koniec, os):
+        # Drzewo jest niejawne: węzłem przedziału [poczatek, koniec) jest jego środkowy element.
+        if koniec - poczatek <= 1:
+            return
+        wektory = self._wektory
+        kolejnosc[poczatek:koniec] = sorted(kolejnosc[poczatek:koniec], key=lambda i: wektory[i][os])
+        srodek = (poczatek + koniec) // 2
+        nastepna_os = (os + 1) % 3
+        self._buduj(kolejnosc, poczatek, srodek, nastepna_os)
+        self._buduj(kolejnosc, srodek + 1, koniec, nastepna_os)
+
+    def _kandydaci(self, wektor, cieciwa):
+        wynik = []
+        stos = [(0, len(self.punkty), 0)]
+        limit = cieciwa * cieciwa
+        while stos:
+            poczatek, koniec, os = stos.pop()
+            if poczatek >= koniec:
+                continue
+            srodek = (poczatek + koniec) // 2
+            w = self._wektory[srodek]
+            kwadrat = (w[0] - wektor[0]) ** 2 + (w[1] - wektor[1]) ** 2 + (w[2] - wektor[2]) ** 2
+            if kwadrat <= limit:
+                wynik.append(srodek)
+            roznica = wektor[os] - w[os]
+            nastepna_os = (os + 1) % 3
+            if roznica <= cieciwa:
+                stos.append((poczatek, srodek, nastepna_os))
+            if -roznica <= cieciwa:
+                stos.append((srodek + 1, koniec, nastepna_os))
+        return wynik
+
+    def w_promieniu(self, lat, lon, promien_km, dokladnie=True):
+        """
+        Zwraca elementy położone nie dalej niż promien_km od punktu, posortowane według odległości.
+
+        Args:
+            lat (float): Szerokość geograficzna punktu odniesienia.
+            lon (float): Długość geograficzna punktu odniesienia.
+            promien_km (float): Promień wyszukiwania w kilometrach.
+            dokladnie (bool): Czy punkty w pobliżu granicy promienia rozstrzygać odległością geodezyjną.
+
+        Returns:
+            list: Krotki (odleglosc_km, element) posortowane rosnąco według odległości.
+        """
+        if promien_km < 0:
+            raise ValueError("Promień nie może być ujemny.")
+        geodesic = None
+        if dokladnie:
+            from geopy.distance import geodesic
+        cieciwa = _cieciwa(promien_km * (1 + MARGINES_WZGLEDNY))
+        dolna_granica = promien_km * (1 - MARGINES_WZGLEDNY)
+        wynik = []
+        for i in self._kandydaci(_wektor(lat, lon), cieciwa):
+            lat_p, lon_p, element = self.punkty[i]
+            odleglosc = haversine_km(lat, lon, lat_p, lon_p)
+            if geodesic is None or odleglosc <= dolna_granica:
+                if odleglosc <= promien_km:
+                    wynik.append((odleglosc, element))
+            elif geodesic((lat, lon), (lat_p, lon_p)).km <= promien_km:
+                wynik.append((odleglosc, element))
+        wynik.sort(key=lambda para: para[0])
+        return wynik
+
+    def najblizsze(self, lat, lon, k=1):
+        """
+        Zwraca k elementów najbliższych punktowi, posortowanych według odległości.
+
+        Args:
+            lat (float): Szerokość geograficzna punktu odniesienia.
+            lon (float): Długość geograficzna punktu odniesienia.
+            k (int): Liczba zwracanych elementów.
+
+        Returns:
+            list: Krotki (odleglosc_km, element) posortowane rosnąco według odległości.
+        """
+        if k <= 0:
+            return []
+        wektor = _wektor(lat, lon)
+        # Kopiec maksymalny (przez ujemne klucze) k najbliższych dotąd punktów.
+        kopiec = []
+        stos = [(0, len(self.punkty), 0, 0.0)]
+        while stos:
+            poczatek, koniec, os, granica = stos.pop()
+            if poczatek >= koniec or (len(kopiec) == k and granica >= -kopiec[0][0]):
+                continue
+            srodek = (poczatek + koniec) // 2
+            w = self._wektory[srodek]
+            kwadrat = (w[0] - wektor[0]) ** 2 + (w[1] - wektor[1]) ** 2 + (w[2] - wektor[2]) ** 2
+            if len(kopiec) < k:
+                heapq.heappush(kopiec, (-kwadrat, srodek))
+            elif kwadrat < -kopiec[0][0]:
+                heapq.heapreplace(kopiec, (-kwadrat, srodek))
+            roznica = wektor[os] - w[os]
+            nastepna_os = (os + 1) % 3
+            lewa, prawa = (poczatek, srodek), (srodek + 1, koniec)
+            blizsza, dalsza = (lewa, prawa) if roznica <= 0 else (prawa, lewa)
+            # Dalsza gałąź jest sprawdzana po bliższej, gdy kopiec ma już ciaśniejsze ograniczenie.
+            stos.append((*dalsza, nastepna_os, roznica * roznica))
+            stos.append((*blizsza, nastepna_os, granica))
+        wynik = [(_odleglosc_z_cieciwy(math.sqrt(-kwadrat)), self.punkty[i][2]) for kwadrat, i in kopiec]
+        wynik.sort(key=lambda para: para[0])
+        return wynik
@@ -0,0 +1,118 @@
+import api
+import database
+
+
+def nowe_pomiary(id_czujnika, wartosci, znacznik):
+    """
+    Wybiera z odpowiedzi API pomiary nowsze niż znacznik synchronizacji.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        wartosci (list): Lista słowników {'date': ..., 'value': ...} z odpowiedzi data/getData.
+        znacznik (str): Data ostatniego zapisanego niepustego pomiaru lub None.
+
+    Returns:
+        list: Lista krotek (id_czujnika, data, wartosc) posortowana według daty.
+    """
+    return sorted((id_czujnika, entry['date'], entry['value']) for entry in wartosci
+                  if znacznik is None or entry['date'] > znacznik)
+
+
+def synchronizuj_czujnik(id_czujnika, nazwa, dane=None, baza=None):
+    """
+    Dopisuje do bazy danych tylko pomiary czujnika nowsze niż jego znacznik synchronizacji.
+
+    Pomiary bez wartości (None) są zapisywane, a znacznik zatrzymuje się przed najwcześniejszym z nich,
+    więc przy kolejnej synchronizacji zostaną pobrane ponownie i uzupełnione, gdy GIOŚ opublikuje wartość;
+    dotyczy to także luk, po których są już późniejsze pomiary. Luka, której API już nie zwraca, przestaje
+    wstrzymywać znacznik. Zapis pomiarów i przesunięcie znacznika odbywają się w jednej transakcji.
+
+    Args:
+        id_czujnika (int): Unikalny identyfikator czujnika.
+        nazwa (str): Nazwa czujnika.
+        dane (dict): Odpowiedź data/getData, jeśli została już pobrana; w przeciwnym razie jest pobierana z API.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+
+    Returns:
+        dict: Liczba zapisanych pomiarów i znacznik po synchronizacji.
+    """
+    baza = baza or database.domyslna_baza()
+    if dane is None:
+        dane = api.pobierz_dane(id_czujnika)
+    znacznik = database.pobierz_znacznik(id_czujnika, baza=baza)
+    wiersze = nowe_pomiary(id_czujnika, dane['values'], znacznik)
+    nowy_znacznik = None
+    for _, data, wartosc in wiersze:
+        if wartosc is None:
+            break
+        nowy_znacznik = data
+
+    with baza.transakcja():
+        database.zapisz_czujnik(id_czujnika, nazwa, baza=baza)
+        database.zapisz_dane_wsadowo(wiersze, baza=baza)
+        if nowy_znacznik is not None:
+            database.zapisz_znacznik(id_czujnika, nowy_znacznik, baza=baza)
+
+    return {"nowe": len(wiersze), "znacznik": nowy_znacznik or znacznik}
+
+
+def synchronizuj_zapisane(baza=None, klient=None, maks_watkow=None):
+    """
+    Odświeża wszystkie czujniki zapisane w bazie danych, pobierając tylko nowe pomiary (zob. synchronizuj_wiele).
+
+    Args:
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+        klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient().
+        maks_watkow (int): Maksymalna liczba równoległych zapytań.
+
+    Returns:
+        dict: Słownik id_czujnika -> wynik synchronizuj_czujnik lub wyjątek, jeśli pobieranie się nie powiodło.
+    """
+    baza = baza or database.domyslna_baza()
+    nazwy = dict(database.pobierz_id_czujnikow(baza=baza))
+    return {id_czujnika: blad or wynik
+            for id_czujnika, wynik, blad in synchronizuj_wiele(nazwy, baza, klient, maks_watkow)}
+
+
+def synchronizuj_wiele(nazwy, baza=None, klient=None, maks_watkow=None):
+    """
+    Synchronizuje wiele czujników, pobierając ich dane równolegle.
+
+    Dane czujników są pobierane równolegle, a zapis do bazy odbywa się w wątku wywołującym,
+    w miarę napływania kolejnych odpowiedzi.
+
+    Args:
+        nazwy (dict): Słownik id_czujnika -> nazwa czujnika.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+        klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient().
+        maks_watkow (int): Maksymalna liczba równoległych zapytań.
+
+    Yields:
+        tuple: (id_czujnika, wynik synchronizuj_czujnik, blad), gdzie wynik albo blad jest równy None.
+    """
+    baza = baza or database.domyslna_baza()
+    klient = klient or api.domyslny_klient()
+    for id_czujnika, dane, blad in klient.dane_wielu(nazwy, maks_watkow):
+        if blad is not None:
+            yield id_czujnika, None, blad
+        else:
+            yield id_czujnika, synchronizuj_czujnik(id_czujnika, nazwy[id_czujnika], dane, baza=baza), None
+
+
+def synchronizuj_czujniki_stacji(id_stacji, baza=None, klient=None):
+    """
+    Pobiera czujniki stacji z API i zapisuje ich przypisanie do stacji (zob. database.zapisz_czujniki_stacji),
+    dzięki czemu czujniki wybierane w aplikacji są uwzględniane w analizach wielu czujników.
+
+    Args:
+        id_stacji (int): Identyfikator stacji.
+        baza (BazaDanych): Uchwyt bazy danych; domyślnie database.domyslna_baza().
+        klient (api.KlientGios): Klient API; domyślnie api.domyslny_klient().
+
+    Returns:
+        list: Słowniki czujników w formacie odpowiedzi station/sensors.
+    """
+    klient = klient or api.domyslny_klient()
+    czujniki = klient.czujniki(id_stacji)
+    database.zapisz_czujniki_stacji(id_stacji, czujniki, baza=baza)
+    return czujniki
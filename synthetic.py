@@ -0,0 +1,149 @@
+import random
+
+import numpy as np
+
+# Skale danych: liczba czujników i liczba dni pomiarów godzinowych.
+SKALE = {
+    "mala": (1, 7),
+    "srednia": (20, 365),
+    "duza": (200, 3 * 365),
+    "pelna": (1000, 10 * 365),
+}
+
+WOJEWODZTWA = ("DOLNOŚLĄSKIE", "KUJAWSKO-POMORSKIE", "LUBELSKIE", "LUBUSKIE", "ŁÓDZKIE", "MAŁOPOLSKIE",
+               "MAZOWIECKIE", "OPOLSKIE", "PODKARPACKIE", "PODLASKIE", "POMORSKIE", "ŚLĄSKIE",
+               "ŚWIĘTOKRZYSKIE", "WARMIŃSKO-MAZURSKIE", "WIELKOPOLSKIE", "ZACHODNIOPOMORSKIE")
+
+# Parametry: nazwa, kod i typowe stężenie w µg/m³.
+PARAMETRY = (
+    ("pył zawieszony PM10", "PM10", 30.0),
+    ("pył zawieszony PM2.5", "PM2.5", 20.0),
+    ("dwutlenek azotu", "NO2", 25.0),
+    ("ozon", "O3", 50.0),
+    ("dwutlenek siarki", "SO2", 5.0),
+    ("benzen", "C6H6", 1.5),
+)
+
+POCZATEK = "2015-01-01T00:00:00"
+UDZIAL_BRAKOW = 0.01
+
+
+def generuj_stacje(liczba, ziarno=0):
+    """
+    Generuje stacje pomiarowe rozmieszczone losowo na obszarze Polski.
+
+    Args:
+        liczba (int): Liczba stacji.
+        ziarno (int): Ziarno generatora liczb losowych; te same argumenty dają te same stacje.
+
+    Returns:
+        list: Słowniki stacji w formacie odpowiedzi station/findAll.
+    """
+    losowe = random.Random(ziarno)
+    stacje = []
+    for i in range(liczba):
+        miasto = f"Miasto {i // 3 + 1}"
+        stacje.append({
+            "id": i + 1,
+            "stationName": f"{miasto}, ul. Testowa {i % 3 + 1}",
+            "gegrLat": f"{losowe.uniform(49.0, 54.8):.6f}",
+            "gegrLon": f"{losowe.uniform(14.1, 24.1):.6f}",
+            "city": {"id": i // 3 + 1, "name": miasto,
+                     "commune": {"provinceName": WOJEWODZTWA[(i // 3) % len(WOJEWODZTWA)]}},
+        })
+    return stacje
+
+
+def generuj_czujniki(stacje, na_stacje=2):
+    """
+    Generuje czujniki stacji; identyfikator czujnika to id_stacji * 100 + numer parametru.
+
+    Args:
+        stacje (list): Słowniki stacji.
+        na_stacje (int): Liczba czujników na stację (co najwyżej len(PARAMETRY)).
+
+    Returns:
+        dict: Słownik id_stacji -> lista słowników czujników w formacie odpowiedzi station/sensors.
+    """
+    czujniki = {}
+    for stacja in stacje:
+        czujniki[stacja["id"]] = [{
+            "id": stacja["id"] * 100 + numer,
+            "stationId": stacja["id"],
+            "param": {"paramName": nazwa, "paramFormula": kod, "paramCode": kod, "idParam": numer},
+        } for numer, (nazwa, kod, _) in enumerate(PARAMETRY[:na_stacje])]
+    return czujniki
+
+
+def generuj_szereg(id_czujnika, dni, poczatek=POCZATEK, poziom=30.0, ziarno=0):
+    """
+    Generuje godzinowy szereg pomiarów z cyklem dobowym, rocznym, szumem i brakami wartości.
+
+    Args:
+        id_czujnika (int): Identyfikator czujnika.
+        dni (int): Liczba dni pomiarów.
+        poczatek (str): Czas pierwszego pomiaru w formacie ISO.
+        poziom (float): Średni poziom stężenia.
+        ziarno (int): Ziarno generatora; szereg zależy od ziarna i identyfikatora czujnika.
+
+    Returns:
+        tuple: Tablica dat (tekst yyyy-mm-dd HH:MM:SS) i tablica wartości float64 (NaN oznacza brak pomiaru).
+    """
+    generator = np.random.default_rng([ziarno, id_czujnika])
+    godziny = np.arange(dni * 24)
+    czasy = np.datetime64(poczatek, "s") + godziny.astype("timedelta64[h]")
+    cykl_dobowy = 0.3 * np.sin(2 * np.pi * (godziny % 24 - 8) / 24)
+    cykl_roczny = 0.5 * np.cos(2 * np.pi * godziny / (24 * 365.25))
+    wartosci = poziom * np.exp(cykl_dobowy + cykl_roczny + generator.normal(0.0, 0.35, godziny.size))
+    wartosci = np.round(wartosci, 1)
+    wartosci[generator.random(godziny.size) < UDZIAL_BRAKOW] = np.nan
+    daty = np.char.replace(np.datetime_as_string(czasy, unit="s"), "T", " ")
+    return daty, wartosci
+
+
+def wiersze_czujnika(id_czujnika, dni, poczatek=POCZATEK, poziom=30.0, ziarno=0):
+    """
+    Zwraca pomiary szeregu (zob. generuj_szereg) w postaci wierszy do zapisu w bazie danych.
+
+    Args:
+        id_czujnika (int): Identyfikator czujnika.
+        dni (int): Liczba dni pomiarów.
+        poczatek (str): Czas pierwszego pomiaru w formacie ISO.
+        poziom (float): Średni poziom stężenia.
+        ziarno (int): Ziarno generatora.
+
+    Returns:
+        generator: Krotki (id_czujnika, data, wartosc), z None dla brakujących pomiarów.
+    """
+    daty, wartosci = generuj_szereg(id_czujnika, dni, poczatek, poziom, ziarno)
+    for data, wartosc in zip(daty.tolist(), wartosci.tolist()):
+        yield id_czujnika, data, None if wartosc != wartosc else wartosc
+
+
+def zbior_danych(skala, ziarno=0):
+    """
+    Generuje stacje, czujniki i pomiary w podanej skali.
+
+    Args:
+        skala (str): Klucz SKALE albo krotka (liczba czujników, liczba dni).
+        ziarno (int): Ziarno generatora liczb losowych.
+
+    Returns:
+        dict: Lista stacji ("stacje"), słownik czujników stacji ("czujniki"), identyfikatory
+            generowanych czujników ("id_czujnikow"), liczba dni ("dni") i funkcja zwracająca generator
+            wierszy wszystkich czujników ("wiersze").
+    """
+    liczba_czujnikow, dni = SKALE[skala] if isinstance(skala, str) else skala
+    na_stacje = 2
+    stacje = generuj_stacje(max(1, -(-liczba_czujnikow // na_stacje)), ziarno)
+    czujniki = generuj_czujniki(stacje, na_stacje)
+    lista = [czujnik for czujniki_stacji in czujniki.values() for czujnik in czujniki_stacji][:liczba_czujnikow]
+    poziomy = {kod: poziom for _, kod, poziom in PARAMETRY}
+
+    def wiersze():
+        for czujnik in lista:
+            yield from wiersze_czujnika(czujnik["id"], dni, poziom=poziomy[czujnik["param"]["paramCode"]],
+                                        ziarno=ziarno)
+
+    return {"stacje": stacje, "czujniki": czujniki, "id_czujnikow": [czujnik["id"] for czujnik in lista],
+            "dni": dni, "wiersze": wiersze}
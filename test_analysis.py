@@ -0,0 +1,82 @@
+import pytest
+import analysis
+import database
+import synthetic
+
+
+def test_analizuj_dane():
+    dane = [('2022-01-02 01:00:00', 70.0), ('2022-01-02 00:00:00', None), ('2022-01-01 01:00:00', 40.0),
+            ('2022-01-01 00:00:00', 10.0), ('2022-01-02 02:00:00', 60.0)]
+    wyniki = analysis.analizuj_dane(dane, 'pył zawieszony PM10')
+    assert wyniki['min'] == 10.0 and wyniki['min_data'] == '2022-01-01 00:00:00'
+    assert wyniki['max'] == 70.0 and wyniki['max_data'] == '2022-01-02 01:00:00'
+    assert wyniki['srednia'] == pytest.approx(45.0)
+    assert wyniki['mediana'] == pytest.approx(50.0)
+    assert wyniki['liczba'] == 4
+    assert wyniki['norma'] == {'wartosc': 50.0, 'okres': 'doba'}
+    assert (wyniki['przekroczenia'], wyniki['dni_przekroczen']) == (1, 1)
+    assert wyniki['trend'] == 'wzrostowy' and wyniki['nachylenie_trendu'] > 0
+    assert set(wyniki['percentyle']) == {'P50', 'P90', 'P98'}
+
+
+def test_przekroczenia_tylko_normy_parametru():
+    dane = [('2022-01-01 00:00:00', 210.0), ('2022-01-01 01:00:00', 10.0), ('2022-01-02 00:00:00', 30.0),
+            ('2022-01-02 01:00:00', 250.0), ('2022-01-02 02:00:00', 220.0)]
+    bez_normy = analysis.analizuj_dane(dane)
+    assert (bez_normy['norma'], bez_normy['przekroczenia'], bez_normy['dni_przekroczen']) == (None, None, None)
+    no2 = analysis.analizuj_dane(dane, 'NO2')
+    assert (no2['przekroczenia'], no2['dni_przekroczen']) == (3, 2)
+    pm10 = analysis.analizuj_dane(dane, 'pm10')
+    assert (pm10['przekroczenia'], pm10['dni_przekroczen']) == (2, 2)
+    pm25 = analysis.analizuj_dane(dane, 'PM2.5')
+    assert pm25['norma'] == {'wartosc': 25.0, 'okres': 'rok'}
+    assert (pm25['przekroczenia'], pm25['dni_przekroczen']) == (1, None)
+    assert analysis.norma_parametru('dwutlenek azotu') == analysis.NORMY['NO2']
+    assert analysis.norma_parametru('ozon') is None
+
+
+def test_analizuj_dane_bez_wartosci():
+    assert analysis.analizuj_dane([]) is None
+    assert analysis.analizuj_dane([('2022-01-01 00:00:00', None)]) is None
+
+
+def test_analizuj_agregaty():
+    agregaty = [('2022-01-01 00:00:00', 60.0, 40.0, 80.0, 2), ('2022-01-02 00:00:00', None, None, None, 0),
+                ('2022-01-03 00:00:00', 30.0, 5.0, 45.0, 6)]
+    wyniki = analysis.analizuj_agregaty(agregaty, analysis.NORMY['PM10'])
+    assert wyniki['min'] == 5.0 and wyniki['min_dzien'] == '2022-01-03'
+    assert wyniki['max'] == 80.0 and wyniki['max_dzien'] == '2022-01-01'
+    assert wyniki['srednia'] == pytest.approx(37.5)
+    assert wyniki['liczba'] == 8
+    assert wyniki['dni_przekroczen'] == 1
+    assert analysis.analizuj_agregaty(agregaty, analysis.Norma(70.0, 'godzina'))['dni_przekroczen'] == 1
+    assert analysis.analizuj_agregaty(agregaty, analysis.NORMY['PM2.5'])['dni_przekroczen'] is None
+
+
+def test_ranking_parametru_w_puli_procesow():
+    database.utworz_tabele()
+    stacje = synthetic.generuj_stacje(6)
+    czujniki = synthetic.generuj_czujniki(stacje, na_stacje=3)
+    database.zapisz_stacje(stacje)
+    for id_stacji, czujniki_stacji in czujniki.items():
+        database.zapisz_czujniki_stacji(id_stacji, czujniki_stacji)
+    # Czujnik PM10 stacji n ma stałe stężenie 20 * n, a stacja 6 nie ma pomiarów w przedziale.
+    database.zapisz_dane_wsadowo((id_stacji * 100, f"2024-01-{dzien:02d} {godzina:02d}:00:00", 20.0 * id_stacji)
+                                 for id_stacji in range(1, 6) for dzien in range(1, 11) for godzina in range(24))
+    database.zapisz_dane_wsadowo([(600, "2023-12-31 12:00:00", 500.0), (201, "2024-01-05 00:00:00", 1000.0)])
+
+    wyniki = analysis.analizuj_czujniki([100, 200, 300, 600], "2024-01-01", "2024-01-11", maks_procesow=2,
+                                        wielkosc_paczki=1)
+    assert wyniki[600] is None and wyniki[300]['srednia'] == pytest.approx(60.0)
+    assert analysis.analizuj_czujniki([100, 200, 300, 600], "2024-01-01", "2024-01-11", maks_procesow=1) == wyniki
+
+    ranking = analysis.ranking_parametru("pm10", "2024-01-01", "2024-01-11", maks_procesow=2)
+    assert [wiersz['id_stacji'] for wiersz in ranking] == [5, 4, 3, 2, 1]
+    assert [wiersz['dni_przekroczen'] for wiersz in ranking] == [10, 10, 10, 0, 0]
+    assert ranking[0]['stacja'] == stacje[4]['stationName'] and ranking[0]['liczba'] == 240
+    assert analysis.ranking_parametru("pył zawieszony PM10", "2024-01-01", "2024-01-11", maks_procesow=1) == ranking
+    # Sama data końcowa obejmuje cały dzień, tak jak w wykresie z agregatów.
+    assert analysis.ranking_parametru("pm10", "2024-01-01", "2024-01-10", maks_procesow=1) == ranking
+    assert [id_czujnika for id_czujnika, _, _, _ in database.pobierz_czujniki_parametru("no2")] == \
+        [102, 202, 302, 402, 502, 602]
+    assert analysis.ranking_parametru("NO2", maks_procesow=1) == []
@@ -0,0 +1,87 @@
+import requests
+import api
+import http_cache
+import transport
+from gios_stub_server import SerwerZastepczy
+
+
+def test_pobierz_wiele_zwraca_wyniki_i_bledy():
+    def metoda(identyfikator):
+        if identyfikator == 3:
+            raise requests.HTTPError("503")
+        return identyfikator * 10
+
+    with api.KlientGios() as klient:
+        wyniki = {identyfikator: (wynik, blad) for identyfikator, wynik, blad
+                  in klient.pobierz_wiele(metoda, [1, 2, 3], maks_watkow=2)}
+    assert wyniki[1] == (10, None)
+    assert wyniki[2] == (20, None)
+    assert wyniki[3][0] is None and isinstance(wyniki[3][1], requests.HTTPError)
+
+
+class OdpowiedzTestowa:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+
+def test_pamiec_podreczna_rewaliduje_przeterminowane_wpisy():
+    pamiec = http_cache.PamiecPodrecznaHttp(czasy_zycia={'czujniki': 0})
+    zapytania = []
+
+    def zapytanie(naglowki):
+        zapytania.append(naglowki)
+        if naglowki.get('If-None-Match') == '"v1"':
+            return OdpowiedzTestowa(304)
+        return OdpowiedzTestowa(200, b'[{"id": 1}]', {'ETag': '"v1"'})
+
+    assert pamiec.pobierz_przez('station/findAll', zapytanie) == [{'id': 1}]
+    assert pamiec.pobierz_przez('station/findAll', zapytanie) == [{'id': 1}]
+    assert pamiec.pobierz_przez('station/sensors/1', zapytanie) == [{'id': 1}]
+    assert pamiec.pobierz_przez('station/sensors/1', zapytanie) == [{'id': 1}]
+    assert zapytania == [{}, {}, {'If-None-Match': '"v1"'}]
+    statystyki = pamiec.statystyki()
+    assert (statystyki['trafienia'], statystyki['chybienia'], statystyki['niezmienione']) == (1, 2, 1)
+    pamiec.zamknij()
+
+
+def test_pamiec_podreczna_eksmituje_po_przekroczeniu_rozmiaru():
+    pamiec = http_cache.PamiecPodrecznaHttp(maks_rozmiar=25)
+    pamiec.zapisz('data/getData/1', b'[1, 2, 3, 4, 5, 6, 7, 8]')
+    pamiec.zapisz('data/getData/2', b'[1, 2, 3, 4, 5, 6, 7, 8]')
+    assert pamiec.statystyki()['eksmisje'] == 1
+    assert pamiec.pobierz('data/getData/1') is None
+    assert pamiec.pobierz('data/getData/2').obiekt == [1, 2, 3, 4, 5, 6, 7, 8]
+    pamiec.zamknij()
+
+
+def test_pobierz_wiele_uzywa_jednej_puli_watkow():
+    with SerwerZastepczy(stacje=12) as serwer, \
+            api.KlientGios(serwer.adres, maks_polaczen=4, pamiec=http_cache.PamiecPodrecznaHttp()) as klient:
+        for _ in range(5):
+            wyniki = list(klient.indeksy_wielu(range(1, 13), maks_watkow=3))
+            assert sorted(identyfikator for identyfikator, _, blad in wyniki if blad is None) == list(range(1, 13))
+        assert len(klient.pamiec._baza._polaczenia) <= 4
+        pula = klient._pula
+    assert klient._pula is None and pula._shutdown
+
+
+class TransportZNiepoprawnymJson:
+    def wyslij(self, url, naglowki=None, limit_czasu=None):
+        return transport.odpowiedz(url, 200, b'{"id": 2' if url.endswith('/2') else b'[]')
+
+    def zamknij(self):
+        pass
+
+
+def test_pobierz_wiele_zwraca_blad_niepoprawnego_json():
+    for pamiec in (None, http_cache.PamiecPodrecznaHttp()):
+        with api.KlientGios('http://gios.test/', transport=TransportZNiepoprawnymJson(), pamiec=pamiec) as klient:
+            wyniki = {identyfikator: (wynik, blad) for identyfikator, wynik, blad in klient.czujniki_wielu([1, 2, 3])}
+        assert wyniki[1] == wyniki[3] == ([], None)
+        assert wyniki[2][0] is None and isinstance(wyniki[2][1], ValueError)
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+
+import api
+import database
+import resilience
+from aqindex import SilnikIndeksow, odczyt_indeksu
+from gios_stub_server import SerwerZastepczy
+
+
+def test_odczyt_indeksu():
+    odpowiedz = {"stCalcDate": "2024-01-01 12:00:00", "stIndexLevel": {"id": 2}, "stIndexCrParam": "PYL"}
+    assert odczyt_indeksu(5, odpowiedz) == (5, 1704110400, 2, "PYL")
+    assert odczyt_indeksu(5, dict(odpowiedz, stIndexLevel={"id": -1}))[2] is None
+    assert odczyt_indeksu(5, {"stCalcDate": None}) is None
+    assert odczyt_indeksu(5, None) is None
+
+
+def test_silnik_zapisuje_tylko_nowe_odczyty():
+    database.utworz_tabele()
+    teraz = datetime(2024, 1, 1, 12)
+    with SerwerZastepczy(stacje=20, teraz=teraz) as serwer, api.KlientGios(serwer.adres) as klient:
+        silnik = SilnikIndeksow(klient, interwal=3600, maks_watkow=4)
+        wynik = silnik.odswiez(range(1, 21))
+        assert (wynik["pobrane"], wynik["nowe"], wynik["bledy"]) == (20, 20, 0)
+        assert len(silnik.poziomy()) == 20 and all(0 <= poziom <= 5 for poziom in silnik.poziomy().values())
+
+        zapytania = serwer.liczniki["zapytania"]
+        assert silnik.odswiez(range(1, 21))["pobrane"] == 0
+        assert serwer.liczniki["zapytania"] == zapytania
+
+        assert silnik.odswiez(range(1, 21), wymus=True)["nowe"] == 0
+        serwer.teraz = datetime(2024, 1, 1, 13)
+        assert silnik.odswiez([1, 2], wymus=True)["nowe"] == 2
+
+    assert [czas for czas, _, _ in database.pobierz_historie_indeksu(1)] == [1704110400, 1704114000]
+    assert database.pobierz_historie_indeksu(1, czas_do=1704110400)[0][2] == "PYL"
+    ponownie = SilnikIndeksow()
+    assert ponownie.wczytaj() == 20
+    assert ponownie.biezace() == silnik.biezace()
+
+
+def test_silnik_liczy_bledy_i_odswieza_w_tle():
+    database.utworz_tabele()
+    bez_ponowien = resilience.PolitykaPonowien(maks_prob=1)
+    with SerwerZastepczy(stacje=5) as serwer, api.KlientGios(serwer.adres, ponowienia=bez_ponowien) as klient:
+        silnik = SilnikIndeksow(klient, interwal=0)
+        wynik = silnik.odswiez([1, 2, 999])
+        assert (wynik["pobrane"], wynik["bledy"]) == (2, 1)
+
+        silnik.uruchom(lambda: range(1, 6), co_ile=0.01)
+        silnik.uruchom(lambda: [])
+        try:
+            for _ in range(500):
+                if len(silnik.biezace()) == 5:
+                    break
+                time.sleep(0.01)
+        finally:
+            silnik.zatrzymaj()
+        assert len(silnik.biezace()) == 5
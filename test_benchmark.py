@@ -0,0 +1,29 @@
+import numpy as np
+
+import benchmark
+import synthetic
+
+
+def test_generator_deterministyczny():
+    pierwszy = synthetic.zbior_danych((3, 2), ziarno=5)
+    drugi = synthetic.zbior_danych((3, 2), ziarno=5)
+    assert pierwszy['stacje'] == drugi['stacje']
+    assert pierwszy['id_czujnikow'] == [100, 101, 200]
+    wiersze = list(pierwszy['wiersze']())
+    assert wiersze == list(drugi['wiersze']())
+    assert len(wiersze) == 3 * 2 * 24
+    assert wiersze[0][:2] == (100, '2015-01-01 00:00:00') and wiersze[47][1] == '2015-01-02 23:00:00'
+    daty, wartosci = synthetic.generuj_szereg(100, 365, ziarno=5)
+    assert np.nanmin(wartosci) > 0 and 0 < np.isnan(wartosci).sum() < 0.05 * len(wartosci)
+
+
+def test_uruchom_i_porownaj(tmp_path):
+    wyniki = benchmark.uruchom('mala', powtorzenia=1, katalog=str(tmp_path))
+    assert set(wyniki['wyniki']) == {'zapis_pojedynczy', 'zapis_wsadowy', 'zapytanie_zakresu', 'szereg_zakresu',
+                                     'agregaty', 'analiza', 'analiza_wielu', 'wykres', 'promien'}
+    assert wyniki['wyniki']['zapis_wsadowy']['operacje'] == 7 * 24
+    assert benchmark.porownaj(wyniki, wyniki) == []
+
+    bazowe = {'skala': wyniki['skala'], 'wyniki': {nazwa: dict(wynik, czas=wynik['czas'] / 2)
+                                                  for nazwa, wynik in wyniki['wyniki'].items()}}
+    assert {nazwa for nazwa, *_ in benchmark.porownaj(wyniki, bazowe)} == set(wyniki['wyniki'])
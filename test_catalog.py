@@ -0,0 +1,31 @@
+from catalog import StationCatalog
+
+
+def stacja(id_stacji, nazwa, miasto, wojewodztwo):
+    return {'id': id_stacji, 'stationName': nazwa, 'gegrLat': '50.0', 'gegrLon': '20.0',
+            'city': {'name': miasto, 'commune': {'provinceName': wojewodztwo}}}
+
+
+def czujnik(id_czujnika, nazwa, kod):
+    return {'id': id_czujnika, 'param': {'paramName': nazwa, 'paramCode': kod, 'paramFormula': kod}}
+
+
+def test_indeksy_katalogu():
+    katalog = StationCatalog([stacja(1, 'Kraków, Aleja Krasińskiego', 'Kraków', 'MAŁOPOLSKIE'),
+                              stacja(2, 'Kraków, ul. Bujaka', 'Kraków', 'MAŁOPOLSKIE'),
+                              stacja(3, 'Warszawa-Targówek', 'Warszawa', 'MAZOWIECKIE')])
+    assert katalog.stacja('2')['stationName'] == 'Kraków, ul. Bujaka'
+    assert katalog.po_nazwie('Warszawa-Targówek')['id'] == 3
+    assert [s['id'] for s in katalog.w_miescie(' KRAKÓW ')] == [1, 2]
+    assert [s['id'] for s in katalog.w_wojewodztwie('mazowieckie')] == [3]
+    assert katalog.szukaj_prefiksu('krak') == ['Kraków, Aleja Krasińskiego', 'Kraków, ul. Bujaka']
+    assert katalog.szukaj('bu') == ['Kraków, ul. Bujaka']
+    assert katalog.szukaj('ta') == ['Warszawa-Targówek']
+
+    katalog.dodaj_czujniki(1, [czujnik(10, 'pył zawieszony PM10', 'PM10')])
+    katalog.dodaj_czujniki(3, [czujnik(30, 'pył zawieszony PM10', 'PM10')])
+    assert [s['id'] for s in katalog.z_parametrem('pm10')] == [1, 3]
+    katalog.dodaj_czujniki(1, [czujnik(11, 'dwutlenek azotu', 'NO2')])
+    assert [s['id'] for s in katalog.z_parametrem('PM10')] == [3]
+    assert katalog.czujnik(1, 'dwutlenek azotu')['id'] == 11
+    assert katalog.czujniki(2) is None
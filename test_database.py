@@ -30,3 +30,132 @@ def test_zapisz_dane():
     c.execute("SELECT * FROM dane WHERE id_czujnika = 1")
     assert c.fetchone() == (1, '2022-01-01 00:00:00', 50.0)
     conn.close()
+
+def test_zapisz_dane_wsadowo():
+    database.utworz_tabele()
+    wiersze = ((1, f'2022-01-01 {godzina:02d}:00:00', float(godzina)) for godzina in range(24))
+    wynik = database.zapisz_dane_wsadowo(wiersze, rozmiar_paczki=10)
+    assert wynik['wiersze'] == 24
+    assert wynik['paczki'] == 3
+    assert wynik['wierszy_na_sekunde'] > 0
+    conn = sqlite3.connect('dane_pomiarowe.db')
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), SUM(wartosc) FROM dane WHERE id_czujnika = 1")
+    assert c.fetchone() == (24, sum(range(24)))
+    conn.close()
+
+def test_baza_danych_polaczenie_na_watek(tmp_path):
+    import threading
+    with database.BazaDanych(str(tmp_path / 'inna.db')) as baza:
+        database.utworz_tabele(baza)
+        assert baza.polaczenie() is baza.polaczenie()
+        polaczenia = []
+        watek = threading.Thread(target=lambda: polaczenia.append(baza.polaczenie()))
+        watek.start()
+        watek.join()
+        assert polaczenia[0] is not baza.polaczenie()
+        database.zapisz_dane((2, '2022-01-01 00:00:00', 1.0), baza=baza)
+        assert database.pobierz_wszystkie_dane(2, baza=baza) == [('2022-01-01 00:00:00', 1.0)]
+    assert not (tmp_path / 'dane_pomiarowe.db').exists()
+
+def test_zapisz_dane_bez_duplikatow():
+    database.utworz_tabele()
+    database.zapisz_dane((1, '2022-01-01 00:00:00', None))
+    database.zapisz_dane((1, '2022-01-01 00:00:00', 50.0))
+    database.zapisz_dane_wsadowo([(1, '2022-01-01 00:00:00', None), (1, '2022-01-01 01:00:00', 40.0)])
+    assert database.pobierz_dane(1, '2022-01-01', '2022-01-02') == [('2022-01-01 00:00:00', 50.0),
+                                                                   ('2022-01-01 01:00:00', 40.0)]
+
+def test_migracja_starego_schematu():
+    conn = sqlite3.connect('dane_pomiarowe.db')
+    conn.execute("CREATE TABLE dane (id_czujnika INTEGER, data TEXT, wartosc REAL)")
+    conn.executemany("INSERT INTO dane VALUES (?, ?, ?)", [(1, '2022-01-01 00:00:00', 10.0),
+                                                           (1, '2022-01-01 00:00:00', 12.0),
+                                                           (1, '2022-01-01 01:00:00', 11.0)])
+    conn.commit()
+    conn.close()
+    database.utworz_tabele()
+    conn = sqlite3.connect('dane_pomiarowe.db')
+    c = conn.cursor()
+    c.execute("PRAGMA user_version")
+    assert c.fetchone()[0] == database.WERSJA_SCHEMATU
+    c.execute("SELECT * FROM dane ORDER BY data")
+    assert c.fetchall() == [(1, '2022-01-01 00:00:00', 12.0), (1, '2022-01-01 01:00:00', 11.0)]
+    c.execute("EXPLAIN QUERY PLAN SELECT data, wartosc FROM dane WHERE id_czujnika = 1 AND data BETWEEN 'a' AND 'b'")
+    assert 'SCAN' not in ' '.join(str(wiersz[-1]) for wiersz in c.fetchall())
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('geokodowanie', 'indeksy')")
+    assert sorted(wiersz[0] for wiersz in c.fetchall()) == ['geokodowanie', 'indeksy']
+    conn.close()
+
+def test_katalog_stacji():
+    database.utworz_tabele()
+    assert database.pobierz_stacje() == []
+    stacje = [{'id': 2, 'stationName': 'Kraków'}, {'id': 1, 'stationName': 'Łódź'}]
+    database.zapisz_stacje(stacje)
+    database.zapisz_stacje(stacje)
+    assert database.pobierz_stacje() == sorted(stacje, key=lambda stacja: stacja['id'])
+
+def test_statystyki_aktualizowane_przy_zapisie():
+    database.utworz_tabele()
+    database.zapisz_dane_wsadowo([(1, '2022-01-31 23:00:00', 10.0), (1, '2022-02-01 00:00:00', 30.0),
+                                  (1, '2022-02-01 01:00:00', None)])
+    database.zapisz_dane((1, '2022-02-01 00:00:00', 20.0))
+    database.zapisz_dane((1, '2022-02-01 01:00:00', 60.0))
+    statystyki = database.pobierz_statystyki(1)
+    assert statystyki['liczba'] == 3
+    assert statystyki['srednia'] == pytest.approx(30.0)
+    assert statystyki['odchylenie_standardowe'] == pytest.approx((1400 / 3) ** 0.5)
+    assert statystyki['max'] == 60.0 and statystyki['max_data'] == '2022-02-01 01:00:00'
+    luty = database.pobierz_statystyki(1, '2022-02', '2022-02')
+    assert luty['liczba'] == 2 and luty['srednia'] == pytest.approx(40.0)
+    assert database.pobierz_statystyki(1, '2022-03', '2022-12') is None
+    assert database.pobierz_statystyki(2) is None
+
+def test_statystyki_po_korekcie_wartosci_skrajnej():
+    database.utworz_tabele()
+    database.zapisz_dane_wsadowo([(1, '2022-01-01 00:00:00', 10.0), (1, '2022-01-01 01:00:00', 1000.0),
+                                  (1, '2022-02-01 00:00:00', 30.0)])
+    database.zapisz_dane((1, '2022-01-01 01:00:00', 60.0))
+    statystyki = database.pobierz_statystyki(1)
+    assert statystyki['max'] == 60.0 and statystyki['max_data'] == '2022-01-01 01:00:00'
+    assert statystyki['liczba'] == 3 and statystyki['srednia'] == pytest.approx(100 / 3)
+    database.zapisz_dane_wsadowo([(1, '2022-01-01 00:00:00', 40.0), (1, '2022-01-01 02:00:00', 20.0)])
+    styczen = database.pobierz_statystyki(1, '2022-01', '2022-01')
+    assert (styczen['min'], styczen['min_data']) == (20.0, '2022-01-01 02:00:00') and styczen['max'] == 60.0
+    assert database.pobierz_statystyki(1)['min'] == 20.0
+
+def test_agregaty_dzienne_i_miesieczne():
+    database.utworz_tabele()
+    database.zapisz_dane_wsadowo([(1, '2022-01-31 22:00:00', 10.0), (1, '2022-01-31 23:00:00', 30.0),
+                                  (1, '2022-02-01 00:00:00', None), (1, '2022-02-01 01:00:00', 5.0)],
+                                 rozmiar_paczki=3)
+    database.zapisz_dane((1, '2022-02-01 00:00:00', 15.0))
+    assert database.pobierz_agregaty(1, '2022-01-31', '2022-02-01', rozdzielczosc='dzien') == [
+        ('2022-01-31 00:00:00', 20.0, 10.0, 30.0, 2), ('2022-02-01 00:00:00', 10.0, 5.0, 15.0, 2)]
+    assert database.pobierz_agregaty(1, '2022-01-01', '2022-12-31', rozdzielczosc='miesiac') == [
+        ('2022-01-01 00:00:00', 20.0, 10.0, 30.0, 2), ('2022-02-01 00:00:00', 10.0, 5.0, 15.0, 2)]
+    godzinowe = database.pobierz_agregaty(1, '2022-02-01', '2022-02-01')
+    assert godzinowe == [('2022-02-01 00:00:00', 15.0, 15.0, 15.0, 1), ('2022-02-01 01:00:00', 5.0, 5.0, 5.0, 1)]
+
+def test_dobierz_rozdzielczosc():
+    assert database.dobierz_rozdzielczosc('2022-01-01', '2022-01-31', maks_punktow=1000) == 'godzina'
+    assert database.dobierz_rozdzielczosc('2022-01-01', '2022-12-31', maks_punktow=1000) == 'dzien'
+    assert database.dobierz_rozdzielczosc('2000-01-01', '2022-12-31', maks_punktow=1000) == 'miesiac'
+
+def test_pobierz_szereg():
+    database.utworz_tabele()
+    database.zapisz_dane_wsadowo([(1, f'2022-01-{dzien:02d} 12:00:00', None if dzien == 3 else float(dzien))
+                                  for dzien in range(5, 0, -1)])
+    szereg = database.pobierz_szereg(1, '2022-01-02', '2022-01-04 23:59:59')
+    assert list(szereg) == [('2022-01-02 12:00:00', 2.0), ('2022-01-03 12:00:00', None), ('2022-01-04 12:00:00', 4.0)]
+    assert szereg.czasy.dtype == 'int64' and szereg.czasy[0] == 1641124800
+    assert list(database.pobierz_szereg(1)) == database.pobierz_wszystkie_dane(1)
+    assert len(database.pobierz_szereg(2)) == 0
+
+def test_pobierz_z_sama_data_koncowa():
+    database.utworz_tabele()
+    database.zapisz_dane_wsadowo([(1, f'2022-01-0{dzien} {godzina:02d}:00:00', 1.0)
+                                  for dzien in (1, 2, 3) for godzina in range(24)])
+    assert len(database.pobierz_szereg(1, '2022-01-01', '2022-01-02')) == 48
+    assert len(database.pobierz_dane(1, '2022-01-01', '2022-01-02')) == 48
+    assert database.pobierz_dane(1, '2022-01-01', '2022-01-02 12:00:00')[-1][0] == '2022-01-02 12:00:00'
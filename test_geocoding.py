@@ -0,0 +1,27 @@
+from collections import namedtuple
+from geocoding import PamiecGeokodowania, normalizuj_zapytanie
+
+Lokalizacja = namedtuple('Lokalizacja', 'latitude longitude')
+
+
+def test_pamiec_geokodowania():
+    zapytania = []
+
+    def geokoder(zapytanie):
+        zapytania.append(zapytanie)
+        if zapytanie == 'awaria':
+            raise ConnectionError('brak sieci')
+        return Lokalizacja(52.0, 21.0)
+
+    pamiec = PamiecGeokodowania(geokoder, min_odstep=0)
+    assert normalizuj_zapytanie('  Collegium,  Da VINCI ') == 'collegium da vinci'
+    assert pamiec.zasiej_z_katalogu([{'city': {'name': 'Kraków'}, 'gegrLat': '50.0', 'gegrLon': '19.0'},
+                                     {'city': {'name': 'KRAKÓW'}, 'gegrLat': '50.2', 'gegrLon': '19.2'}]) == 1
+    assert pamiec.geokoduj('kraków') == (50.1, 19.1)
+    assert pamiec.geokoduj('Collegium Da Vinci') == (52.0, 21.0)
+    assert pamiec.geokoduj('collegium  da vinci') == (52.0, 21.0)
+    assert pamiec.geokoduj('awaria') is None
+    assert zapytania == ['Collegium Da Vinci', 'awaria']
+    statystyki = pamiec.statystyki()
+    assert (statystyki['trafienia'], statystyki['chybienia'], statystyki['awarie']) == (2, 2, 1)
+    assert statystyki['wspolczynnik_trafien'] == 0.5
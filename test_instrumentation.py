@@ -0,0 +1,64 @@
+import json
+
+import api
+import database
+import instrumentation
+from gios_stub_server import SerwerZastepczy
+
+
+def test_histogram_liczy_percentyle():
+    histogram = instrumentation.Histogram()
+    for milisekundy in range(1, 101):
+        histogram.dodaj(milisekundy / 1000, blad=milisekundy == 100)
+    wynik = histogram.podsumowanie()
+    assert (wynik["liczba"], wynik["bledy"], wynik["maks"]) == (100, 1, 0.1)
+    assert (wynik["p50"], wynik["p95"], wynik["p99"]) == (0.05, 0.095, 0.099)
+    assert instrumentation.Histogram().percentyl(0.5) is None
+
+
+def test_pomiary_obejmuja_baze_danych_i_http():
+    oryginal = database.pobierz_dane
+    instrumentation.rejestr.wyzeruj()
+    instrumentation.wlacz()
+    try:
+        assert database.pobierz_dane is not oryginal
+        database.utworz_tabele()
+        database.zapisz_dane_wsadowo([(1, f"2024-01-01 {godzina:02d}:00:00", 10.0) for godzina in range(24)])
+        assert len(database.pobierz_dane(1, "2024-01-01", "2024-01-02")) == 24
+        with SerwerZastepczy(stacje=2) as serwer, api.KlientGios(serwer.adres) as klient:
+            stacje = klient.stacje()
+    finally:
+        instrumentation.wylacz()
+    assert database.pobierz_dane is oryginal
+
+    migawka = json.loads(instrumentation.rejestr.jako_json())
+    assert migawka["operacje"]["database.pobierz_dane"]["liczba"] == 1
+    assert migawka["operacje"]["api.KlientGios.stacje"]["liczba"] == 1
+    liczniki = migawka["liczniki"]
+    assert liczniki["sql.wiersze"] == 24 and liczniki["sql.instrukcje"] > 24
+    assert liczniki["http.zapytania"] == liczniki["http.status.200"] == 1
+    assert liczniki["http.bajty"] == len(json.dumps(stacje, ensure_ascii=False).encode("utf-8"))
+
+    database.pobierz_dane(1, "2024-01-01", "2024-01-02")
+    assert instrumentation.rejestr.migawka()["operacje"]["database.pobierz_dane"]["liczba"] == 1
+
+    prometheus = instrumentation.rejestr.jako_prometheus()
+    assert 'gios_operacja_sekundy_count{operacja="database.pobierz_dane"} 1' in prometheus
+    assert "gios_http_bajty_total %d" % liczniki["http.bajty"] in prometheus
+
+
+def test_profilowanie_nastepnego_zdarzenia():
+    @instrumentation.zdarzenie
+    def obsluga(x):
+        return sorted(range(x))[-1]
+
+    instrumentation.rejestr.wyzeruj()
+    assert obsluga(10) == 9
+    assert instrumentation.rejestr.migawka()["operacje"] == {}
+
+    instrumentation.profiluj_nastepne("gui.obsluga")
+    assert obsluga(1000) == 999
+    profil = instrumentation.ostatni_profil()
+    assert profil["operacja"] == "gui.obsluga" and "sorted" in profil["statystyki"]
+    assert obsluga(10) == 9
+    assert instrumentation.rejestr.migawka()["operacje"]["gui.obsluga"]["liczba"] == 1
@@ -0,0 +1,55 @@
+import json
+
+import database
+import main
+
+
+def stacja(id_stacji, miasto, wojewodztwo):
+    return {'id': id_stacji, 'stationName': f'{miasto} {id_stacji}', 'gegrLat': '50.0', 'gegrLon': '20.0',
+            'city': {'name': miasto, 'commune': {'provinceName': wojewodztwo}}}
+
+
+class KlientTestowy:
+    def __init__(self, bledne=()):
+        self.bledne = set(bledne)
+        self.pobrane = []
+
+    def stacje(self):
+        return [stacja(1, 'Kraków', 'MAŁOPOLSKIE'), stacja(2, 'Kraków', 'MAŁOPOLSKIE'),
+                stacja(3, 'Warszawa', 'MAZOWIECKIE')]
+
+    def czujniki_wielu(self, id_stacji, maks_watkow=None):
+        for id_stacji in id_stacji:
+            yield id_stacji, [{'id': id_stacji * 10 + i, 'param': {'paramName': nazwa, 'paramCode': kod,
+                                                                   'paramFormula': kod}}
+                              for i, (nazwa, kod) in enumerate((('pył zawieszony PM10', 'PM10'),
+                                                                 ('dwutlenek azotu', 'NO2')))], None
+
+    def dane_wielu(self, nazwy, maks_watkow=None):
+        for id_czujnika in nazwy:
+            self.pobrane.append(id_czujnika)
+            if id_czujnika in self.bledne:
+                yield id_czujnika, None, IOError('błąd')
+            else:
+                yield id_czujnika, {'values': [{'date': '2022-01-01 00:00:00', 'value': float(id_czujnika)}]}, None
+
+
+def test_synchronizuj_z_filtrem_i_wznowieniem():
+    baza = database.domyslna_baza()
+    klient = KlientTestowy(bledne={20})
+    wynik = main.synchronizuj(klient, baza, miasta=['kraków'], parametry=['pm10'])
+    assert (wynik['stacje'], wynik['czujniki'], wynik['zsynchronizowane'], wynik['bledy']) == (2, 2, 1, 1)
+    assert sorted(klient.pobrane) == [10, 20]
+    with open(main.PUNKT_KONTROLNY, encoding='utf-8') as plik:
+        assert json.load(plik)['zrobione'] == [10]
+    assert database.pobierz_czujniki_stacji(2) == [(20, 'pył zawieszony PM10'), (21, 'dwutlenek azotu')]
+
+    klient = KlientTestowy()
+    wynik = main.synchronizuj(klient, baza, miasta=['kraków'], parametry=['pm10'])
+    assert klient.pobrane == [20]
+    assert (wynik['pominiete'], wynik['zsynchronizowane'], wynik['bledy']) == (1, 1, 0)
+    assert database.pobierz_wszystkie_dane(20) == [('2022-01-01 00:00:00', 20.0)]
+
+    klient = KlientTestowy()
+    wynik = main.synchronizuj(klient, baza, wojewodztwa=['mazowieckie'])
+    assert sorted(klient.pobrane) == [30, 31] and wynik['pominiete'] == 0
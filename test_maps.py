@@ -0,0 +1,33 @@
+import os
+
+import maps
+
+
+def stacja(id_stacji, nazwa, lat, lon):
+    return {'id': id_stacji, 'stationName': nazwa, 'gegrLat': str(lat), 'gegrLon': str(lon)}
+
+
+def test_warstwa_stacji_zapisywana_raz():
+    stacje = [stacja(i, f'Stacja {i}', 50 + i / 100, 20 + i / 100) for i in range(300)]
+    pierwszy = maps.generuj_mape(stacje, wybrana=5, promien_km=10)
+    assert pierwszy['warstwa_odswiezona']
+    drugi = maps.generuj_mape(list(reversed(stacje)), wybrana=7, kolory={7: maps.kolor_indeksu(4)})
+    assert not drugi['warstwa_odswiezona']
+    assert drugi['rozmiar'] < drugi['rozmiar_warstwy']
+    with open(drugi['sciezka'], encoding='utf-8') as plik:
+        html = plik.read()
+    assert 'Stacja 123' not in html and '#e50000' in html and 'var wybrana = 7;' in html
+
+    trzeci = maps.generuj_mape(stacje[:10])
+    assert trzeci['warstwa_odswiezona']
+    assert len([plik for plik in os.listdir('.') if plik.startswith(maps.PREFIKS_WARSTWY)]) == 1
+
+
+def test_warstwa_stacji_po_utworzeniu_mapy():
+    raport = maps.generuj_mape([stacja(1, 'Stacja 1', 50, 20)], wybrana=1, kolory={1: maps.kolor_indeksu(0)})
+    with open(raport['sciezka'], encoding='utf-8') as plik:
+        html = plik.read()
+    nazwa_mapy = html[html.index('var map_') + 4:].split(' ', 1)[0]
+    assert html.index(f'var {nazwa_mapy} = L.map(') < html.index('L.geoJSON(STACJE') < \
+        html.index(f'}}).addTo({nazwa_mapy});')
+    assert 'var kolory = {"1": "#57b108"};' in html
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from online_stats import DOKLADNOSC_KWANTYLI, AkumulatorStatystyk
+
+
+def test_akumulator_zgodny_z_numpy():
+    losowe = random.Random(1)
+    wartosci = [losowe.lognormvariate(3, 0.8) for _ in range(2000)]
+    pierwszy, drugi = AkumulatorStatystyk(), AkumulatorStatystyk()
+    for wartosc in wartosci[:700]:
+        pierwszy.dodaj(wartosc)
+    for wartosc in wartosci[700:]:
+        drugi.dodaj(wartosc)
+    akumulator = AkumulatorStatystyk.z_wiersza(pierwszy.polacz(drugi).do_wiersza())
+    assert akumulator.liczba == 2000
+    assert akumulator.srednia == pytest.approx(np.mean(wartosci))
+    assert akumulator.wariancja() == pytest.approx(np.var(wartosci))
+    assert akumulator.max == max(wartosci)
+    for q in (0.5, 0.9, 0.98):
+        assert akumulator.kwantyl(q) == pytest.approx(np.quantile(wartosci, q, method='lower'),
+                                                      rel=2 * DOKLADNOSC_KWANTYLI)
+
+
+def test_akumulator_usun():
+    akumulator = AkumulatorStatystyk()
+    for wartosc in (0.0, 5.0, 7.0):
+        akumulator.dodaj(wartosc)
+    akumulator.usun(7.0)
+    assert akumulator.liczba == 2
+    assert akumulator.srednia == pytest.approx(2.5)
+    assert akumulator.wariancja() == pytest.approx(6.25)
+    assert akumulator.kwantyl(0.0) == 0.0
+
+
+def test_akumulator_przelicz_skrajne():
+    akumulator = AkumulatorStatystyk()
+    for data, wartosc in (("a", 5.0), ("b", 9.0), ("c", 1.0)):
+        akumulator.dodaj(wartosc, data)
+    akumulator.usun(9.0)
+    akumulator.przelicz_skrajne([("a", 5.0), ("c", 1.0), ("d", 5.0)])
+    assert (akumulator.min, akumulator.min_data, akumulator.max, akumulator.max_data) == (1.0, "c", 5.0, "a")
+    akumulator.przelicz_skrajne([])
+    assert akumulator.min is None and akumulator.max is None
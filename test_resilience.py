@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import api
+import resilience
+from gios_stub_server import SerwerZastepczy
+from transport import odpowiedz
+
+
+class Zegar:
+    def __init__(self):
+        self.czas = 0.0
+
+    def __call__(self):
+        return self.czas
+
+    def uspij(self, sekundy):
+        self.czas += sekundy
+
+
+def test_kubelek_zetonow_ogranicza_tempo_i_wstrzymuje():
+    zegar = Zegar()
+    kubelek = resilience.KubelekZetonow(na_sekunde=2, zegar=zegar, uspij=zegar.uspij)
+    oczekiwania = [kubelek.pobierz() for _ in range(6)]
+    assert oczekiwania[:2] == [0, 0] and oczekiwania[2:] == [0.5, 0.5, 0.5, 0.5]
+    kubelek.wstrzymaj(10)
+    assert kubelek.pobierz() == 10
+
+
+def test_wylacznik_obwodu_otwiera_sie_i_przepuszcza_probe():
+    zegar = Zegar()
+    wylacznik = resilience.WylacznikObwodu(prog_bledow=2, czas_otwarcia=30, zegar=zegar)
+    wylacznik.blad()
+    assert wylacznik.zezwol()
+    wylacznik.blad()
+    assert wylacznik.stan == "otwarty" and not wylacznik.zezwol()
+    zegar.czas = 30
+    assert wylacznik.zezwol() and not wylacznik.zezwol()
+    wylacznik.blad()
+    assert wylacznik.stan == "otwarty"
+    zegar.czas = 60
+    assert wylacznik.zezwol()
+    wylacznik.sukces()
+    assert wylacznik.stan == "zamkniety" and wylacznik.zezwol()
+
+
+def test_opoznienie_ponowienia_respektuje_retry_after():
+    polityka = resilience.PolitykaPonowien(opoznienie_bazowe=0.5, maks_opoznienie=4)
+    assert all(0 <= polityka.opoznienie(proba) <= min(4, 0.5 * 2 ** proba) for proba in range(8))
+    assert 3 <= polityka.opoznienie(0, retry_after=3) <= 3.5
+    assert resilience.retry_after(odpowiedz("", 429, naglowki={"Retry-After": "7"})) == 7
+    assert resilience.retry_after(odpowiedz("", 429, naglowki={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert resilience.retry_after(odpowiedz("", 503)) is None
+
+
+def test_scalanie_wspoldzieli_wynik_jednoczesnych_wywolan():
+    scalanie = resilience.ScalanieZapytan()
+    start = threading.Event()
+    wywolania = []
+
+    def funkcja():
+        wywolania.append(1)
+        start.wait(5)
+        return [1, 2, 3]
+
+    wyniki = []
+    watki = [threading.Thread(target=lambda: wyniki.append(scalanie.wykonaj("klucz", funkcja))) for _ in range(4)]
+    for watek in watki:
+        watek.start()
+    time.sleep(0.1)
+    start.set()
+    for watek in watki:
+        watek.join()
+    assert len(wywolania) == 1 and wyniki == [[1, 2, 3]] * 4
+    assert scalanie.wykonaj("klucz", lambda: "nowy") == "nowy"
+
+
+def test_klient_ponawia_odpowiedzi_429_i_bledy_serwera():
+    szybko = resilience.PolitykaPonowien(maks_prob=6, opoznienie_bazowe=0.01)
+    with SerwerZastepczy(stacje=10, limit=5) as serwer, api.KlientGios(serwer.adres, ponowienia=szybko) as klient:
+        bledy = [blad for _, _, blad in klient.czujniki_wielu(range(1, 11), maks_watkow=4) if blad is not None]
+        assert bledy == [] and serwer.liczniki["odrzucone"] > 0
+
+    with SerwerZastepczy(stacje=10, bledy=0.2, ziarno=1) as serwer, \
+            api.KlientGios(serwer.adres, ponowienia=szybko) as klient:
+        wyniki = list(klient.czujniki_wielu(range(1, 11), maks_watkow=4))
+        assert all(blad is None for _, _, blad in wyniki) and serwer.liczniki["bledy"] > 0
+
+    trzy_proby = resilience.PolitykaPonowien(maks_prob=3, opoznienie_bazowe=0.01)
+    with SerwerZastepczy(stacje=10, bledy=1.0) as serwer, api.KlientGios(serwer.adres, ponowienia=trzy_proby) as klient:
+        with pytest.raises(requests.HTTPError):
+            klient.czujniki(1)
+        with pytest.raises(resilience.ObwodOtwarty):
+            klient.czujniki(2)
+        assert serwer.liczniki["zapytania"] == 5
+        serwer.bledy = 0
+        assert len(klient.stacje()) == 10
+
+
+def test_nieudana_proba_z_innym_bledem_nie_blokuje_obwodu(monkeypatch):
+    zegar = Zegar()
+    bledy = [requests.exceptions.ChunkedEncodingError("zerwane połączenie")]
+
+    def zapytanie(self, sciezka, naglowki=None):
+        if bledy:
+            raise bledy.pop()
+        return odpowiedz(self.baza_url + sciezka, 200, b"[]")
+
+    monkeypatch.setattr(api.KlientGios, "_zapytanie", zapytanie)
+    with api.KlientGios(ponowienia=resilience.PolitykaPonowien(maks_prob=1)) as klient:
+        wylacznik = klient.wylaczniki["stacje"] = resilience.WylacznikObwodu(prog_bledow=1, czas_otwarcia=30,
+                                                                             zegar=zegar)
+        wylacznik.blad()
+        zegar.czas = 30
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            klient.stacje()
+        assert wylacznik.stan == "otwarty"
+        zegar.czas = 60
+        assert klient.stacje() == [] and wylacznik.stan == "zamkniety"
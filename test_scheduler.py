@@ -0,0 +1,56 @@
+import threading
+import time
+from scheduler import PlanistaZadan
+
+
+class KorzenTestowy:
+    def __init__(self):
+        self.oczekujace = []
+
+    def after(self, ms, funkcja):
+        self.oczekujace.append(funkcja)
+        return len(self.oczekujace)
+
+    def after_cancel(self, identyfikator):
+        pass
+
+    def przetworz(self, limit=5.0):
+        koniec = time.monotonic() + limit
+        while self.oczekujace and time.monotonic() < koniec:
+            self.oczekujace.pop(0)()
+            time.sleep(0.001)
+
+
+def test_nowsze_zadanie_zastepuje_starsze():
+    root = KorzenTestowy()
+    zwolnij = threading.Event()
+    wyniki = []
+    planista = PlanistaZadan(root, maks_watkow=2)
+    planista.uruchom("dane", lambda: zwolnij.wait() and "stare", po_sukcesie=wyniki.append)
+    planista.uruchom("dane", lambda x: x, "nowe", po_sukcesie=wyniki.append)
+    zwolnij.set()
+    root.przetworz()
+    assert wyniki == ["nowe"]
+    assert planista.aktywne() == 0
+    planista.zamknij()
+
+
+def test_identyczne_zadania_sa_laczone():
+    root = KorzenTestowy()
+    wywolania = []
+    wyniki = []
+    zmiany = []
+
+    def praca(x):
+        wywolania.append(x)
+        time.sleep(0.05)
+        return x * 2
+
+    planista = PlanistaZadan(root, przy_zmianie=zmiany.append)
+    planista.uruchom("czujniki", praca, 21, po_sukcesie=wyniki.append)
+    planista.uruchom("czujniki", praca, 21, po_sukcesie=wyniki.append)
+    root.przetworz()
+    assert wywolania == [21]
+    assert wyniki == [42]
+    assert zmiany[-1] == 0
+    planista.zamknij()
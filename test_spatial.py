@@ -0,0 +1,29 @@
+import random
+from geopy.distance import geodesic
+from spatial import IndeksPrzestrzenny, haversine_km
+
+
+def losowe_punkty(liczba, ziarno=7):
+    los = random.Random(ziarno)
+    return [(los.uniform(49.0, 55.0), los.uniform(14.0, 24.5), i) for i in range(liczba)]
+
+
+def test_w_promieniu_zgodne_z_geodesic():
+    punkty = losowe_punkty(2000)
+    indeks = IndeksPrzestrzenny(punkty)
+    for lat, lon, promien in [(52.23, 21.01, 50), (50.06, 19.94, 120), (54.35, 18.65, 0.5)]:
+        oczekiwane = {i for p_lat, p_lon, i in punkty if geodesic((lat, lon), (p_lat, p_lon)).km <= promien}
+        wynik = indeks.w_promieniu(lat, lon, promien)
+        assert {element for _, element in wynik} == oczekiwane
+        assert [odleglosc for odleglosc, _ in wynik] == sorted(odleglosc for odleglosc, _ in wynik)
+
+
+def test_najblizsze():
+    punkty = losowe_punkty(1000)
+    indeks = IndeksPrzestrzenny(punkty)
+    lat, lon = 51.76, 19.46
+    oczekiwane = sorted(punkty, key=lambda p: haversine_km(lat, lon, p[0], p[1]))[:5]
+    wynik = indeks.najblizsze(lat, lon, k=5)
+    assert [element for _, element in wynik] == [p[2] for p in oczekiwane]
+    assert abs(wynik[0][0] - haversine_km(lat, lon, oczekiwane[0][0], oczekiwane[0][1])) < 1e-6
+    assert len(indeks.najblizsze(lat, lon, k=5000)) == 1000
@@ -0,0 +1,61 @@
+import analysis
+import api
+import database
+import sync
+from gios_stub_server import SerwerZastepczy
+
+
+def odpowiedz(*pomiary):
+    return {'key': 'PM10', 'values': [{'date': data, 'value': wartosc} for data, wartosc in pomiary]}
+
+
+def test_synchronizuj_czujnik_zapisuje_tylko_nowe(monkeypatch):
+    database.utworz_tabele()
+    wynik = sync.synchronizuj_czujnik(1, 'PM10', odpowiedz(('2022-01-01 01:00:00', None),
+                                                          ('2022-01-01 00:00:00', 10.0)))
+    assert wynik == {'nowe': 2, 'znacznik': '2022-01-01 00:00:00'}
+
+    monkeypatch.setattr(api.KlientGios, 'dane', lambda self, id_czujnika: odpowiedz(('2022-01-01 02:00:00', 30.0),
+                                                                           ('2022-01-01 01:00:00', 20.0),
+                                                                           ('2022-01-01 00:00:00', 99.0)))
+    wynik = sync.synchronizuj_zapisane()
+    assert wynik == {1: {'nowe': 2, 'znacznik': '2022-01-01 02:00:00'}}
+    assert database.pobierz_wszystkie_dane(1) == [('2022-01-01 00:00:00', 10.0),
+                                                  ('2022-01-01 01:00:00', 20.0),
+                                                  ('2022-01-01 02:00:00', 30.0)]
+
+
+def test_czujniki_wybrane_w_aplikacji_trafiaja_do_rankingu():
+    database.utworz_tabele()
+    with SerwerZastepczy(stacje=5) as serwer, api.KlientGios(serwer.adres) as klient:
+        # Ścieżka aplikacji graficznej: wybór stacji, a następnie wybór i zapis czujnika PM10.
+        czujniki = sync.synchronizuj_czujniki_stacji(3, klient=klient)
+        czujnik = next(czujnik for czujnik in czujniki if czujnik['param']['paramCode'] == 'PM10')
+        sync.synchronizuj_czujnik(czujnik['id'], czujnik['param']['paramName'], klient.dane(czujnik['id']))
+    assert database.pobierz_czujniki_stacji(3) == [(czujnik['id'], czujnik['param']['paramName'])
+                                                   for czujnik in czujniki]
+    ranking = analysis.ranking_parametru('PM10', maks_procesow=1)
+    assert [(wiersz['id_stacji'], wiersz['id_czujnika']) for wiersz in ranking] == [(3, czujnik['id'])]
+
+
+def test_synchronizuj_czujnik_uzupelnia_luke_w_srodku():
+    database.utworz_tabele()
+    wynik = sync.synchronizuj_czujnik(1, 'PM10', odpowiedz(('2022-01-01 02:00:00', 30.0),
+                                                          ('2022-01-01 01:00:00', None),
+                                                          ('2022-01-01 00:00:00', 10.0)))
+    assert wynik == {'nowe': 3, 'znacznik': '2022-01-01 00:00:00'}
+
+    wynik = sync.synchronizuj_czujnik(1, 'PM10', odpowiedz(('2022-01-01 03:00:00', 40.0),
+                                                          ('2022-01-01 02:00:00', 30.0),
+                                                          ('2022-01-01 01:00:00', 20.0),
+                                                          ('2022-01-01 00:00:00', 10.0)))
+    assert wynik == {'nowe': 3, 'znacznik': '2022-01-01 03:00:00'}
+    assert database.pobierz_wszystkie_dane(1) == [('2022-01-01 00:00:00', 10.0), ('2022-01-01 01:00:00', 20.0),
+                                                  ('2022-01-01 02:00:00', 30.0), ('2022-01-01 03:00:00', 40.0)]
+    assert database.pobierz_statystyki(1)['liczba'] == 4
+
+    # Luka starsza niż pomiary zwracane przez API nie wstrzymuje już znacznika.
+    sync.synchronizuj_czujnik(2, 'PM10', odpowiedz(('2022-01-01 01:00:00', 20.0), ('2022-01-01 00:00:00', None)))
+    wynik = sync.synchronizuj_czujnik(2, 'PM10', odpowiedz(('2022-01-01 02:00:00', 30.0),
+                                                          ('2022-01-01 01:00:00', 20.0)))
+    assert wynik['znacznik'] == '2022-01-01 02:00:00'
@@ -0,0 +1,37 @@
+import numpy as np
+
+import analysis
+from timeseries import TimeSeries
+
+
+def test_z_json_sortuje_i_zamienia_braki_na_nan():
+    szereg = TimeSeries.z_json({'key': 'PM10', 'values': [{'date': '2022-01-01 02:00:00', 'value': 3.0},
+                                                          {'date': '2022-01-01 01:00:00', 'value': None},
+                                                          {'date': '2022-01-01 00:00:00', 'value': 1.0}]})
+    assert len(szereg) == 3 and szereg.rozmiar == 48
+    assert szereg.czasy.flags['C_CONTIGUOUS'] and np.all(np.diff(szereg.czasy) == 3600)
+    assert np.isnan(szereg.wartosci[1])
+    assert list(szereg) == [('2022-01-01 00:00:00', 1.0), ('2022-01-01 01:00:00', None), ('2022-01-01 02:00:00', 3.0)]
+    assert list(szereg.bez_brakow()) == [('2022-01-01 00:00:00', 1.0), ('2022-01-01 02:00:00', 3.0)]
+    assert len(TimeSeries.z_json({'values': []})) == 0
+
+
+def test_wycinek_nie_kopiuje_danych():
+    dane = [(f'2022-01-{dzien:02d} {godzina:02d}:00:00', float(dzien)) for dzien in range(1, 11) for godzina in range(24)]
+    szereg = TimeSeries.z_krotek(dane)
+    wycinek = szereg.wycinek('2022-01-03', '2022-01-04 23:00:00')
+    assert len(wycinek) == 48 and set(wycinek.wartosci) == {3.0, 4.0}
+    assert np.shares_memory(wycinek.wartosci, szereg.wartosci) and np.shares_memory(wycinek.czasy, szereg.czasy)
+    assert len(szereg.wycinek(do='2022-01-01 05:00:00')) == 6
+    assert len(szereg.wycinek(np.datetime64('2022-01-10T23:00:00'))) == 1
+    assert set(szereg.wycinek('2022-01-01', '2022-01-01').wartosci) == {1.0}
+    assert len(szereg.wycinek('2022-01-01', '2022-01-01')) == 24
+    assert len(szereg.wycinek('2022-01-09', np.datetime64('2022-01-10'))) == 48
+    assert len(szereg.wycinek(do='2022-01-02 00:00:00')) == 25
+
+
+def test_analiza_przyjmuje_szereg():
+    dane = [('2022-01-02 01:00:00', 70.0), ('2022-01-02 00:00:00', None), ('2022-01-01 01:00:00', 40.0),
+            ('2022-01-01 00:00:00', 10.0), ('2022-01-02 02:00:00', 60.0)]
+    assert analysis.analizuj_dane(TimeSeries.z_krotek(dane)) == analysis.analizuj_dane(dane)
+    assert analysis.analizuj_dane(TimeSeries()) is None
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+import requests
+
+import api
+import http_cache
+import resilience
+import transport
+from gios_stub_server import SerwerZastepczy
+
+
+def test_nagrane_odpowiedzi_sa_odtwarzane_bez_sieci(tmp_path):
+    katalog = str(tmp_path / "nagrania")
+    with SerwerZastepczy(stacje=3, godziny=30) as serwer:
+        nagrywajacy = transport.TransportNagrywajacy(katalog, transport.TransportRequests())
+        with api.KlientGios(serwer.adres, transport=nagrywajacy) as klient:
+            stacje = klient.stacje()
+            czujniki = klient.czujniki(stacje[0]['id'])
+            dane = klient.dane(czujniki[0]['id'])
+            indeks = klient.indeks(stacje[0]['id'])
+    assert len(stacje) == 3 and len(dane['values']) == 30
+    assert dane['values'][0]['date'] > dane['values'][-1]['date']
+    assert "pjp-api_rest_station_findAll.json" in os.listdir(katalog)
+
+    with api.KlientGios("http://niedostepny.invalid/pjp-api/rest/",
+                        transport=transport.TransportOdtwarzajacy(katalog)) as klient:
+        assert klient.stacje() == stacje
+        assert klient.czujniki(stacje[0]['id']) == czujniki
+        assert klient.dane(czujniki[0]['id']) == dane
+        assert klient.indeks(stacje[0]['id']) == indeks
+        with pytest.raises(transport.BrakNagrania):
+            klient.czujniki(999)
+
+
+def test_odtwarzanie_obsluguje_zapytania_warunkowe(tmp_path):
+    with SerwerZastepczy(stacje=2) as serwer:
+        transport.TransportNagrywajacy(str(tmp_path)).wyslij(serwer.adres + "station/findAll")
+    pamiec = http_cache.PamiecPodrecznaHttp(czasy_zycia={'stacje': 0})
+    with api.KlientGios(pamiec=pamiec, transport=transport.TransportOdtwarzajacy(str(tmp_path))) as klient:
+        assert klient.stacje() == klient.stacje()
+        assert pamiec.statystyki()['niezmienione'] == 1
+
+
+def test_serwer_zastepczy_zwraca_bledy_i_ogranicza_zapytania():
+    bez_ponowien = resilience.PolitykaPonowien(maks_prob=1)
+    with SerwerZastepczy(stacje=20, limit=1) as serwer, api.KlientGios(serwer.adres, ponowienia=bez_ponowien) as klient:
+        bledy = [blad for _, _, blad in klient.czujniki_wielu(range(1, 21), maks_watkow=4) if blad is not None]
+        assert serwer.liczniki['odrzucone'] == len(bledy) >= 10
+        assert bledy[0].response.status_code == 429 and bledy[0].response.headers["Retry-After"] == "1"
+
+    with SerwerZastepczy(stacje=20, bledy=1.0) as serwer, api.KlientGios(serwer.adres, ponowienia=bez_ponowien) as klient:
+        with pytest.raises(requests.HTTPError):
+            klient.stacje()
+        assert serwer.liczniki['bledy'] == 1
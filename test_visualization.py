@@ -0,0 +1,62 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+
+import visualization
+from timeseries import TimeSeries
+
+
+def test_lttb_zachowuje_konce_i_skoki():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.sin(x / 500)
+    y[4321] = 50.0
+    wybrane = visualization.lttb(x, y, 300)
+    assert len(wybrane) == 300
+    assert wybrane[0] == 0 and wybrane[-1] == 9999
+    assert np.all(np.diff(wybrane) > 0)
+    assert 4321 in wybrane
+    assert len(visualization.lttb(x[:50], y[:50], 300)) == 50
+
+
+def test_rysuj_serie_zmniejsza_i_wylacza_znaczniki():
+    dane = [(str(np.datetime64('2022-01-01T00:00:00') + np.timedelta64(godzina, 'h')).replace('T', ' '),
+             None if godzina % 7 == 0 else float(godzina % 24)) for godzina in range(5000)]
+    fig, ax = plt.subplots()
+    linia = visualization.rysuj_serie(ax, dane, liczba_punktow=400)
+    assert len(linia.get_xdata()) == 400
+    assert linia.get_marker() in (None, 'None', '')
+    szereg = visualization.rysuj_serie(ax, TimeSeries.z_krotek(dane), liczba_punktow=400)
+    assert np.array_equal(szereg.get_xdata(), linia.get_xdata())
+    linia = visualization.rysuj_serie(ax, dane[:20])
+    assert linia.get_marker() == 'o'
+    plt.close(fig)
+
+
+def test_wykres_na_zywo():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    zakresy = []
+    figura = Figure(figsize=(8, 4))
+    wykres = visualization.WykresNaZywo(figura, FigureCanvasAgg(figura),
+                                        przy_zmianie_zakresu=lambda *zakres: zakresy.append(zakres))
+    dane = [(f'2022-01-{dzien:02d} {godzina:02d}:00:00', float(godzina)) for dzien in range(1, 29)
+            for godzina in range(24)]
+    wykres.ustaw_serie('PM10', dane)
+    wykres.kanwa.draw()
+    linia = wykres.linie['PM10']
+    assert 3 <= len(linia.get_xdata()) <= wykres.szerokosc()
+    assert zakresy == []
+
+    wykres.ustaw_serie('PM10', dane[:10], dopasuj=False)
+    assert wykres.linie['PM10'] is linia and len(linia.get_xdata()) == 10
+    wykres.dopisz('PM10', [('2022-01-01 10:00:00', 5.0)])
+    assert len(linia.get_xdata()) == 11
+
+    wykres.ax.set_xlim(mdates.datestr2num('2022-01-02'), mdates.datestr2num('2022-01-03'))
+    assert zakresy[-1][:2] == ('2022-01-02 00:00:00', '2022-01-03 00:00:00')
+    wykres.usun_serie()
+    assert wykres.linie == {}
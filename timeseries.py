@@ -0,0 +1,163 @@
+import numpy as np
+
+_POLE_SERII = np.dtype([("czas", np.int64), ("wartosc", np.float64)])
+_SEKUND_NA_DOBE = 86400
+
+
+def _na_sekundy(czas, koniec_dnia=False):
+    # Tekst (yyyy-mm-dd lub yyyy-mm-dd HH:MM:SS), datetime64 albo liczba sekund od epoki. Przy koniec_dnia
+    # sama data (bez godziny) oznacza ostatnią sekundę tego dnia, tak jak w zapytaniach database.
+    if isinstance(czas, (int, np.integer)):
+        return int(czas)
+    if isinstance(czas, str):
+        czas = czas.strip().replace(" ", "T")
+    czas = np.datetime64(czas)
+    sekundy = int(czas.astype("datetime64[s]").astype(np.int64))
+    if koniec_dnia and np.datetime_data(czas.dtype)[0] == "D":
+        sekundy += _SEKUND_NA_DOBE - 1
+    return sekundy
+
+
+class TimeSeries:
+    """
+    Szereg pomiarowy w postaci dwóch ciągłych tablic: czasów (int64, sekundy od epoki) i wartości
+    (float64, NaN dla brakujących pomiarów), posortowany rosnąco według czasu.
+
+    Zajmuje 16 bajtów na pomiar zamiast ponad stu dla listy krotek (tekst daty, float), a analiza
+    i wykresy korzystają z tablic bez ponownego parsowania dat. Wycinki przedziałów czasu są
+    widokami tych samych tablic (bez kopiowania). Iteracja zwraca krotki (data, wartość) tak jak
+    database.pobierz_dane, więc szereg może zastąpić listę krotek w starszym kodzie.
+
+    Attributes:
+        czasy (numpy.ndarray): Czasy pomiarów w sekundach od epoki (int64).
+        wartosci (numpy.ndarray): Wartości pomiarów (float64, NaN dla brakujących pomiarów).
+    """
+
+    __slots__ = ("czasy", "wartosci")
+
+    def __init__(self, czasy=None, wartosci=None):
+        """
+        Inicjalizuje obiekt klasy TimeSeries.
+
+        Args:
+            czasy (numpy.ndarray): Czasy w sekundach od epoki (int64) lub datetime64; sortowane, jeśli trzeba.
+            wartosci (numpy.ndarray): Wartości pomiarów; None i NaN oznaczają brak pomiaru.
+        """
+        czasy = np.empty(0, dtype=np.int64) if czasy is None else np.asarray(czasy)
+        if np.issubdtype(czasy.dtype, np.datetime64):
+            czasy = czasy.astype("datetime64[s]").view(np.int64)
+        czasy = np.ascontiguousarray(czasy, dtype=np.int64)
+        wartosci = np.ascontiguousarray(np.empty(0) if wartosci is None else wartosci, dtype=np.float64)
+        if len(czasy) != len(wartosci):
+            raise ValueError("Tablice czasów i wartości mają różne długości.")
+        if len(czasy) > 1 and np.any(czasy[1:] < czasy[:-1]):
+            kolejnosc = np.argsort(czasy, kind="stable")
+            czasy, wartosci = czasy[kolejnosc], wartosci[kolejnosc]
+        self.czasy = czasy
+        self.wartosci = wartosci
+
+    @classmethod
+    def z_json(cls, odpowiedz):
+        """
+        Tworzy szereg z odpowiedzi data/getData API GIOŚ (pomiary od najnowszego).
+
+        Args:
+            odpowiedz (dict): Odpowiedź API z listą "values" słowników z kluczami "date" i "value".
+
+        Returns:
+            TimeSeries: Szereg pomiarów.
+        """
+        pomiary = odpowiedz.get("values") or []
+        czasy = np.fromiter((pomiar["date"] for pomiar in pomiary), dtype="datetime64[s]", count=len(pomiary))
+        wartosci = np.fromiter((pomiar["value"] for pomiar in pomiary), dtype=np.float64, count=len(pomiary))
+        return cls(czasy[::-1], wartosci[::-1])
+
+    @classmethod
+    def z_kursora(cls, kursor):
+        """
+        Tworzy szereg z kursora SQLite zwracającego wiersze (czas w sekundach od epoki, wartość).
+
+        Args:
+            kursor (sqlite3.Cursor): Kursor zapytania, np. SELECT CAST(strftime('%s', data) AS INTEGER), wartosc.
+
+        Returns:
+            TimeSeries: Szereg pomiarów.
+        """
+        wiersze = np.fromiter(kursor, dtype=_POLE_SERII)
+        return cls(wiersze["czas"], wiersze["wartosc"])
+
+    @classmethod
+    def z_krotek(cls, dane):
+        """
+        Tworzy szereg z listy krotek (data w formacie yyyy-mm-dd HH:MM:SS, wartość lub None).
+
+        Args:
+            dane (iterable): Krotki (data, wartość), np. wynik database.pobierz_dane.
+
+        Returns:
+            TimeSeries: Szereg pomiarów.
+        """
+        if isinstance(dane, cls):
+            return dane
+        wiersze = np.array(list(dane), dtype=object).reshape(-1, 2)
+        return cls(wiersze[:, 0].astype("datetime64[s]"), wiersze[:, 1].astype(np.float64))
+
+    def __len__(self):
+        return len(self.czasy)
+
+    def __iter__(self):
+        for data, wartosc in zip(np.datetime_as_string(self.daty(), unit="s").tolist(), self.wartosci.tolist()):
+            yield data.replace("T", " "), None if wartosc != wartosc else wartosc
+
+    def __repr__(self):
+        return f"TimeSeries({len(self)} pomiarów)"
+
+    def daty(self):
+        """
+        Zwraca czasy pomiarów jako widok datetime64[s] tej samej tablicy.
+
+        Returns:
+            numpy.ndarray: Czasy pomiarów (datetime64[s]).
+        """
+        return self.czasy.view("datetime64[s]")
+
+    def wycinek(self, od=None, do=None):
+        """
+        Zwraca pomiary z przedziału czasu [od, do] jako widok tych samych tablic (bez kopiowania).
+
+        Args:
+            od: Początek przedziału: tekst yyyy-mm-dd[ HH:MM:SS], datetime64, sekundy od epoki lub None.
+            do: Koniec przedziału (włącznie) w tej samej postaci lub None; sama data oznacza koniec tego dnia.
+
+        Returns:
+            TimeSeries: Szereg współdzielący pamięć z tym szeregiem.
+        """
+        poczatek = 0 if od is None else int(np.searchsorted(self.czasy, _na_sekundy(od), side="left"))
+        koniec = len(self.czasy) if do is None else int(np.searchsorted(self.czasy, _na_sekundy(do, True),
+                                                                        side="right"))
+        wycinek = object.__new__(type(self))
+        wycinek.czasy = self.czasy[poczatek:koniec]
+        wycinek.wartosci = self.wartosci[poczatek:koniec]
+        return wycinek
+
+    def bez_brakow(self):
+        """
+        Zwraca szereg bez brakujących pomiarów (kopia, jeśli jakiegoś brakuje).
+
+        Returns:
+            TimeSeries: Szereg bez wartości NaN.
+        """
+        obecne = ~np.isnan(self.wartosci)
+        if obecne.all():
+            return self
+        szereg = object.__new__(type(self))
+        szereg.czasy = self.czasy[obecne]
+        szereg.wartosci = self.wartosci[obecne]
+        return szereg
+
+    @property
+    def rozmiar(self):
+        """
+        Liczba bajtów zajmowanych przez tablice szeregu.
+        """
+        return self.czasy.nbytes + self.wartosci.nbytes
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Nagłówki odpowiedzi zapisywane w nagraniach; pozostałe nie są potrzebne klientowi ani pamięci podręcznej.
+ZAPISYWANE_NAGLOWKI = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+
+
+class BrakNagrania(requests.RequestException):
+    """
+    Błąd zgłaszany przez TransportOdtwarzajacy, gdy dla zapytania nie ma nagranej odpowiedzi.
+    """
+
+
+def odpowiedz(url, status, tresc=b"", naglowki=None):
+    """
+    Tworzy obiekt requests.Response z podanych danych, np. z nagrania.
+
+    Args:
+        url (str): Adres zapytania.
+        status (int): Kod odpowiedzi HTTP.
+        tresc (bytes): Treść odpowiedzi.
+        naglowki (dict): Nagłówki odpowiedzi.
+
+    Returns:
+        requests.Response: Odpowiedź, na której działają m.in. json() i raise_for_status().
+    """
+    wynik = requests.Response()
+    wynik.url = url
+    wynik.status_code = status
+    wynik.reason = {200: "OK", 304: "Not Modified", 404: "Not Found"}.get(status, "")
+    wynik._content = tresc
+    wynik.headers = CaseInsensitiveDict(naglowki or {})
+    wynik.encoding = "utf-8"
+    return wynik
+
+
+def nazwa_nagrania(url):
+    """
+    Zwraca nazwę pliku nagrania dla adresu zapytania (ścieżka bez hosta, np. pjp-api_rest_station_findAll.json).
+
+    Args:
+        url (str): Adres zapytania.
+
+    Returns:
+        str: Nazwa pliku.
+    """
+    czesci = urlsplit(url)
+    nazwa = re.sub(r"[^A-Za-z0-9.-]+", "_", czesci.path.strip("/")) or "_"
+    if czesci.query:
+        nazwa += "_" + hashlib.sha1(czesci.query.encode("utf-8")).hexdigest()[:8]
+    return f"{nazwa}.json"
+
+
+class TransportRequests:
+    """
+    Transport HTTP oparty na requests.Session z pulą połączeń keep-alive.
+
+    Attributes:
+        sesja (requests.Session): Współdzielona sesja HTTP.
+    """
+
+    def __init__(self, maks_polaczen=16):
+        """
+        Inicjalizuje obiekt klasy TransportRequests.
+
+        Args:
+            maks_polaczen (int): Maksymalna liczba połączeń w puli.
+        """
+        self.sesja = requests.Session()
+        self.sesja.verify = certifi.where()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maks_polaczen)
+        self.sesja.mount("https://", adapter)
+        self.sesja.mount("http://", adapter)
+
+    def wyslij(self, url, naglowki=None, limit_czasu=None):
+        return self.sesja.get(url, headers=naglowki, timeout=limit_czasu)
+
+    def zamknij(self):
+        self.sesja.close()
+
+
+class TransportNagrywajacy:
+    """
+    Transport przekazujący zapytania do innego transportu i zapisujący odpowiedzi do plików nagrań.
+
+    Nagrania (po jednym pliku JSON na ścieżkę zapytania) może później odtworzyć TransportOdtwarzajacy.
+    Odpowiedzi 304 nie są zapisywane, bo nie zawierają treści.
+
+    Attributes:
+        katalog (str): Katalog nagrań.
+        wewnetrzny: Transport wykonujący zapytania, np. TransportRequests.
+    """
+
+    def __init__(self, katalog, wewnetrzny=None):
+        """
+        Inicjalizuje obiekt klasy TransportNagrywajacy.
+
+        Args:
+            katalog (str): Katalog nagrań (tworzony, jeśli nie istnieje).
+            wewnetrzny: Transport wykonujący zapytania; domyślnie TransportRequests().
+        """
+        self.katalog = katalog
+        self.wewnetrzny = wewnetrzny or TransportRequests()
+        os.makedirs(katalog, exist_ok=True)
+
+    def wyslij(self, url, naglowki=None, limit_czasu=None):
+        wynik = self.wewnetrzny.wyslij(url, naglowki, limit_czasu)
+        if wynik.status_code != 304:
+            nagranie = {
+                "url": url,
+                "status": wynik.status_code,
+                "naglowki": {nazwa: wynik.headers[nazwa] for nazwa in ZAPISYWANE_NAGLOWKI if nazwa in wynik.headers},
+                "tresc": wynik.content.decode("utf-8"),
+            }
+            sciezka = os.path.join(self.katalog, nazwa_nagrania(url))
+            tymczasowa = f"{sciezka}.{threading.get_ident()}.tmp"
+            with open(tymczasowa, "w", encoding="utf-8") as plik:
+                json.dump(nagranie, plik, ensure_ascii=False)
+            os.replace(tymczasowa, sciezka)
+        return wynik
+
+    def zamknij(self):
+        self.wewnetrzny.zamknij()
+
+
+class TransportOdtwarzajacy:
+    """
+    Transport zwracający odpowiedzi z plików nagrań, bez połączenia z siecią.
+
+    Zapytania warunkowe są obsługiwane: gdy nagłówek If-None-Match odpowiada nagranemu ETag,
+    zwracana jest odpowiedź 304. Nagrania bez ETag otrzymują ETag wyliczony z treści.
+
+    Attributes:
+        katalog (str): Katalog nagrań.
+    """
+
+    def __init__(self, katalog):
+        """
+        Inicjalizuje obiekt klasy TransportOdtwarzajacy.
+
+        Args:
+            katalog (str): Katalog nagrań zapisanych przez TransportNagrywajacy.
+        """
+        self.katalog = katalog
+        self._nagrania = {}
+        self._blokada = threading.Lock()
+
+    def _nagranie(self, url):
+        nazwa = nazwa_nagrania(url)
+        with self._blokada:
+            nagranie = self._nagrania.get(nazwa)
+        if nagranie is None:
+            try:
+                with open(os.path.join(self.katalog, nazwa), encoding="utf-8") as plik:
+                    nagranie = json.load(plik)
+            except FileNotFoundError:
+                raise BrakNagrania(f"Brak nagrania dla {url}") from None
+            naglowki = nagranie.setdefault("naglowki", {})
+            naglowki.setdefault("ETag", '"%s"' % hashlib.sha1(nagranie["tresc"].encode("utf-8")).hexdigest())
+            with self._blokada:
+                self._nagrania[nazwa] = nagranie
+        return nagranie
+
+    def wyslij(self, url, naglowki=None, limit_czasu=None):
+        nagranie = self._nagranie(url)
+        if (naglowki or {}).get("If-None-Match") == nagranie["naglowki"]["ETag"]:
+            return odpowiedz(url, 304, naglowki={"ETag": nagranie["naglowki"]["ETag"]})
+        return odpowiedz(url, nagranie["status"], nagranie["tresc"].encode("utf-8"), nagranie["naglowki"])
+
+    def zamknij(self):
+        with self._blokada:
+            self._nagrania.clear()
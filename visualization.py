@@ -1,27 +1,326 @@
+import time
+
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from datetime import datetime
+import numpy as np
+
+from analysis import na_tablice
+from timeseries import TimeSeries
+
+# Powyżej tej liczby punktów na serię znaczniki zlewają się w linię i tylko spowalniają rysowanie.
+PROG_ZNACZNIKOW = 200
+
+
+def lttb(x, y, liczba_punktow):
+    """
+    Wybiera punkty szeregu algorytmem Largest-Triangle-Three-Buckets.
+
+    Punkty pośrednie są dzielone na liczba_punktow - 2 koszyki; z każdego wybierany jest punkt
+    tworzący największy trójkąt z punktem wybranym w poprzednim koszyku i średnią następnego,
+    dzięki czemu zachowany jest kształt szeregu, w tym pojedyncze skoki wartości.
+
+    Args:
+        x (numpy.ndarray): Rosnące współrzędne x (np. czas w sekundach).
+        y (numpy.ndarray): Wartości bez NaN.
+        liczba_punktow (int): Docelowa liczba punktów.
+
+    Returns:
+        numpy.ndarray: Rosnące indeksy wybranych punktów (wszystkie, jeśli szereg jest krótszy).
+    """
+    rozmiar = len(x)
+    if liczba_punktow >= rozmiar or liczba_punktow < 3:
+        return np.arange(rozmiar)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    granice = np.linspace(1, rozmiar - 1, liczba_punktow - 1).astype(np.intp)
+    wybrane = np.empty(liczba_punktow, dtype=np.intp)
+    wybrane[0] = 0
+    wybrane[-1] = rozmiar - 1
+    a = 0
+    for i in range(liczba_punktow - 2):
+        poczatek, koniec = granice[i], granice[i + 1]
+        if i + 2 < len(granice):
+            nastepny = slice(granice[i + 1], granice[i + 2])
+            srednia_x, srednia_y = x[nastepny].mean(), y[nastepny].mean()
+        else:
+            srednia_x, srednia_y = x[-1], y[-1]
+        pola = np.abs((x[a] - srednia_x) * (y[poczatek:koniec] - y[a])
+                      - (x[a] - x[poczatek:koniec]) * (srednia_y - y[a]))
+        a = poczatek + int(np.argmax(pola))
+        wybrane[i + 1] = a
+    return wybrane
+
+
+def przygotuj_serie(dane, liczba_punktow=None):
+    """
+    Zamienia dane pomiarowe na tablice gotowe do rysowania, pomijając brakujące wartości.
+
+    Args:
+        dane (list | TimeSeries): Lista krotek zawierających datę w formacie yyyy-mm-dd HH:MM:SS i wartość
+            pomiaru albo szereg TimeSeries (używany bez kopiowania i parsowania dat).
+        liczba_punktow (int): Docelowa liczba punktów po zmniejszeniu algorytmem LTTB lub None.
+
+    Returns:
+        tuple: Tablica czasów datetime64[s] i tablica wartości float64.
+    """
+    if isinstance(dane, TimeSeries):
+        szereg = dane.bez_brakow()
+        czasy, wartosci = szereg.daty(), szereg.wartosci
+    else:
+        czasy, wartosci = na_tablice(dane)
+        obecne = ~np.isnan(wartosci)
+        czasy, wartosci = czasy[obecne], wartosci[obecne]
+    if len(czasy) > 1 and np.any(czasy[1:] < czasy[:-1]):
+        kolejnosc = np.argsort(czasy, kind="stable")
+        czasy, wartosci = czasy[kolejnosc], wartosci[kolejnosc]
+    if liczba_punktow is not None:
+        wybrane = lttb(czasy.astype(np.int64), wartosci, liczba_punktow)
+        czasy, wartosci = czasy[wybrane], wartosci[wybrane]
+    return czasy, wartosci
+
+
+def rysuj_serie(ax, dane, etykieta=None, kolor=None, liczba_punktow=None):
+    """
+    Rysuje serię pomiarów na osiach, zmniejszając ją do szerokości osi w pikselach.
+
+    Args:
+        ax (matplotlib.axes.Axes): Osie wykresu.
+        dane (list | TimeSeries): Lista krotek zawierających datę i wartość pomiaru albo szereg.
+        etykieta (str): Etykieta serii w legendzie.
+        kolor (str): Kolor linii; None oznacza kolor z cyklu matplotlib.
+        liczba_punktow (int): Docelowa liczba punktów; domyślnie szerokość osi w pikselach.
+
+    Returns:
+        matplotlib.lines.Line2D: Narysowana linia.
+    """
+    if liczba_punktow is None:
+        liczba_punktow = max(int(ax.get_window_extent().width), 3)
+    czasy, wartosci = przygotuj_serie(dane, liczba_punktow)
+    znacznik = 'o' if len(czasy) <= PROG_ZNACZNIKOW else None
+    linia, = ax.plot(czasy, wartosci, marker=znacznik, linestyle='-', color=kolor, label=etykieta)
+    return linia
+
+
+def _pokaz(fig, ax, data_od, data_do):
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Wartość')
+    ax.set_title(f'Dane pomiarowe od {data_od} do {data_do}')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True)
+    fig.tight_layout()
+    plt.show()
+
+
+def wykres_wielu(serie, data_od, data_do):
+    """
+    Wyświetla na jednym wykresie dane pomiarowe wielu czujników.
+
+    Args:
+        serie (dict): Słownik nazwa serii -> lista krotek zawierających datę i wartość pomiaru.
+        data_od (str): Data początkowa w formacie yyyy-mm-dd.
+        data_do (str): Data końcowa w formacie yyyy-mm-dd.
+
+    Returns:
+        None
+    """
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for nazwa, dane in serie.items():
+        rysuj_serie(ax, dane, etykieta=nazwa)
+    if len(serie) > 1:
+        ax.legend()
+    _pokaz(fig, ax, data_od, data_do)
+
 
 def wykres_danych(dane, data_od, data_do):
     """
     Wyświetla wykres danych pomiarowych w określonym przedziale czasowym.
 
+    Daty są parsowane wektorowo, a seria dłuższa niż szerokość wykresu w pikselach jest
+    zmniejszana algorytmem LTTB.
+
     Args:
-        dane (list): Lista krotek zawierających datę i wartość pomiaru.
+        dane (list | TimeSeries): Lista krotek zawierających datę i wartość pomiaru albo szereg.
         data_od (str): Data początkowa w formacie yyyy-mm-dd.
         data_do (str): Data końcowa w formacie yyyy-mm-dd.
 
     Returns:
         None
     """
-    daty = [datetime.strptime(entry[0], "%Y-%m-%d %H:%M:%S") for entry in dane]
-    wartosci = [entry[1] for entry in dane]
-
-    plt.figure(figsize=(10, 5))
-    plt.plot(daty, wartosci, marker='o', linestyle='-', color='b')
-    plt.xlabel('Data')
-    plt.ylabel('Wartość')
-    plt.title(f'Dane pomiarowe od {data_od} do {data_do}')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.grid(True)
-    plt.show()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    rysuj_serie(ax, dane, kolor='b')
+    _pokaz(fig, ax, data_od, data_do)
+
+
+class WykresNaZywo:
+    """
+    Wykres osadzony w oknie aplikacji, aktualizowany bez tworzenia nowej figury.
+
+    Linie serii są tworzone raz i aktualizowane przez set_data. Dopóki zakres osi się nie zmienia,
+    odświeżenie przywraca zapamiętane tło i rysuje wyłącznie linie (blitting), więc trwa
+    milisekundy niezależnie od liczby elementów wykresu. Po przybliżeniu lub przesunięciu
+    wywoływana jest funkcja przy_zmianie_zakresu, która może pobrać dane widocznego przedziału
+    w odpowiedniej rozdzielczości i przekazać je do ustaw_serie.
+
+    Attributes:
+        figura (matplotlib.figure.Figure): Figura wykresu.
+        kanwa (FigureCanvasBase): Kanwa figury, np. FigureCanvasTkAgg.
+        ax (matplotlib.axes.Axes): Osie wykresu.
+        linie (dict): Słownik nazwa serii -> linia (Line2D).
+        przy_zmianie_zakresu (callable): Funkcja (data_od, data_do, liczba_punktow) wywoływana po
+            zmianie zakresu osi czasu przez użytkownika lub None.
+        czas_odswiezenia (float): Czas ostatniego odświeżenia w sekundach.
+    """
+
+    def __init__(self, figura, kanwa, przy_zmianie_zakresu=None):
+        """
+        Inicjalizuje obiekt klasy WykresNaZywo.
+
+        Args:
+            figura (matplotlib.figure.Figure): Figura wykresu.
+            kanwa (FigureCanvasBase): Kanwa figury.
+            przy_zmianie_zakresu (callable): Funkcja wywoływana po zmianie zakresu osi czasu lub None.
+        """
+        self.figura = figura
+        self.kanwa = kanwa
+        self.ax = figura.axes[0] if figura.axes else figura.add_subplot()
+        self.linie = {}
+        self.przy_zmianie_zakresu = przy_zmianie_zakresu
+        self.czas_odswiezenia = None
+        self._tlo = None
+        self._wlasna_zmiana = False
+        self.ax.set_xlabel('Data')
+        self.ax.set_ylabel('Wartość')
+        self.ax.grid(True)
+        kanwa.mpl_connect('draw_event', self._po_rysowaniu)
+        self.ax.callbacks.connect('xlim_changed', self._zmiana_zakresu)
+
+    @classmethod
+    def w_oknie(cls, master, przy_zmianie_zakresu=None):
+        """
+        Tworzy wykres z paskiem narzędzi (przybliżanie, przesuwanie) w kontenerze Tk.
+
+        Args:
+            master (tk.Widget): Kontener, w którym zostanie umieszczony wykres.
+            przy_zmianie_zakresu (callable): Funkcja wywoływana po zmianie zakresu osi czasu lub None.
+
+        Returns:
+            WykresNaZywo: Osadzony wykres.
+        """
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        from matplotlib.figure import Figure
+
+        figura = Figure(figsize=(10, 4), layout='constrained')
+        figura.add_subplot()
+        kanwa = FigureCanvasTkAgg(figura, master=master)
+        NavigationToolbar2Tk(kanwa, master).update()
+        kanwa.get_tk_widget().pack(fill='both', expand=True)
+        return cls(figura, kanwa, przy_zmianie_zakresu)
+
+    def szerokosc(self):
+        return max(int(self.ax.bbox.width), 3)
+
+    def zakres(self):
+        """
+        Zwraca widoczny przedział czasu i szerokość osi w pikselach.
+
+        Returns:
+            tuple: Data początkowa i końcowa w formacie yyyy-mm-dd HH:MM:SS oraz liczba punktów.
+        """
+        od, do = (mdates.num2date(x).strftime("%Y-%m-%d %H:%M:%S") for x in self.ax.get_xlim())
+        return od, do, self.szerokosc()
+
+    def ustaw_serie(self, nazwa, dane, dopasuj=True):
+        """
+        Ustawia dane serii, tworząc jej linię przy pierwszym użyciu.
+
+        Args:
+            nazwa (str): Nazwa serii (etykieta w legendzie).
+            dane (list | TimeSeries): Lista krotek zawierających datę i wartość pomiaru albo szereg.
+            dopasuj (bool): Czy dopasować zakres osi do danych (pełne przerysowanie) zamiast blittingu.
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        czasy, wartosci = przygotuj_serie(dane, self.szerokosc())
+        linia = self.linie.get(nazwa)
+        if linia is None:
+            linia, = self.ax.plot([], [], linestyle='-', label=nazwa, animated=True)
+            self.linie[nazwa] = linia
+            dopasuj = True
+        linia.set_data(czasy, wartosci)
+        linia.set_marker('o' if len(czasy) <= PROG_ZNACZNIKOW else '')
+        self._odswiez(dopasuj)
+        self.czas_odswiezenia = time.perf_counter() - start
+
+    def dopisz(self, nazwa, dane):
+        """
+        Dopisuje nowe pomiary na końcu serii.
+
+        Args:
+            nazwa (str): Nazwa serii.
+            dane (list | TimeSeries): Pomiary (krotki data, wartość albo szereg) późniejsze niż dane serii.
+
+        Returns:
+            None
+        """
+        linia = self.linie.get(nazwa)
+        if linia is None:
+            self.ustaw_serie(nazwa, dane)
+            return
+        start = time.perf_counter()
+        czasy, wartosci = przygotuj_serie(dane)
+        if not len(czasy):
+            return
+        linia.set_data(np.concatenate([linia.get_xdata(), czasy]), np.concatenate([linia.get_ydata(), wartosci]))
+        self._odswiez(mdates.date2num(czasy[-1]) > self.ax.get_xlim()[1])
+        self.czas_odswiezenia = time.perf_counter() - start
+
+    def usun_serie(self, nazwa=None):
+        """
+        Usuwa serię o podanej nazwie albo, gdy nazwa jest None, wszystkie serie.
+
+        Args:
+            nazwa (str): Nazwa serii lub None.
+
+        Returns:
+            None
+        """
+        for klucz in [nazwa] if nazwa is not None else list(self.linie):
+            linia = self.linie.pop(klucz, None)
+            if linia is not None:
+                linia.remove()
+        self._odswiez(True)
+
+    def _odswiez(self, dopasuj):
+        if not dopasuj and self._tlo is not None:
+            self.kanwa.restore_region(self._tlo)
+            self._rysuj_linie()
+            self.kanwa.blit(self.ax.bbox)
+            return
+        self._wlasna_zmiana = True
+        try:
+            self.ax.relim()
+            self.ax.autoscale_view()
+        finally:
+            self._wlasna_zmiana = False
+        legenda = self.ax.get_legend()
+        if len(self.linie) > 1:
+            self.ax.legend()
+        elif legenda is not None:
+            legenda.remove()
+        self.kanwa.draw_idle()
+
+    def _rysuj_linie(self):
+        for linia in self.linie.values():
+            self.ax.draw_artist(linia)
+
+    def _po_rysowaniu(self, event):
+        # Tło (osie, siatka, legenda) jest zapamiętywane po każdym pełnym rysowaniu; linie są animowane
+        # i rysowane osobno, więc kolejne odświeżenia nie przerysowują całej figury.
+        self._tlo = self.kanwa.copy_from_bbox(self.ax.bbox)
+        self._rysuj_linie()
+
+    def _zmiana_zakresu(self, ax):
+        if not self._wlasna_zmiana and self.przy_zmianie_zakresu is not None:
+            self.przy_zmianie_zakresu(*self.zakres())